@@ -0,0 +1,82 @@
+from CommonServerPython import *  # noqa: F401
+from CommonServerUserPython import *  # noqa: F401
+
+import functools
+from typing import Dict, List, Optional, Tuple
+
+from netaddr import IPAddress, IPNetwork
+
+
+CIDR_INDEX_CACHE_SIZE = 16
+ADDRESS_BITS = {4: 32, 6: 128}
+
+
+class CIDRIndex:
+    """ A prefix trie of CIDR ranges to find the range which includes an IP address in O(address bits),
+    regardless of the number of the ranges.
+
+    Each node is a list of [child for bit 0, child for bit 1, the range which ends at the node].
+    """
+
+    def __init__(self, cidr_ranges: List[str]):
+        self._roots: Dict[int, list] = {4: [None, None, None], 6: [None, None, None]}
+        for cidr_range in cidr_ranges:
+            self.add(cidr_range)
+
+    def add(self, cidr_range: str):
+        """ Add a CIDR range to the index
+
+        :param cidr_range: The CIDR range, e.g. 10.0.0.0/8.
+        """
+        network = IPNetwork(cidr_range)
+        bits = ADDRESS_BITS[network.version]
+        node = self._roots[network.version]
+        for i in range(bits - 1, bits - 1 - network.prefixlen, -1):
+            if node[2] is not None:
+                # The range is already included in a shorter range
+                return
+            bit = (network.first >> i) & 1
+            if node[bit] is None:
+                node[bit] = [None, None, None]
+            node = node[bit]
+        if node[2] is None:
+            node[2] = cidr_range
+
+    def lookup(self, ip_address: str) -> Optional[str]:
+        """ Get the range which includes an IP address
+
+        :param ip_address: The IP address.
+        :return: The shortest prefix range which includes the IP address, or None if no range includes it.
+        """
+        ip = IPAddress(ip_address)
+        value = ip.value
+        node = self._roots[ip.version]
+        for i in range(ADDRESS_BITS[ip.version] - 1, -1, -1):
+            if node[2] is not None:
+                return node[2]
+            node = node[(value >> i) & 1]
+            if node is None:
+                return None
+        return node[2]
+
+    def lookup_many(self, ip_addresses: List[str]) -> List[Optional[str]]:
+        """ Get the ranges which include IP addresses
+
+        :param ip_addresses: The IP addresses.
+        :return: The range which includes each of the IP addresses (None if no range includes it), in the same order.
+        """
+        return [self.lookup(ip_address) for ip_address in ip_addresses]
+
+
+@functools.lru_cache(maxsize=CIDR_INDEX_CACHE_SIZE)
+def _build_cidr_index(cidr_ranges: Tuple[str, ...]) -> CIDRIndex:
+    return CIDRIndex(list(cidr_ranges))
+
+
+def get_cidr_index(cidr_ranges: List[str]) -> CIDRIndex:
+    """ Get the index of CIDR ranges. The index is built once for the same list of ranges, and reused.
+
+    :param cidr_ranges: The CIDR ranges.
+    :return: The index of the ranges.
+    """
+    return _build_cidr_index(tuple(cidr_ranges))
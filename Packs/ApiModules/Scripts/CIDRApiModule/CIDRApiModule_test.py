@@ -0,0 +1,66 @@
+import random
+
+import pytest
+from netaddr import IPAddress, IPNetwork
+
+from CIDRApiModule import CIDRIndex, get_cidr_index
+
+
+@pytest.mark.parametrize('ip_address, expected', [
+    ('10.5.5.5', '10.0.0.0/8'),
+    ('10.1.2.3', '10.0.0.0/8'),
+    ('172.16.0.1', None),
+    ('192.168.1.1', '192.168.1.1'),
+    ('192.168.1.2', None),
+    ('5.6.255.255', '5.6.7.8/16'),
+    ('2001:db8::1', '2001:db8::/32'),
+    ('2001:db9::1', None),
+])
+def test_cidr_index_lookup(ip_address, expected):
+    """
+    Given
+    - an index of IPv4 and IPv6 CIDR ranges, including nested ranges and ranges with host bits
+    When
+    - looking up an IP address
+    Then
+    - the shortest prefix range which includes the IP address is returned, or None if no range includes it
+    """
+    index = CIDRIndex(['10.1.0.0/16', '10.0.0.0/8', '192.168.1.1', '5.6.7.8/16', '2001:db8::/32'])
+    assert index.lookup(ip_address) == expected
+
+
+def test_cidr_index_lookup_many():
+    """
+    Given
+    - random CIDR ranges and random IP addresses
+    When
+    - looking up the IP addresses in bulk
+    Then
+    - an IP address is found in the index if and only if any of the ranges includes it
+    """
+    rand = random.Random(0)
+    cidr_ranges = [f'{IPAddress(rand.getrandbits(32))}/{rand.randint(0, 32)}' for _ in range(20)]
+    cidr_ranges += [f'{IPAddress(rand.getrandbits(32))}/{rand.randint(12, 32)}' for _ in range(300)]
+    ip_addresses = [str(IPAddress(rand.getrandbits(32))) for _ in range(300)]
+    networks = [IPNetwork(cidr_range) for cidr_range in cidr_ranges]
+
+    results = CIDRIndex(cidr_ranges).lookup_many(ip_addresses)
+
+    assert len(results) == len(ip_addresses)
+    for ip_address, cidr_range in zip(ip_addresses, results):
+        assert (cidr_range is not None) == any(IPAddress(ip_address) in network for network in networks)
+        assert cidr_range is None or IPAddress(ip_address) in IPNetwork(cidr_range)
+
+
+def test_get_cidr_index():
+    """
+    Given
+    - lists of CIDR ranges
+    When
+    - getting the index of the ranges
+    Then
+    - the index is built once for the same list of ranges
+    """
+    index = get_cidr_index(['10.0.0.0/8', '192.168.0.0/16'])
+    assert get_cidr_index(['10.0.0.0/8', '192.168.0.0/16']) is index
+    assert get_cidr_index(['10.0.0.0/8']) is not index
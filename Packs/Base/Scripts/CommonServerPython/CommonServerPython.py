@@ -653,72 +653,165 @@ def get_schedule_metadata(context):
     return schedule_metadata
 
 
-def auto_detect_indicator_type(indicator_value):
+class IndicatorTypeClassifier(object):
     """
-      Infer the type of the indicator.
-
-      :type indicator_value: ``str``
-      :param indicator_value: The indicator whose type we want to check. (required)
+      Infers the type of indicators. Meant to be created once and reused for many indicators, as it compiles
+      the indicator regexes and loads the public suffix list a single time, and skips regexes that can't
+      match a value based on its first character, length and separators.
+      The results are identical to those of running the indicator regexes one by one.
 
-      :return: The type of the indicator.
-      :rtype: ``str``
+      :return: No data returned
+      :rtype: ``None``
     """
-    try:
-        import tldextract
-    except Exception:
-        raise Exception("Missing tldextract module, In order to use the auto detect function please use a docker"
-                        " image with it installed such as: demisto/jmespath")
+    HEX_CHARS = frozenset('0123456789abcdefABCDEF')
+    DIGIT_CHARS = frozenset('0123456789')
 
-    if re.match(ipv4cidrRegex, indicator_value):
-        return FeedIndicatorType.CIDR
+    def __init__(self):
+        try:
+            import tldextract
+        except Exception:
+            raise Exception("Missing tldextract module, In order to use the auto detect function please use a docker"
+                            " image with it installed such as: demisto/jmespath")
+
+        self._tldextract = tldextract
+        self._suffix_extract = None
+        self._ipv4cidr = re.compile(ipv4cidrRegex)
+        self._ipv6cidr = re.compile(ipv6cidrRegex)
+        self._ipv4 = re.compile(ipv4Regex)
+        self._ipv6 = re.compile(ipv6Regex)
+        self._url = re.compile(urlRegex)
+        self._email = re.compile(emailRegex)
+        self._cve = re.compile(cveRegex)
+
+    def _get_suffix_extract(self):
+        if self._suffix_extract is None:
+            if LooseVersion(self._tldextract.__version__) < '3.0.0':
+                self._suffix_extract = self._tldextract.TLDExtract(cache_file=False, suffix_list_urls=None)
+            else:
+                self._suffix_extract = self._tldextract.TLDExtract(cache_dir=False, suffix_list_urls=None)
+        return self._suffix_extract
 
-    if re.match(ipv6cidrRegex, indicator_value):
-        return FeedIndicatorType.IPv6CIDR
+    def classify(self, indicator_value):
+        """
+          Infer the type of the indicator.
 
-    if re.match(ipv4Regex, indicator_value):
-        return FeedIndicatorType.IP
+          :type indicator_value: ``str``
+          :param indicator_value: The indicator whose type we want to check. (required)
 
-    if re.match(ipv6Regex, indicator_value):
-        return FeedIndicatorType.IPv6
+          :return: The type of the indicator, or None if it could not be detected.
+          :rtype: ``str``
+        """
+        first_char = indicator_value[:1]
+        starts_with_digit = first_char in self.DIGIT_CHARS
+        starts_with_hex = first_char in self.HEX_CHARS
+        value_length = len(indicator_value)
+        has_slash = '/' in indicator_value
+        has_colon = ':' in indicator_value
+
+        if starts_with_digit and has_slash and self._ipv4cidr.match(indicator_value):
+            return FeedIndicatorType.CIDR
 
-    if re.match(sha256Regex, indicator_value):
-        return FeedIndicatorType.File
+        if starts_with_hex and has_colon and has_slash and self._ipv6cidr.match(indicator_value):
+            return FeedIndicatorType.IPv6CIDR
 
-    if re.match(urlRegex, indicator_value):
-        return FeedIndicatorType.URL
+        if starts_with_digit and self._ipv4.match(indicator_value):
+            return FeedIndicatorType.IP
 
-    if re.match(md5Regex, indicator_value):
-        return FeedIndicatorType.File
+        if starts_with_hex and has_colon and self._ipv6.match(indicator_value):
+            return FeedIndicatorType.IPv6
 
-    if re.match(sha1Regex, indicator_value):
-        return FeedIndicatorType.File
+        if starts_with_hex and value_length >= 64 and sha256Regex.match(indicator_value):
+            return FeedIndicatorType.File
 
-    if re.match(emailRegex, indicator_value):
-        return FeedIndicatorType.Email
+        if (has_slash or indicator_value[:3].lower() in ('www', 'ftp')) and self._url.match(indicator_value):
+            return FeedIndicatorType.URL
 
-    if re.match(cveRegex, indicator_value):
-        return FeedIndicatorType.CVE
+        if starts_with_hex and value_length >= 32 and md5Regex.match(indicator_value):
+            return FeedIndicatorType.File
 
-    if re.match(sha512Regex, indicator_value):
-        return FeedIndicatorType.File
+        if starts_with_hex and value_length >= 40 and sha1Regex.match(indicator_value):
+            return FeedIndicatorType.File
 
-    try:
-        tldextract_version = tldextract.__version__
-        if LooseVersion(tldextract_version) < '3.0.0':
-            no_cache_extract = tldextract.TLDExtract(cache_file=False, suffix_list_urls=None)
-        else:
-            no_cache_extract = tldextract.TLDExtract(cache_dir=False, suffix_list_urls=None)
+        if '@' in indicator_value and self._email.match(indicator_value):
+            return FeedIndicatorType.Email
+
+        if indicator_value[:4].lower() == 'cve-' and self._cve.match(indicator_value):
+            return FeedIndicatorType.CVE
+
+        if starts_with_hex and value_length >= 128 and sha512Regex.match(indicator_value):
+            return FeedIndicatorType.File
+
+        try:
+            if self._get_suffix_extract()(indicator_value).suffix:
+                if '*' in indicator_value:
+                    return FeedIndicatorType.DomainGlob
+                return FeedIndicatorType.Domain
+
+        except Exception:
+            demisto.debug('tldextract failed to detect indicator type. indicator value: {}'.format(indicator_value))
+
+        demisto.debug('Failed to detect indicator type. Indicator value: {}'.format(indicator_value))
+        return None
+
+    def classify_many(self, indicator_values):
+        """
+          Infer the types of many indicators. Repeating values are classified only once.
+
+          :type indicator_values: ``list``
+          :param indicator_values: The indicators whose types we want to check. (required)
+
+          :return: The types of the indicators, in the order of the given values.
+          :rtype: ``list``
+        """
+        types_by_value = {}  # type: dict
+        indicator_types = []
+        for indicator_value in indicator_values:
+            if indicator_value not in types_by_value:
+                types_by_value[indicator_value] = self.classify(indicator_value)
+            indicator_types.append(types_by_value[indicator_value])
+        return indicator_types
+
+
+_INDICATOR_TYPE_CLASSIFIER = None
 
-        if no_cache_extract(indicator_value).suffix:
-            if '*' in indicator_value:
-                return FeedIndicatorType.DomainGlob
-            return FeedIndicatorType.Domain
 
-    except Exception:
-        demisto.debug('tldextract failed to detect indicator type. indicator value: {}'.format(indicator_value))
+def get_indicator_type_classifier():
+    """
+      Get the indicator type classifier of this process, creating it on first use.
+
+      :return: The indicator type classifier.
+      :rtype: ``IndicatorTypeClassifier``
+    """
+    global _INDICATOR_TYPE_CLASSIFIER
+    if _INDICATOR_TYPE_CLASSIFIER is None:
+        _INDICATOR_TYPE_CLASSIFIER = IndicatorTypeClassifier()
+    return _INDICATOR_TYPE_CLASSIFIER
+
+
+def auto_detect_indicator_type(indicator_value):
+    """
+      Infer the type of the indicator.
+
+      :type indicator_value: ``str``
+      :param indicator_value: The indicator whose type we want to check. (required)
+
+      :return: The type of the indicator.
+      :rtype: ``str``
+    """
+    return get_indicator_type_classifier().classify(indicator_value)
 
-    demisto.debug('Failed to detect indicator type. Indicator value: {}'.format(indicator_value))
-    return None
+
+def auto_detect_indicators_types(indicator_values):
+    """
+      Infer the types of many indicators at once. Faster than calling ``auto_detect_indicator_type`` per indicator.
+
+      :type indicator_values: ``list``
+      :param indicator_values: The indicators whose types we want to check. (required)
+
+      :return: The types of the indicators, in the order of the given values.
+      :rtype: ``list``
+    """
+    return get_indicator_type_classifier().classify_many(indicator_values)
 
 
 def add_http_prefix_if_missing(address=''):
@@ -1832,9 +1925,87 @@ def argToBoolean(value):
         raise ValueError('Argument is neither a string nor a boolean')
 
 
+def _context_item_dedup_key(item):
+    """
+       Get a hashable key of a context item, so that equal dicts and lists get equal keys
+    """
+    if isinstance(item, (dict, list)):
+        return json.dumps(item, sort_keys=True, default=str)
+    return item
+
+
+def dedup_context_list(items):
+    """
+       Remove duplicate items from a context list, keeping the first occurrence of each item.
+       Unlike ``set``, also works for lists of dicts.
+
+       :type items: ``list``
+       :param items: The items to de-duplicate (required)
+
+       :return: The items without duplicates, in their original order
+       :rtype: ``list``
+    """
+    seen_keys = set()
+    unique_items = []
+    for item in items:
+        item_key = _context_item_dedup_key(item)
+        if item_key not in seen_keys:
+            seen_keys.add(item_key)
+            unique_items.append(item)
+    return unique_items
+
+
+def merge_context_value(existing, data, dedup=False):
+    """
+       Merge data into an existing context value, the way ``appendContext`` does
+
+       :type existing: ``any``
+       :param existing: The existing context value (required)
+
+       :type data: ``any``
+       :param data: Data to be added to the value (required)
+
+       :type dedup: ``bool``
+       :param dedup: True if de-duplication is required. Default is False.
+
+       :return: The merged value
+       :rtype: ``any``
+    """
+    if not existing:
+        return data
+
+    if isinstance(existing, STRING_TYPES):
+        if isinstance(data, STRING_TYPES):
+            new_val = data + ',' + existing
+        else:
+            new_val = data + existing  # will raise a self explanatory TypeError
+
+    elif isinstance(existing, dict):
+        if isinstance(data, dict):
+            new_val = [existing, data]  # type: ignore[assignment]
+        else:
+            new_val = data + existing  # will raise a self explanatory TypeError
+
+    elif isinstance(existing, list):
+        if isinstance(data, list):
+            existing.extend(data)
+        else:
+            existing.append(data)
+        new_val = existing  # type: ignore[assignment]
+
+    else:
+        new_val = [existing, data]  # type: ignore[assignment]
+
+    if dedup and isinstance(new_val, list):
+        new_val = dedup_context_list(new_val)
+
+    return new_val
+
+
 def appendContext(key, data, dedup=False):
     """
-       Append data to the investigation context
+       Append data to the investigation context.
+       When appending in a loop, use ``ContextWriteBuffer`` to read and write the context once instead of per call.
 
        :type key: ``str``
        :param key: The context path (required)
@@ -1851,36 +2022,110 @@ def appendContext(key, data, dedup=False):
     if data is None:
         return
     existing = demisto.get(demisto.context(), key)
+    demisto.setContext(key, merge_context_value(existing, data, dedup))
 
-    if existing:
-        if isinstance(existing, STRING_TYPES):
-            if isinstance(data, STRING_TYPES):
-                new_val = data + ',' + existing
-            else:
-                new_val = data + existing  # will raise a self explanatory TypeError
 
-        elif isinstance(existing, dict):
-            if isinstance(data, dict):
-                new_val = [existing, data]  # type: ignore[assignment]
-            else:
-                new_val = data + existing  # will raise a self explanatory TypeError
+class ContextWriteBuffer(object):
+    """
+       Accumulates context appends and sets in process, and writes them to the investigation context on flush.
+       The context is read once, on the first append, and every key is written once per flush,
+       instead of reading and writing the whole context on every ``appendContext`` call.
+       Use as a context manager to flush when the block ends:
 
-        elif isinstance(existing, list):
-            if isinstance(data, list):
-                existing.extend(data)
-            else:
-                existing.append(data)
-            new_val = existing  # type: ignore[assignment]
+       >>> with ContextWriteBuffer() as context_buffer:  # doctest: +SKIP
+       ...     for ip in ips:
+       ...         context_buffer.append('IPs', ip, dedup=True)
 
-        else:
-            new_val = [existing, data]  # type: ignore[assignment]
+       :return: No data returned
+       :rtype: ``None``
+    """
 
-        if dedup and isinstance(new_val, list):
-            new_val = list(set(new_val))
+    def __init__(self):
+        self._context = None  # type: Optional[dict]
+        self._pending = OrderedDict()  # type: OrderedDict
+        # the de-duplication keys of the items of pending lists which are already de-duplicated,
+        # so a de-duplicated append checks only the new items instead of the whole list
+        self._dedup_keys = {}  # type: Dict[str, set]
 
-        demisto.setContext(key, new_val)
-    else:
-        demisto.setContext(key, data)
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.flush()
+
+    def _get_existing(self, key):
+        if key in self._pending:
+            return self._pending[key]
+        if self._context is None:
+            self._context = demisto.context() or {}
+        return demisto.get(self._context, key)
+
+    def append(self, key, data, dedup=False):
+        """
+           Append data to a context key. Behaves like ``appendContext``, but is applied to the context on flush.
+
+           :type key: ``str``
+           :param key: The context path (required)
+
+           :type data: ``any``
+           :param data: Data to be added to the context (required)
+
+           :type dedup: ``bool``
+           :param dedup: True if de-duplication is required. Default is False.
+
+           :return: No data returned
+           :rtype: ``None``
+        """
+        if data is None:
+            return
+        dedup_keys = self._dedup_keys.pop(key, None)
+        if dedup and dedup_keys is not None:
+            pending_list = self._pending[key]
+            for item in data if isinstance(data, list) else [data]:
+                item_key = _context_item_dedup_key(item)
+                if item_key not in dedup_keys:
+                    dedup_keys.add(item_key)
+                    pending_list.append(item)
+            self._dedup_keys[key] = dedup_keys
+            return
+
+        value = merge_context_value(self._get_existing(key), data, dedup)
+        self._pending[key] = value
+        if dedup and isinstance(value, list):
+            self._dedup_keys[key] = set(_context_item_dedup_key(item) for item in value)
+
+    def set(self, key, value):
+        """
+           Set the value of a context key, replacing its existing value on flush.
+
+           :type key: ``str``
+           :param key: The context path (required)
+
+           :type value: ``any``
+           :param value: The value to set (required)
+
+           :return: No data returned
+           :rtype: ``None``
+        """
+        self._dedup_keys.pop(key, None)
+        self._pending[key] = value
+
+    def flush(self):
+        """
+           Write the pending values to the investigation context.
+
+           :return: The number of context keys written
+           :rtype: ``int``
+        """
+        written_keys = 0
+        while self._pending:
+            key, value = self._pending.popitem(last=False)
+            demisto.setContext(key, value)
+            written_keys += 1
+        self._context = None
+        self._dedup_keys = {}
+        return written_keys
 
 
 def url_to_clickable_markdown(data, url_keys):
@@ -7102,6 +7347,160 @@ def is_demisto_version_ge(version, build_number=''):
         return True
 
 
+class HTTPRequestsMetrics(object):
+    """
+       Aggregates the timing and size of the HTTP requests sent by ``BaseClient``, by endpoint.
+       The endpoints are templated by replacing IDs in the URL path (numbers, UUIDs, hashes, IPs and emails) with {id}.
+       All the clients record their requests to ``HTTP_REQUESTS_METRICS``, which is written to the log at the end of
+       commands that run with ``debug-mode=true``, and can be returned as a command result:
+
+       >>> return_results(HTTP_REQUESTS_METRICS.to_command_results())  # doctest: +SKIP
+
+       :return: No data returned
+       :rtype: ``None``
+    """
+
+    TIME_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+    ID_SEGMENT_REGEX = re.compile(
+        r'^(\d+|[0-9a-fA-F]{8}-(?:[0-9a-fA-F]{4}-){3}[0-9a-fA-F]{12}|[0-9a-fA-F]{16,}|(?:\d{1,3}\.){3}\d{1,3}|[^@]+@[^@]+)$'
+    )
+
+    def __init__(self):
+        self.start_time = time.time()
+        self.endpoints = OrderedDict()  # type: OrderedDict
+        self._lock = Lock()
+
+    @classmethod
+    def get_endpoint_template(cls, method, url):
+        """
+           Get the template of the endpoint of a request.
+
+           :type method: ``str``
+           :param method: The HTTP method of the request.
+
+           :type url: ``str``
+           :param url: The URL suffix, or the full URL, of the request.
+
+           :return: The method and the URL path, with the IDs replaced with {id}, for example: GET users/{id}/groups.
+           :rtype: ``str``
+        """
+        path = (url or '').split('?')[0]
+        if '://' in path:
+            path = path.split('://', 1)[1]
+            path = path[path.find('/'):] if '/' in path else '/'
+        segments = ['{id}' if cls.ID_SEGMENT_REGEX.match(segment) else segment for segment in path.split('/')]
+        return '{} {}'.format(method.upper(), '/'.join(segments))
+
+    def record(self, endpoint, status, ttfb, total_time, retries=0, request_bytes=0, response_bytes=0):
+        """
+           Record a request.
+
+           :type endpoint: ``str``
+           :param endpoint: The template of the endpoint of the request.
+
+           :type status: ``int`` or ``str``
+           :param status: The status code of the response, or the name of the error if no response was received.
+
+           :type ttfb: ``float``
+           :param ttfb: The seconds from sending the request until the response headers were received,
+               including the DNS lookup, connection and retries.
+
+           :type total_time: ``float``
+           :param total_time: The seconds from sending the request until the response body was received.
+
+           :type retries: ``int``
+           :param retries: The number of retries of the request.
+
+           :type request_bytes: ``int``
+           :param request_bytes: The size of the body of the request.
+
+           :type response_bytes: ``int``
+           :param response_bytes: The size of the body of the response.
+
+           :return: No data returned
+           :rtype: ``None``
+        """
+        with self._lock:
+            stats = self.endpoints.get(endpoint)
+            if stats is None:
+                stats = self.endpoints[endpoint] = {
+                    'calls': 0, 'statuses': OrderedDict(), 'retries': 0, 'ttfb': 0.0, 'total_time': 0.0,
+                    'max_time': 0.0, 'histogram': [0] * (len(self.TIME_BUCKETS) + 1),
+                    'request_bytes': 0, 'response_bytes': 0,
+                }
+            stats['calls'] += 1
+            stats['statuses'][status] = stats['statuses'].get(status, 0) + 1
+            stats['retries'] += retries
+            stats['ttfb'] += ttfb
+            stats['total_time'] += total_time
+            stats['max_time'] = max(stats['max_time'], total_time)
+            stats['histogram'][next((i for i, bucket in enumerate(self.TIME_BUCKETS) if total_time <= bucket),
+                                    len(self.TIME_BUCKETS))] += 1
+            stats['request_bytes'] += request_bytes
+            stats['response_bytes'] += response_bytes
+
+    def get_percentile(self, histogram, percentile):
+        count = sum(histogram)
+        cumulative = 0
+        for i, bucket_count in enumerate(histogram):
+            cumulative += bucket_count
+            if cumulative * 100 >= count * percentile:
+                return '<={}s'.format(self.TIME_BUCKETS[i]) if i < len(self.TIME_BUCKETS) else \
+                    '>{}s'.format(self.TIME_BUCKETS[-1])
+        return None
+
+    def summary(self):
+        """
+           Get the summary of the requests, by endpoint.
+
+           :return: A row for each endpoint, with the number of calls, statuses, retries, times and sizes.
+           :rtype: ``list``
+        """
+        with self._lock:
+            endpoints = [(endpoint, dict(stats, histogram=list(stats['histogram']))) for endpoint, stats in
+                         self.endpoints.items()]
+        return [{
+            'Endpoint': endpoint,
+            'Calls': stats['calls'],
+            'Statuses': ', '.join('{}: {}'.format(status, count) for status, count in stats['statuses'].items()),
+            'Retries': stats['retries'],
+            'Avg TTFB (s)': round(stats['ttfb'] / stats['calls'], 3),
+            'Avg Time (s)': round(stats['total_time'] / stats['calls'], 3),
+            'Max Time (s)': round(stats['max_time'], 3),
+            'P50 Time': self.get_percentile(stats['histogram'], 50),
+            'P95 Time': self.get_percentile(stats['histogram'], 95),
+            'Request Bytes': stats['request_bytes'],
+            'Response Bytes': stats['response_bytes'],
+        } for endpoint, stats in endpoints]
+
+    def to_markdown(self):
+        """
+           Get the summary of the requests as a markdown table.
+
+           :return: The markdown table, titled with the time of the requests out of the time since the metrics started.
+           :rtype: ``str``
+        """
+        rows = self.summary()
+        requests_time = sum(row['Avg Time (s)'] * row['Calls'] for row in rows)
+        return tableToMarkdown(
+            'HTTP Requests - {:.3f}s of {:.3f}s'.format(requests_time, time.time() - self.start_time), rows,
+            headers=['Endpoint', 'Calls', 'Statuses', 'Retries', 'Avg TTFB (s)', 'Avg Time (s)', 'Max Time (s)',
+                     'P50 Time', 'P95 Time', 'Request Bytes', 'Response Bytes']
+        )
+
+    def to_command_results(self):
+        """
+           Get the summary of the requests as a command result.
+
+           :return: The command result.
+           :rtype: ``CommandResults``
+        """
+        return CommandResults(readable_output=self.to_markdown(), raw_response=self.summary())
+
+
+HTTP_REQUESTS_METRICS = HTTPRequestsMetrics()
+
+
 class DemistoHandler(logging.Handler):
     """
         Handler to route logging messages to an IntegrationLogger or demisto.debug if not supplied
@@ -7173,6 +7572,11 @@ class DebugLogger(object):
             if self.int_logger.curl:
                 for curl in self.int_logger.curl:
                     demisto.info('cURL:\n' + curl)
+        try:
+            if HTTP_REQUESTS_METRICS.endpoints:
+                demisto.info(HTTP_REQUESTS_METRICS.to_markdown())
+        except Exception:  # noqa: disable=broad-except
+            pass
 
     def log_start_debug(self):
         """
@@ -7440,6 +7844,167 @@ if 'requests' in sys.modules:
                 kwargs['ssl_context'] = context
                 return super(SSLAdapter, self).proxy_manager_for(*args, **kwargs)
 
+    class ResponseCache(object):
+        """
+           An in memory cache of the responses of ``BaseClient`` GET requests, which expire after a TTL.
+           The responses are cached by the method, URL, params and a hash of the body of the request,
+           and the least recently used responses are evicted when the cache is full.
+           Pass it to the client to cache its requests:
+
+           >>> cache = ResponseCache(ttl=600, endpoint_ttls={'users': 3600})  # doctest: +SKIP
+           >>> client = BaseClient(base_url, response_cache=cache)  # doctest: +SKIP
+
+           To share the cache between the runs of a command, load it from the integration context before sending the
+           requests, and save it after:
+
+           >>> cache.load_from_integration_context()  # doctest: +SKIP
+           >>> cache.save_to_integration_context()  # doctest: +SKIP
+
+           :type ttl: ``int``
+           :param ttl: The number of seconds to cache a response for.
+
+           :type max_size: ``int``
+           :param max_size: The maximum number of responses in the cache.
+
+           :type endpoint_ttls: ``dict``
+           :param endpoint_ttls: The TTLs of specific endpoints, by the prefix of their URL suffix (or full URL).
+               The longest matching prefix is used. A TTL of 0 disables the cache for the endpoint.
+
+           :type context_key: ``str``
+           :param context_key: The integration context key to save the cache in.
+
+           :return: No data returned
+           :rtype: ``None``
+        """
+
+        def __init__(self, ttl=300, max_size=1000, endpoint_ttls=None, context_key='response_cache'):
+            self.ttl = ttl
+            self.max_size = max_size
+            self.endpoint_ttls = sorted((endpoint_ttls or {}).items(), key=lambda item: len(item[0]), reverse=True)
+            self.context_key = context_key
+            self.hits = 0
+            self.misses = 0
+            self._entries = OrderedDict()  # type: OrderedDict
+            self._lock = Lock()
+
+        def get_ttl(self, endpoint):
+            """
+               Get the TTL of an endpoint.
+
+               :type endpoint: ``str``
+               :param endpoint: The URL suffix, or the full URL, of the request.
+
+               :return: The number of seconds to cache the responses of the endpoint for.
+               :rtype: ``int``
+            """
+            endpoint = (endpoint or '').lstrip('/')
+            for prefix, ttl in self.endpoint_ttls:
+                if endpoint.startswith(prefix.lstrip('/')):
+                    return ttl
+            return self.ttl
+
+        @staticmethod
+        def get_key(method, url, params=None, json_data=None, data=None, resp_type='json'):
+            """
+               Get the cache key of a request.
+
+               :return: The cache key.
+               :rtype: ``str``
+            """
+            import hashlib
+            body = json.dumps(json_data, sort_keys=True) if json_data is not None else data
+            if isinstance(body, dict):
+                body = json.dumps(body, sort_keys=True)
+            if body is not None and not isinstance(body, bytes):
+                body = body.encode('utf-8')
+            key = json.dumps([
+                method.upper(), url, params, resp_type, hashlib.sha256(body).hexdigest() if body else None
+            ], sort_keys=True, default=str)
+            return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+        def get(self, key):
+            """
+               Get a cached response.
+
+               :type key: ``str``
+               :param key: The cache key of the request.
+
+               :return: Whether the response is cached, and the response.
+               :rtype: ``tuple``
+            """
+            with self._lock:
+                entry = self._entries.pop(key, None)
+                if entry is None or entry[0] <= time.time():
+                    self.misses += 1
+                    return False, None
+                self._entries[key] = entry
+                self.hits += 1
+            expires, resp_type, payload = entry
+            return True, json.loads(payload) if resp_type == 'json' else payload
+
+        def set(self, key, response, resp_type, ttl):
+            """
+               Cache a response.
+
+               :type key: ``str``
+               :param key: The cache key of the request.
+
+               :type response: ``dict`` or ``list`` or ``str``
+               :param response: The response, as returned by ``_http_request``.
+
+               :type resp_type: ``str``
+               :param resp_type: The response type of the request, 'json' or 'text'.
+
+               :type ttl: ``int``
+               :param ttl: The number of seconds to cache the response for.
+
+               :return: No data returned
+               :rtype: ``None``
+            """
+            payload = json.dumps(response) if resp_type == 'json' else response
+            with self._lock:
+                self._entries.pop(key, None)
+                self._entries[key] = (time.time() + ttl, resp_type, payload)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+
+        def stats(self):
+            """
+               Get the statistics of the cache.
+
+               :return: The number of hits, misses and cached responses.
+               :rtype: ``dict``
+            """
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
+
+        def load_from_integration_context(self):
+            """
+               Load the responses which did not expire from the integration context.
+
+               :return: No data returned
+               :rtype: ``None``
+            """
+            now = time.time()
+            entries = get_integration_context().get(self.context_key) or {}
+            with self._lock:
+                for key, entry in sorted(entries.items(), key=lambda item: item[1][0]):
+                    if entry[0] > now and key not in self._entries:
+                        self._entries[key] = tuple(entry)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+
+        def save_to_integration_context(self):
+            """
+               Save the responses which did not expire to the integration context.
+
+               :return: No data returned
+               :rtype: ``None``
+            """
+            now = time.time()
+            with self._lock:
+                entries = {key: list(entry) for key, entry in self._entries.items() if entry[0] > now}
+            set_to_integration_context_with_retries({self.context_key: entries})
+
     class BaseClient(object):
         """Client to use in integrations with powerful _http_request
         :type base_url: ``str``
@@ -7466,11 +8031,17 @@ if 'requests' in sys.modules:
             The request authorization, for example: (username, password).
             Can be None.
 
+        :type response_cache: ``ResponseCache``
+        :param response_cache:
+            A cache of the responses of the GET requests of the client, whose response type is 'json' or 'text'.
+            Can be None.
+
         :return: No data returned
         :rtype: ``None``
         """
 
         REQUESTS_TIMEOUT = 60
+        BATCH_MAX_WORKERS = 10
 
         def __init__(
             self,
@@ -7481,8 +8052,11 @@ if 'requests' in sys.modules:
             headers=None,
             auth=None,
             timeout=REQUESTS_TIMEOUT,
+            response_cache=None,
         ):
             self._base_url = base_url
+            self._response_cache = response_cache
+            self._metrics = HTTP_REQUESTS_METRICS
             self._verify = verify
             self._ok_codes = ok_codes
             self._headers = headers
@@ -7598,7 +8172,7 @@ if 'requests' in sys.modules:
                           params=None, data=None, files=None, timeout=None, resp_type='json', ok_codes=None,
                           return_empty_response=False, retries=0, status_list_to_retry=None,
                           backoff_factor=5, raise_on_redirect=False, raise_on_status=False,
-                          error_handler=None, empty_valid_codes=None, **kwargs):
+                          error_handler=None, empty_valid_codes=None, use_cache=True, **kwargs):
             """A wrapper for requests lib to send our requests and handle requests and responses better.
 
             :type method: ``str``
@@ -7694,31 +8268,52 @@ if 'requests' in sys.modules:
             :param empty_valid_codes: A list of all valid status codes of empty responses (usually only 204, but
                 can vary)
 
+            :type use_cache ``bool``
+            :param use_cache: Whether to use the response cache of the client for the request, if it has one.
+
             """
             try:
                 # Replace params if supplied
                 address = full_url if full_url else urljoin(self._base_url, url_suffix)
                 headers = headers if headers else self._headers
                 auth = auth if auth else self._auth
+
+                cache_key, cache_ttl = None, 0
+                if use_cache and self._response_cache is not None and method.upper() == 'GET' \
+                        and resp_type.lower() in ('json', 'text'):
+                    cache_ttl = self._response_cache.get_ttl(full_url or url_suffix)
+                    if cache_ttl > 0:
+                        cache_key = self._response_cache.get_key(method, address, params, json_data, data,
+                                                                 resp_type.lower())
+                        is_cached, response = self._response_cache.get(cache_key)
+                        if is_cached:
+                            return response
                 if retries:
                     self._implement_retry(retries, status_list_to_retry, backoff_factor, raise_on_redirect, raise_on_status)
                 if not timeout:
                     timeout = self.timeout
 
                 # Execute
-                res = self._session.request(
-                    method,
-                    address,
-                    verify=self._verify,
-                    params=params,
-                    data=data,
-                    json=json_data,
-                    files=files,
-                    headers=headers,
-                    auth=auth,
-                    timeout=timeout,
-                    **kwargs
-                )
+                start_time = time.time()
+                try:
+                    res = self._session.request(
+                        method,
+                        address,
+                        verify=self._verify,
+                        params=params,
+                        data=data,
+                        json=json_data,
+                        files=files,
+                        headers=headers,
+                        auth=auth,
+                        timeout=timeout,
+                        **kwargs
+                    )
+                except requests.exceptions.RequestException as exception:
+                    self._record_request(method, full_url or url_suffix, start_time, type(exception).__name__)
+                    raise
+                self._record_request(method, full_url or url_suffix, start_time, res.status_code, res,
+                                     stream=kwargs.get('stream'))
                 # Handle error responses gracefully
                 if not self._is_status_code_valid(res, ok_codes):
                     if error_handler:
@@ -7744,9 +8339,9 @@ if 'requests' in sys.modules:
                 resp_type = resp_type.lower()
                 try:
                     if resp_type == 'json':
-                        return res.json()
+                        return self._cache_response(cache_key, res.json(), resp_type, cache_ttl)
                     if resp_type == 'text':
-                        return res.text
+                        return self._cache_response(cache_key, res.text, resp_type, cache_ttl)
                     if resp_type == 'content':
                         return res.content
                     if resp_type == 'xml':
@@ -7789,6 +8384,26 @@ if 'requests' in sys.modules:
                 err_msg = 'Max Retries Error- Request attempts with {} retries failed. \n{}'.format(retries, reason)
                 raise DemistoException(err_msg, exception)
 
+        def _record_request(self, method, url, start_time, status, res=None, stream=False):
+            try:
+                total_time = time.time() - start_time
+                ttfb, retries, request_bytes, response_bytes = total_time, 0, 0, 0
+                if res is not None:
+                    ttfb = min(total_time, res.elapsed.total_seconds())
+                    retries = len(getattr(getattr(res.raw, 'retries', None), 'history', None) or ())
+                    body = res.request.body if res.request is not None else None
+                    request_bytes = len(body) if isinstance(body, STRING_TYPES) else 0
+                    response_bytes = int(res.headers.get('Content-Length') or 0) if stream else len(res.content or '')
+                self._metrics.record(HTTPRequestsMetrics.get_endpoint_template(method, url), status, ttfb, total_time,
+                                     retries, request_bytes, response_bytes)
+            except Exception as exception:  # noqa: disable=broad-except
+                demisto.debug('Failed recording the HTTP request metrics: {}'.format(exception))
+
+        def _cache_response(self, cache_key, response, resp_type, ttl):
+            if cache_key:
+                self._response_cache.set(cache_key, response, resp_type, ttl)
+            return response
+
         def _is_status_code_valid(self, response, ok_codes=None):
             """If the status code is OK, return 'True'.
 
@@ -7809,6 +8424,72 @@ if 'requests' in sys.modules:
                 return response.status_code in status_codes
             return response.ok
 
+        def _http_request_batch(self, requests_kwargs, max_workers=BATCH_MAX_WORKERS, requests_per_second=None):
+            """Sends many requests concurrently over the session of the client, for example, to get many objects by ID.
+            The requests are sent by up to ``max_workers`` threads, and are started no faster than ``requests_per_second``.
+            A failed request does not fail the other requests of the batch:
+
+            >>> results = client._http_request_batch(  # doctest: +SKIP
+            ...     [{'method': 'GET', 'url_suffix': 'users/{}'.format(user_id)} for user_id in user_ids])
+            >>> users = [result for result in results if not isinstance(result, Exception)]  # doctest: +SKIP
+
+            Note: If the requests call the server from the threads (for example, in an ``error_handler``),
+            call ``support_multithreading`` before sending the batch.
+
+            :type requests_kwargs: ``list``
+            :param requests_kwargs: The keyword arguments of ``_http_request`` for each request.
+
+            :type max_workers: ``int``
+            :param max_workers: The maximum number of requests in flight at the same time.
+                Values higher than the connection pool size of the session (10) open extra connections.
+
+            :type requests_per_second: ``float``
+            :param requests_per_second: The maximum number of requests to start per second. Not limited if not set.
+
+            :return: The results of the requests, in the order of the requests. A failed request is replaced by the
+                exception it raised.
+            :rtype: ``list``
+            """
+            from threading import Thread
+
+            results = [None] * len(requests_kwargs)  # type: List[Any]
+            pending = iter(enumerate(requests_kwargs))
+            lock = Lock()
+            interval = 1.0 / requests_per_second if requests_per_second else 0
+            next_start = [time.time()]
+
+            def next_request():
+                with lock:
+                    request = next(pending, None)
+                    if request is None or not interval:
+                        return request, 0
+                    now = time.time()
+                    start = max(now, next_start[0])
+                    next_start[0] = start + interval
+                    return request, start - now
+
+            def worker():
+                while True:
+                    request, wait = next_request()
+                    if request is None:
+                        return
+                    if wait > 0:
+                        time.sleep(wait)
+                    index, kwargs = request
+                    try:
+                        results[index] = self._http_request(**kwargs)
+                    except Exception as exception:  # noqa: disable=broad-except
+                        results[index] = exception
+
+            workers = [Thread(target=worker) for _ in range(min(max_workers or 1, len(requests_kwargs)) - 1)]
+            for thread in workers:
+                thread.daemon = True
+                thread.start()
+            worker()
+            for thread in workers:
+                thread.join()
+            return results
+
 
 def batch(iterable, batch_size=1):
     """Gets an iterable and yields slices of it.
@@ -9447,7 +10128,7 @@ def get_fetch_run_time_range(last_run, first_fetch, look_back=0, timezone=0, dat
     return last_run_time.strftime(date_format), now.strftime(date_format)
 
 
-def filter_incidents_by_duplicates_and_limit(incidents_res, last_run, fetch_limit, id_field):
+def filter_incidents_by_duplicates_and_limit(incidents_res, last_run, fetch_limit, id_field, use_found_ids_store=False):
     """
     Remove duplicate incidents from response and returns the incidents till limit
 
@@ -9463,10 +10144,17 @@ def filter_incidents_by_duplicates_and_limit(incidents_res, last_run, fetch_limi
     :type id_field: ``str``
     :param id_field: The incident id field
 
+    :type use_found_ids_store: ``bool``
+    :param use_found_ids_store: Whether the found incident ids are saved in a ``FoundIncidentIdsStore``.
+        The store is also used if the LastRun object already holds one.
+
     :return: The incidents till limit after filtering duplicates
     :rtype: ``list``
     """
-    found_incidents = last_run.get('found_incident_ids', {})
+    if use_found_ids_store or last_run.get(FoundIncidentIdsStore.LAST_RUN_KEY):
+        found_incidents = FoundIncidentIdsStore.from_last_run(last_run)
+    else:
+        found_incidents = last_run.get('found_incident_ids', {})
 
     incidents = []
     for incident in incidents_res:
@@ -9537,6 +10225,158 @@ def remove_old_incidents_ids(found_incidents_ids, current_time, look_back):
     return new_found_incidents_ids
 
 
+class FoundIncidentIdsStore(object):
+    """
+    A compact store of the IDs of fetched incidents, used to drop duplicates when fetching with look back.
+    The IDs are kept in sets of time buckets instead of a dict of ID to addition time, so expired IDs are removed
+    a bucket at a time and the addition time is serialized once per bucket rather than once per ID.
+    The IDs can also be kept as 32 bit hashes, to bound the size of long IDs, at the cost of a false positive
+    chance of about 1 / 2^32 per stored ID.
+
+    :type bucket_size: ``int``
+    :param bucket_size: The time span of a bucket in seconds
+
+    :type hash_ids: ``bool``
+    :param hash_ids: Whether to keep hashes of the IDs instead of the IDs
+
+    :type buckets: ``dict``
+    :param buckets: The start epoch time of every bucket mapped to the set of IDs added in it
+
+    :return: No data returned
+    :rtype: ``None``
+    """
+    LAST_RUN_KEY = 'found_incident_ids_store'
+
+    def __init__(self, bucket_size=60, hash_ids=False, buckets=None):
+        self.bucket_size = max(int(bucket_size), 1)
+        self.hash_ids = hash_ids
+        self.buckets = buckets or {}  # type: dict
+
+    @classmethod
+    def from_last_run(cls, last_run, bucket_size=60, hash_ids=False):
+        """
+        Loads the store from the LastRun object. IDs saved by ``get_found_incident_ids`` are moved into the store,
+        so integrations can switch to the store without fetching duplicates.
+
+        :type last_run: ``dict``
+        :param last_run: The LastRun object
+
+        :type bucket_size: ``int``
+        :param bucket_size: The bucket size in seconds to use if the LastRun object has no store
+
+        :type hash_ids: ``bool``
+        :param hash_ids: Whether to hash the IDs if the LastRun object has no store
+
+        :return: The store
+        :rtype: ``FoundIncidentIdsStore``
+        """
+        saved_store = last_run.get(cls.LAST_RUN_KEY)
+        if saved_store:
+            store = cls(bucket_size=saved_store.get('bucket_size', bucket_size),
+                        hash_ids=saved_store.get('hash_ids', hash_ids),
+                        buckets={int(bucket_start): set(ids) for bucket_start, ids in saved_store.get('buckets', {}).items()})
+        else:
+            store = cls(bucket_size=bucket_size, hash_ids=hash_ids)
+
+        for incident_id, addition_time in last_run.get('found_incident_ids', {}).items():
+            store.add([incident_id], addition_time)
+
+        return store
+
+    def to_last_run(self):
+        """
+        Serializes the store to a JSON compatible dict, to be saved under ``LAST_RUN_KEY`` in the LastRun object.
+
+        :return: The serialized store
+        :rtype: ``dict``
+        """
+        return {
+            'bucket_size': self.bucket_size,
+            'hash_ids': self.hash_ids,
+            'buckets': {str(bucket_start): list(ids) for bucket_start, ids in self.buckets.items()},
+        }
+
+    def _to_key(self, incident_id):
+        return hash_djb2(str(incident_id)) if self.hash_ids else incident_id
+
+    def add(self, incident_ids, current_time):
+        """
+        Adds IDs to the store.
+
+        :type incident_ids: ``list``
+        :param incident_ids: The IDs to add
+
+        :type current_time: ``int``
+        :param current_time: The epoch time the IDs were found at
+
+        :return: No data returned
+        :rtype: ``None``
+        """
+        bucket_start = int(current_time) - int(current_time) % self.bucket_size
+        bucket = self.buckets.setdefault(bucket_start, set())
+        for incident_id in incident_ids:
+            bucket.add(self._to_key(incident_id))
+
+    def remove_old_ids(self, current_time, look_back):
+        """
+        Removes the buckets in which all the IDs are older than twice the look back,
+        the same threshold ``remove_old_incidents_ids`` uses.
+
+        :type current_time: ``int``
+        :param current_time: The current epoch time
+
+        :type look_back: ``int``
+        :param look_back: The look back time in minutes
+
+        :return: No data returned
+        :rtype: ``None``
+        """
+        deletion_threshold_in_seconds = look_back * 60 * 2
+        for bucket_start in list(self.buckets):
+            if current_time - (bucket_start + self.bucket_size) >= deletion_threshold_in_seconds:
+                del self.buckets[bucket_start]
+
+    def __contains__(self, incident_id):
+        key = self._to_key(incident_id)
+        return any(key in ids for ids in self.buckets.values())
+
+    def __len__(self):
+        return sum(len(ids) for ids in self.buckets.values())
+
+
+def get_found_incident_ids_store(last_run, incidents, look_back, id_field, hash_ids=False):
+    """
+    Gets the found incident ids as a serialized ``FoundIncidentIdsStore``
+
+    :type last_run: ``dict``
+    :param last_run: The LastRun object
+
+    :type incidents: ``list``
+    :param incidents: List of incidents
+
+    :type look_back: ``int``
+    :param look_back: The look back time in minutes
+
+    :type id_field: ``str``
+    :param id_field: The incident id field
+
+    :type hash_ids: ``bool``
+    :param hash_ids: Whether to keep hashes of the IDs instead of the IDs
+
+    :return: The serialized store
+    :rtype: ``dict``
+    """
+    # about 20 buckets cover the IDs kept for twice the look back
+    bucket_size = max(60, look_back * 6)
+    store = FoundIncidentIdsStore.from_last_run(last_run, bucket_size=bucket_size, hash_ids=hash_ids)
+    current_time = int(time.time())
+
+    store.add([incident[id_field] for incident in incidents], current_time)
+    store.remove_old_ids(current_time, look_back)
+
+    return store.to_last_run()
+
+
 def get_found_incident_ids(last_run, incidents, look_back, id_field):
     """
     Gets the found incident ids
@@ -9626,7 +10466,8 @@ def create_updated_last_run_object(last_run, incidents, fetch_limit, look_back,
 
 
 def update_last_run_object(last_run, incidents, fetch_limit, start_fetch_time, end_fetch_time, look_back,
-                           created_time_field, id_field, date_format='%Y-%m-%dT%H:%M:%S', increase_last_run_time=False):
+                           created_time_field, id_field, date_format='%Y-%m-%dT%H:%M:%S', increase_last_run_time=False,
+                           use_found_ids_store=False, hash_found_ids=False):
     """
     Updates the LastRun object
 
@@ -9660,17 +10501,28 @@ def update_last_run_object(last_run, incidents, fetch_limit, start_fetch_time, e
     :type increase_last_run_time: ``bool``
     :param increase_last_run_time: Whether to increase the last run time with one millisecond
 
+    :type use_found_ids_store: ``bool``
+    :param use_found_ids_store: Whether to save the found incident ids in a compact ``FoundIncidentIdsStore``.
+        Recommended for high volume fetches with a long look back.
+
+    :type hash_found_ids: ``bool``
+    :param hash_found_ids: Whether the ``FoundIncidentIdsStore`` keeps hashes of the ids instead of the ids
+
     :return: The new last run object and list of incidents
     :rtype: ``Dict``
     """
 
-    found_incidents = get_found_incident_ids(last_run, incidents, look_back, id_field)
-
     updated_last_run = create_updated_last_run_object(last_run, incidents, fetch_limit, look_back, start_fetch_time,
                                                       end_fetch_time, created_time_field, date_format, increase_last_run_time)
 
-    if found_incidents:
-        updated_last_run.update({'found_incident_ids': found_incidents})
+    if use_found_ids_store:
+        found_incidents_store = get_found_incident_ids_store(last_run, incidents, look_back, id_field, hash_found_ids)
+        updated_last_run[FoundIncidentIdsStore.LAST_RUN_KEY] = found_incidents_store
+        last_run.pop('found_incident_ids', None)
+    else:
+        found_incidents = get_found_incident_ids(last_run, incidents, look_back, id_field)
+        if found_incidents:
+            updated_last_run.update({'found_incident_ids': found_incidents})
 
     last_run.update(updated_last_run)
 
@@ -2898,6 +2898,202 @@ class TestBaseClient:
         response.status_code = 400
         assert not self.client._is_status_code_valid(response)
 
+    def test_http_request_batch(self, requests_mock):
+        """
+            Given
+            - A base client, and requests for several objects, one of them fails
+
+            When
+            - Sending the requests in a batch
+
+            Then
+            - The results are returned in the order of the requests, and the failed request is replaced by its exception
+        """
+        for i in range(20):
+            requests_mock.get('http://example.com/api/v2/event/{}'.format(i), json={'id': i})
+        requests_mock.get('http://example.com/api/v2/event/5', status_code=404, json={})
+        results = self.client._http_request_batch(
+            [{'method': 'GET', 'url_suffix': 'event/{}'.format(i)} for i in range(20)], max_workers=4)
+        assert len(results) == 20
+        assert isinstance(results[5], DemistoException)
+        assert results[5].res.status_code == 404
+        assert [result['id'] for i, result in enumerate(results) if i != 5] == [i for i in range(20) if i != 5]
+
+    def test_http_request_batch_concurrency(self, mocker):
+        """
+            Given
+            - A base client
+
+            When
+            - Sending a batch of requests with at most 3 requests in flight and 50 requests per second
+
+            Then
+            - No more than 3 requests are in flight at the same time, and the requests are started at the given rate
+        """
+        import threading
+        lock = threading.Lock()
+        in_flight = [0]
+        max_in_flight = [0]
+        start_times = []
+
+        def http_request_mock(**kwargs):
+            with lock:
+                in_flight[0] += 1
+                max_in_flight[0] = max(max_in_flight[0], in_flight[0])
+                start_times.append(time.time())
+            time.sleep(0.05)
+            with lock:
+                in_flight[0] -= 1
+            return kwargs['url_suffix']
+
+        mocker.patch.object(self.client, '_http_request', side_effect=http_request_mock)
+        results = self.client._http_request_batch([{'url_suffix': str(i)} for i in range(10)],
+                                                  max_workers=3, requests_per_second=50)
+        assert results == [str(i) for i in range(10)]
+        assert max_in_flight[0] == 3
+        assert max(start_times) - min(start_times) >= 9 * 0.02 - 0.005
+
+    def test_http_request_response_cache(self, requests_mock):
+        """
+            Given
+            - A base client with a response cache
+
+            When
+            - Sending the same GET request twice, a GET request with other params, a POST request,
+              and a GET request without the cache
+
+            Then
+            - The second GET request is returned from the cache, and the other requests are sent
+            - Changing a cached response does not change the cache
+        """
+        from CommonServerPython import BaseClient, ResponseCache
+        client = BaseClient('http://example.com/api/v2/', response_cache=ResponseCache())
+        requests_mock.get('http://example.com/api/v2/event', json={'id': 1})
+        requests_mock.post('http://example.com/api/v2/event', json={'id': 2})
+
+        response = client._http_request('GET', 'event', params={'a': 1})
+        response['id'] = 3
+        assert client._http_request('GET', 'event', params={'a': 1}) == {'id': 1}
+        assert requests_mock.call_count == 1
+        client._http_request('GET', 'event', params={'a': 2})
+        client._http_request('POST', 'event', params={'a': 1})
+        client._http_request('GET', 'event', params={'a': 1}, use_cache=False)
+        assert requests_mock.call_count == 4
+        assert client._response_cache.stats() == {'hits': 1, 'misses': 2, 'size': 2}
+
+    def test_response_cache_ttl_and_size(self, mocker):
+        """
+            Given
+            - A response cache of 2 responses, with a TTL of 10 seconds and no cache for the 'live' endpoints
+
+            When
+            - Caching responses and getting them after some time
+
+            Then
+            - Expired and least recently used responses are not returned
+        """
+        from CommonServerPython import ResponseCache
+        now = [1000.0]
+        mocker.patch.object(time, 'time', side_effect=lambda: now[0])
+        cache = ResponseCache(ttl=10, max_size=2, endpoint_ttls={'live': 0, 'users/': 60})
+        assert cache.get_ttl('/live/events') == 0
+        assert cache.get_ttl('users/1') == 60
+        assert cache.get_ttl('events') == 10
+
+        cache.set('a', {'id': 'a'}, 'json', 10)
+        cache.set('b', 'b', 'text', 60)
+        assert cache.get('a') == (True, {'id': 'a'})
+        cache.set('c', 'c', 'text', 60)
+        assert cache.get('b') == (False, None)
+        now[0] += 30
+        assert cache.get('a') == (False, None)
+        assert cache.get('c') == (True, 'c')
+
+    def test_response_cache_integration_context(self, mocker):
+        """
+            Given
+            - A response cache with a valid and an expired response
+
+            When
+            - Saving the cache to the integration context, and loading it to a new cache
+
+            Then
+            - Only the valid response is saved and loaded
+        """
+        from CommonServerPython import ResponseCache
+        integration_context = {}
+        mocker.patch.object(CommonServerPython, 'get_integration_context', side_effect=lambda: integration_context)
+        mocker.patch.object(CommonServerPython, 'set_to_integration_context_with_retries',
+                            side_effect=integration_context.update)
+        cache = ResponseCache()
+        cache.set('valid', {'id': 1}, 'json', 60)
+        cache.set('expired', {'id': 2}, 'json', -1)
+        cache.save_to_integration_context()
+        assert list(integration_context['response_cache']) == ['valid']
+
+        new_cache = ResponseCache()
+        new_cache.load_from_integration_context()
+        assert new_cache.get('valid') == (True, {'id': 1})
+        assert new_cache.get('expired') == (False, None)
+
+    def test_http_request_metrics(self, requests_mock):
+        """
+            Given
+            - A base client
+
+            When
+            - Sending requests to an endpoint with different IDs, one of them fails, and a request which times out
+
+            Then
+            - The requests are recorded by the template of their endpoint, with their statuses and sizes
+        """
+        from CommonServerPython import BaseClient, HTTPRequestsMetrics
+        client = BaseClient('http://example.com/api/v2/')
+        client._metrics = HTTPRequestsMetrics()
+        requests_mock.post('http://example.com/api/v2/users/1/groups', json={'id': 1})
+        requests_mock.post('http://example.com/api/v2/users/2/groups', status_code=500, json={})
+        requests_mock.get('http://example.com/api/v2/events', exc=requests.exceptions.ConnectTimeout)
+
+        client._http_request('POST', 'users/1/groups', json_data={'a': 1})
+        with raises(DemistoException):
+            client._http_request('POST', 'users/2/groups', json_data={'a': 1})
+        with raises(DemistoException):
+            client._http_request('GET', 'events')
+
+        users, events = client._metrics.summary()
+        assert users['Endpoint'] == 'POST users/{id}/groups'
+        assert users['Calls'] == 2
+        assert users['Statuses'] == '200: 1, 500: 1'
+        assert users['Request Bytes'] == 16
+        assert users['Response Bytes'] == len('{"id": 1}') + len('{}')
+        assert users['P95 Time'] == '<=0.1s'
+        assert events['Endpoint'] == 'GET events'
+        assert events['Statuses'] == 'ConnectTimeout: 1'
+        assert '| POST users/{id}/groups | 2 |' in client._metrics.to_markdown()
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('users/123/groups?limit=10', 'GET users/{id}/groups'),
+    ('https://example.com/api/files/d41d8cd98f00b204e9800998ecf8427e', 'GET /api/files/{id}'),
+    ('/ip_addresses/8.8.8.8', 'GET /ip_addresses/{id}'),
+    ('alerts/3fa85f64-5717-4562-b3fc-2c963f66afa6/comments', 'GET alerts/{id}/comments'),
+    ('users/user@example.com', 'GET users/{id}'),
+    ('https://example.com', 'GET /'),
+])
+def test_http_requests_metrics_endpoint_template(url, expected):
+    """
+        Given
+        - URLs of requests with IDs
+
+        When
+        - Getting the template of their endpoints
+
+        Then
+        - The IDs are replaced with {id}
+    """
+    from CommonServerPython import HTTPRequestsMetrics
+    assert HTTPRequestsMetrics.get_endpoint_template('get', url) == expected
+
 
 def test_parse_date_string():
     # test unconverted data remains: Z
@@ -3374,6 +3570,82 @@ def test_append_context(mocker, context_mock, data_mock, key, expected_answer):
             assert expected_answer in e.value
 
 
+def test_append_context_dedup_dicts(mocker):
+    """
+    Given
+    - A context list of dicts
+    When
+    - Appending dicts, some equal to existing ones, with dedup
+    Then
+    - Duplicate dicts are removed and the order of the items is kept
+    """
+    mocker.patch.object(demisto, 'context', return_value={'Hosts': [{'name': 'a', 'ip': '1.1.1.1'}]})
+    mocker.patch.object(demisto, 'setContext')
+    appendContext('Hosts', [{'ip': '1.1.1.1', 'name': 'a'}, {'name': 'b'}, {'name': 'b'}], dedup=True)
+    demisto.setContext.assert_called_once_with('Hosts', [{'name': 'a', 'ip': '1.1.1.1'}, {'name': 'b'}])
+
+
+def test_context_write_buffer(mocker):
+    """
+    Given
+    - A context with an existing list key
+    When
+    - Appending to it and to a new key many times and setting a key through a ContextWriteBuffer
+    Then
+    - The context is read once, and every key is written once when the buffer is flushed
+    - The written values are the same as appendContext would have written
+    """
+    from CommonServerPython import ContextWriteBuffer
+    mocker.patch.object(demisto, 'context', return_value={'IPs': ['1.1.1.1'], 'Count': 1})
+    mocker.patch.object(demisto, 'setContext')
+
+    with ContextWriteBuffer() as context_buffer:
+        for i in range(100):
+            context_buffer.append('IPs', '1.1.1.{}'.format(i % 10), dedup=True)
+            context_buffer.append('Names', 'name')
+        context_buffer.set('Count', 2)
+        context_buffer.append('Ignored', None)
+        assert not demisto.setContext.called
+
+    assert demisto.context.call_count == 1
+    assert demisto.setContext.call_args_list == [
+        (('IPs', ['1.1.1.1', '1.1.1.0'] + ['1.1.1.{}'.format(i) for i in range(2, 10)]),),
+        (('Names', ','.join(['name'] * 100)),),
+        (('Count', 2),),
+    ]
+    assert context_buffer.flush() == 0
+
+
+def test_context_write_buffer_dedup_new_items_only(mocker):
+    """
+    Given
+    - A context with an existing list of dicts
+    When
+    - Appending many dicts with de-duplication through a ContextWriteBuffer, with a duplicate appended without
+      de-duplication in between
+    Then
+    - Only the new items are checked against the already de-duplicated items
+    - The written value is the same as appendContext would have written
+    """
+    import CommonServerPython
+    from CommonServerPython import ContextWriteBuffer
+    mocker.patch.object(demisto, 'context', return_value={'Hosts': [{'name': 'a'}]})
+    mocker.patch.object(demisto, 'setContext')
+    dedup_key_mock = mocker.patch.object(CommonServerPython, '_context_item_dedup_key',
+                                         side_effect=CommonServerPython._context_item_dedup_key)
+
+    with ContextWriteBuffer() as context_buffer:
+        for i in range(100):
+            context_buffer.append('Hosts', {'name': str(i % 10)}, dedup=True)
+        context_buffer.append('Hosts', {'name': '1'})
+        context_buffer.append('Hosts', [{'name': '1'}, {'name': 'b'}], dedup=True)
+
+    assert dedup_key_mock.call_count < 150
+    demisto.setContext.assert_called_once_with(
+        'Hosts', [{'name': 'a'}] + [{'name': str(i)} for i in range(10)] + [{'name': 'b'}]
+    )
+
+
 INDICATOR_VALUE_AND_TYPE = [
     ('3fec1b14cea32bbcd97fad4507b06888', "File"),
     ('1c8893f75089a27ca6a8d49801d7aa6b64ea0c6167fe8b1becfe9bc13f47bdc1', 'File'),
@@ -3444,9 +3716,9 @@ def test_auto_detect_indicator_type_tldextract(mocker):
     """
     if sys.version_info.major == 3 and sys.version_info.minor >= 8:
         import tldextract as tlde
-        tlde.__version__ = '2.2.7'
-
+        mocker.patch.object(tlde, '__version__', '2.2.7')
         mocker.patch.object(tlde, 'TLDExtract')
+        mocker.patch('CommonServerPython._INDICATOR_TYPE_CLASSIFIER', None)
 
         auto_detect_indicator_type('8')
 
@@ -3454,6 +3726,73 @@ def test_auto_detect_indicator_type_tldextract(mocker):
         assert 'cache_file' in res[1].keys()
 
 
+def _detect_indicator_type_by_regexes(indicator_value):
+    from CommonServerPython import emailRegex, cveRegex, md5Regex, sha1Regex, sha256Regex, sha512Regex
+    regexes_and_types = [
+        (ipv4cidrRegex, FeedIndicatorType.CIDR), (ipv6cidrRegex, FeedIndicatorType.IPv6CIDR),
+        (ipv4Regex, FeedIndicatorType.IP), (ipv6Regex, FeedIndicatorType.IPv6), (sha256Regex, FeedIndicatorType.File),
+        (urlRegex, FeedIndicatorType.URL), (md5Regex, FeedIndicatorType.File), (sha1Regex, FeedIndicatorType.File),
+        (emailRegex, FeedIndicatorType.Email), (cveRegex, FeedIndicatorType.CVE), (sha512Regex, FeedIndicatorType.File),
+    ]
+    for regex, indicator_type in regexes_and_types:
+        if re.match(regex, indicator_value):
+            return indicator_type
+    return 'not matched'
+
+
+@pytest.mark.skipif(sys.version_info < (3, 8), reason='tldextract is installed only in the python 3 images')
+def test_indicator_type_classifier_matches_regexes():
+    """
+        Given
+            Indicator values of all types, and values that look like one type but are another
+        When
+            Classifying them in bulk with IndicatorTypeClassifier
+        Then
+            Every value gets the type the indicator regexes give it when run one by one,
+            and values no regex matches fall back to the domain detection
+    """
+    from CommonServerPython import IndicatorTypeClassifier
+    values = [value for value, _ in INDICATOR_VALUE_AND_TYPE] + [
+        '1.1.1.1/24', '1.1.1.1/7/path', '1.1.1.1:8080/path', '1.1.1.1', '999.1.1.1', '1.1.1',
+        'fd60:e22:f1b9::2/64', 'fd60:e22:f1b9::2/path', '::1', 'fe80::1%eth0',
+        'WWW.example.com', 'ftp.example.com', 'ftp://1.1.1.1', 'hxxps://example[.]com/path', 'example.com/path',
+        'a' * 32, 'A' * 40, 'f' * 64, '0' * 128, 'g' * 32, 'a' * 31, 'a' * 33,
+        'cve-2021-44228', 'CVE-2021-1', 'user@example.com', '@example.com',
+        'example.com', '*.example.com', 'example', '', ' 1.1.1.1', 'abc:def',
+    ]
+    classifier = IndicatorTypeClassifier()
+    types = classifier.classify_many(values)
+
+    assert len(types) == len(values)
+    for value, indicator_type in zip(values, types):
+        expected_type = _detect_indicator_type_by_regexes(value)
+        if expected_type == 'not matched':
+            assert indicator_type in (FeedIndicatorType.Domain, FeedIndicatorType.DomainGlob, None), value
+        else:
+            assert indicator_type == expected_type, value
+    assert types[values.index('example.com')] == FeedIndicatorType.Domain
+    assert types[values.index('*.example.com')] == FeedIndicatorType.DomainGlob
+    assert types[values.index('example')] is None
+
+
+def test_indicator_type_classifier_classifies_repeating_values_once(mocker):
+    """
+        Given
+            A list of indicators in which values repeat
+        When
+            Classifying them with classify_many
+        Then
+            Each distinct value is classified once, and the types are returned in the order of the values
+    """
+    from CommonServerPython import IndicatorTypeClassifier
+    mocker.patch.dict(sys.modules, {'tldextract': mocker.Mock()})
+    classifier = IndicatorTypeClassifier()
+    classify_mock = mocker.patch.object(classifier, 'classify', side_effect=lambda value: value.upper())
+
+    assert classifier.classify_many(['a', 'b', 'a', 'a']) == ['A', 'B', 'A', 'A']
+    assert classify_mock.call_count == 2
+
+
 VALID_URL_INDICATORS = [
     '3.21.32.65/path',
     '19.117.63.253:28/other/path',
@@ -6720,10 +7059,13 @@ class TestFetchWithLookBack:
         query = self.build_query(start_fetch_time, end_fetch_time, fetch_limit)
         incidents_res = self.get_incidents_request(query)
 
-        incidents = filter_incidents_by_duplicates_and_limit(incidents_res=incidents_res, last_run=last_run, fetch_limit=fetch_limit_param, id_field='incident_id')
+        incidents = filter_incidents_by_duplicates_and_limit(incidents_res=incidents_res, last_run=last_run, fetch_limit=fetch_limit_param, id_field='incident_id',
+                                                             use_found_ids_store=params.get('use_found_ids_store', False))
 
         last_run = update_last_run_object(last_run=last_run, incidents=incidents, fetch_limit=fetch_limit_param, start_fetch_time=start_fetch_time,
-                                          end_fetch_time=end_fetch_time, look_back=look_back, created_time_field='created', id_field='incident_id')
+                                          end_fetch_time=end_fetch_time, look_back=look_back, created_time_field='created', id_field='incident_id',
+                                          use_found_ids_store=params.get('use_found_ids_store', False),
+                                          hash_found_ids=params.get('hash_found_ids', False))
 
         demisto.setLastRun(last_run)
         return incidents
@@ -6872,6 +7214,129 @@ class TestFetchWithLookBack:
         # Remove new incidents from self.INCIDENTS
         self.INCIDENTS = incidents
 
+    @pytest.mark.parametrize('hash_found_ids', [False, True])
+    def test_fetch_with_look_back_and_found_ids_store(self, mocker, hash_found_ids):
+        """
+        Given:
+        - Fetch parameters with look back, saving the found incident ids in a FoundIncidentIdsStore
+
+        When:
+        - Running the example fetch incidents and creating new incidents between fetch calls
+
+        Then:
+        - Ensure the same incidents are returned as when saving the ids in a dict, without duplicates
+        - Ensure the ids are saved only in the store
+        """
+        from CommonServerPython import FoundIncidentIdsStore
+        if sys.version_info.major == 2:
+            # skip for python 2 - date
+            assert True
+            return
+
+        self.LAST_RUN = {}
+        incidents = self.INCIDENTS[:]
+        params = {'limit': 2, 'first_fetch': '20 minutes', 'look_back': 30, 'use_found_ids_store': True,
+                  'hash_found_ids': hash_found_ids}
+        mocker.patch.object(demisto, 'params', return_value=params)
+        mocker.patch.object(demisto, 'getLastRun', return_value=self.LAST_RUN)
+        mocker.patch.object(demisto, 'setLastRun', side_effect=self.set_last_run)
+
+        assert self.example_fetch_incidents() == [self.INCIDENTS[2], self.INCIDENTS[3]]
+        assert 'found_incident_ids' not in self.LAST_RUN
+        assert len(FoundIncidentIdsStore.from_last_run(self.LAST_RUN)) == 2
+
+        self.INCIDENTS = incidents[:3] + [self.NEW_INCIDENTS[1], self.NEW_INCIDENTS[2]] + incidents[3:]
+        mocker.patch.object(demisto, 'getLastRun', return_value=self.LAST_RUN)
+        assert self.example_fetch_incidents() == [self.NEW_INCIDENTS[1], self.NEW_INCIDENTS[2]]
+
+        mocker.patch.object(demisto, 'getLastRun', return_value=self.LAST_RUN)
+        assert self.example_fetch_incidents() == [incidents[4]]
+        store = FoundIncidentIdsStore.from_last_run(self.LAST_RUN)
+        assert len(store) == 5
+        assert all(incident_id in store for incident_id in (3, 4, 5, 7, 8))
+        assert 1 not in store
+
+        self.INCIDENTS = incidents
+
+
+def test_found_incident_ids_store_expires_buckets():
+    """
+    Given:
+    - A FoundIncidentIdsStore with ids added at different times
+
+    When:
+    - Removing old ids, and serializing and loading the store
+
+    Then:
+    - Ensure only buckets older than twice the look back are removed
+    - Ensure the store is the same after a JSON round trip
+    """
+    from CommonServerPython import FoundIncidentIdsStore
+    store = FoundIncidentIdsStore(bucket_size=60)
+    store.add(['a', 'b'], 1000)
+    store.add(['c'], 1100)
+    store.add(['d'], 1110)
+    assert len(store.buckets) == 2
+
+    # a look back of 1 minute keeps ids for 120 seconds, the bucket of 'a' and 'b' ends at 1020
+    store.remove_old_ids(current_time=1139, look_back=1)
+    assert 'a' in store and 'c' in store
+    store.remove_old_ids(current_time=1140, look_back=1)
+    assert 'a' not in store and 'b' not in store
+    assert 'c' in store and 'd' in store
+
+    loaded_store = FoundIncidentIdsStore.from_last_run(json.loads(json.dumps({'found_incident_ids_store': store.to_last_run()})))
+    assert loaded_store.buckets == store.buckets
+    assert loaded_store.bucket_size == 60
+
+
+def test_filter_incidents_by_duplicates_without_found_ids_store(mocker):
+    """
+    Given:
+    - A LastRun object with found incident ids saved as a dict, and one with a FoundIncidentIdsStore
+
+    When:
+    - Filtering duplicate incidents without opting in to the store
+
+    Then:
+    - Ensure the store is built only if the LastRun object holds one, and the duplicates are dropped in both cases
+    """
+    from CommonServerPython import FoundIncidentIdsStore, filter_incidents_by_duplicates_and_limit
+    from_last_run_mock = mocker.patch.object(FoundIncidentIdsStore, 'from_last_run',
+                                             side_effect=FoundIncidentIdsStore.from_last_run)
+    incidents_res = [{'id': 1}, {'id': 2}, {'id': 3}]
+
+    last_run = {'found_incident_ids': {1: 1000}}
+    assert filter_incidents_by_duplicates_and_limit(incidents_res, last_run, 5, 'id') == [{'id': 2}, {'id': 3}]
+    assert not from_last_run_mock.called
+
+    store = FoundIncidentIdsStore()
+    store.add([2], 1000)
+    last_run = {FoundIncidentIdsStore.LAST_RUN_KEY: store.to_last_run(), 'found_incident_ids': {1: 1000}}
+    assert filter_incidents_by_duplicates_and_limit(incidents_res, last_run, 5, 'id') == [{'id': 3}]
+    assert from_last_run_mock.call_count == 1
+
+
+def test_found_incident_ids_store_hash_ids_and_migration():
+    """
+    Given:
+    - A LastRun object with found incident ids saved as a dict of id to addition time
+
+    When:
+    - Loading a FoundIncidentIdsStore which hashes the ids from it
+
+    Then:
+    - Ensure the ids in the dict are in the store, kept as hashes
+    """
+    from CommonServerPython import FoundIncidentIdsStore, hash_djb2
+    last_run = {'found_incident_ids': {'long-incident-id-1': 1000, 'long-incident-id-2': 1070}}
+    store = FoundIncidentIdsStore.from_last_run(last_run, bucket_size=60, hash_ids=True)
+
+    assert 'long-incident-id-1' in store
+    assert 'long-incident-id-2' in store
+    assert 'long-incident-id-3' not in store
+    assert store.buckets == {960: {hash_djb2('long-incident-id-1')}, 1020: {hash_djb2('long-incident-id-2')}}
+
 
 class TestTracebackLineNumberAdgustment:
     @staticmethod
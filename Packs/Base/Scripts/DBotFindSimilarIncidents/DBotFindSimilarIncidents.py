@@ -2,14 +2,18 @@ import demistomock as demisto
 from CommonServerPython import *
 from CommonServerUserPython import *
 import warnings
+import base64
+import pickle
 import numpy as np
 import re
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import TfidfVectorizer, CountVectorizer
 from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.preprocessing import normalize
 import json
 import pandas as pd
+from scipy.sparse import csr_matrix, vstack
 from scipy.spatial.distance import cdist
-from typing import List, Dict, Union
+from typing import List, Dict, Union, Optional
 
 warnings.simplefilter("ignore")
 
@@ -58,6 +62,10 @@ REGEX_IP = re.compile(
     r'(([0-9]|[1-9][0-9]|1[0-9]{2}|2[0-4][0-9]|25[0-5])\.){3}([0-9]|[1-9][0-9]|1[0-9]{2}|2[0-4][0-9]|25[0-5])')
 REPLACE_COMMAND_LINE = {"=": " = ", "\\": "/", "[": "", "]": "", '"': "", "'": "", }
 
+SIMILARITY_INDEX_VERSION = 1
+SIMILARITY_INDEX_MAX_SIZE = 50000
+SIMILARITY_INDEX_FETCH_CHUNK_SIZE = 500
+
 
 def keep_high_level_field(incidents_field: List[str]) -> List[str]:
     """
@@ -363,12 +371,37 @@ class Transformer():
         return self.incidents_df
 
 
+class IndexedTransformer(Transformer):
+    """
+    Transformer which scores the incidents from the n-gram counts stored in a SimilarityIndex instead of vectorizing
+    the incidents again
+    """
+
+    def __init__(self, p_transformer_type, field, p_incidents_df, p_incident_to_match, p_params, p_index):
+        """
+        :param p_index: SimilarityIndex containing the incidents of p_incidents_df
+        """
+        super().__init__(p_transformer_type, field, p_incidents_df, p_incident_to_match, p_params)
+        self.index = p_index
+
+    def get_score(self):
+        """
+        :return: Add one columns 'similarity %s' % self.field to self.incidents_df Dataframe with the score
+        """
+        dist = self.index.get_similarity(self.field, self.params[self.transformer_type], self.incident_to_match,
+                                         self.incidents_df.index.tolist())
+        self.incidents_df['similarity %s' % self.field] = np.round(dist, 2)
+        return self.incidents_df
+
+
 class Model:
-    def __init__(self, p_transformation):
+    def __init__(self, p_transformation, p_index=None):
         """
         :param p_transformation: Dict with the transformers parameters - TRANSFORMATION
+        :param p_index: SimilarityIndex used to score the text and json fields, if None the incidents are vectorized
         """
         self.transformation = p_transformation
+        self.index = p_index
 
     def init_prediction(self, p_incident_to_match, p_incidents_df, p_field_for_command_line=[],
                         p_field_for_potential_exact_match=[], p_field_for_display_fields_incidents=[],
@@ -436,15 +469,27 @@ class Model:
         :return:
         """
         for field in self.field_for_command_line:
-            t = Transformer('commandline', field, self.incidents_df, self.incident_to_match, self.transformation)
+            t = self.get_transformer('commandline', field)
             t.get_score()
         for field in self.field_for_potential_exact_match:
             t = Transformer('potentialMatch', field, self.incidents_df, self.incident_to_match, self.transformation)
             t.get_score()
         for field in self.field_for_json:
-            t = Transformer('json', field, self.incidents_df, self.incident_to_match, self.transformation)
+            t = self.get_transformer('json', field)
             t.get_score()
 
+    def get_transformer(self, transformer_type: str, field: str) -> Transformer:
+        """
+        Return the transformer of a text or json field - from the similarity index if there is one
+        :param transformer_type: One of the key value of TRANSFORMATION dict
+        :param field: incident field
+        :return: Transformer
+        """
+        if self.index is not None:
+            return IndexedTransformer(transformer_type, field, self.incidents_df, self.incident_to_match,
+                                      self.transformation, self.index)
+        return Transformer(transformer_type, field, self.incidents_df, self.incident_to_match, self.transformation)
+
     def compute_final_score(self):
         """
         Compute final score based on average of similarity score for each field transformed
@@ -465,6 +510,255 @@ class Model:
         return df_sorted
 
 
+def get_field_value(incident: Dict, field: str):
+    """
+    Return the value of a field in the incident, the same way it is set in the incidents DataFrame
+    :param incident: json representing the incident
+    :param field: incident field - can be nested
+    :return: value of the field
+    """
+    if '.' in field:
+        value_list = wrapped_list(demisto.dt(incident, field))
+        return ' '.join(set(list(filter(lambda x: x not in ['None', None, 'N/A'], value_list))))
+    return incident.get(field)
+
+
+class SimilarityIndex:
+    """
+    Persisted index of the character n-gram counts of the text and json fields of the incidents.
+    Only the incidents which are new or were modified since they were indexed are vectorized, and the TFIDF
+    similarity to the current incident is computed on the sparse counts.
+    """
+
+    def __init__(self, fields: Dict[str, str], transformation: Dict, data: Optional[Dict] = None):
+        """
+        :param fields: Dict of incident field to its transformer type - 'commandline' or 'json'
+        :param transformation: Dict of all the transformation - TRANSFORMATION
+        :param data: Stored index data, ignored if it was built for other fields or parameters
+        """
+        self.fields = fields
+        self.transformation = transformation
+        self.signature = json.dumps({field: [transformer_type, str(transformation[transformer_type]['params'])]
+                                     for field, transformer_type in fields.items()}, sort_keys=True)
+        self.is_updated = False
+        if data and data.get('version') == SIMILARITY_INDEX_VERSION and data.get('signature') == self.signature:
+            self.ids = data['ids']
+            self.modified = data['modified']
+            self.values = data['values']
+            self.vocabularies = data['vocabularies']
+            self.matrices = data['matrices']
+        else:
+            self.ids = []
+            self.modified = []
+            self.values = {field: [] for field in fields}
+            self.vocabularies = {field: {} for field in fields}
+            self.matrices = {field: csr_matrix((0, 0), dtype=np.float32) for field in fields}
+        self.id_to_row = {incident_id: row for row, incident_id in enumerate(self.ids)}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def vectorize(self, field: str, documents: List[str]) -> csr_matrix:
+        """
+        Return the n-gram counts of the documents, adding their new n-grams to the vocabulary of the field
+        :param field: incident field
+        :param documents: List of normalized values of the field
+        :return: csr_matrix of counts with one column per n-gram of the vocabulary
+        """
+        params = {k: v for k, v in self.transformation[self.fields[field]]['params'].items() if k != 'max_features'}
+        vectorizer = CountVectorizer(**params, dtype=np.float32)
+        try:
+            counts = vectorizer.fit_transform(documents)
+        except ValueError:  # empty vocabulary
+            return csr_matrix((len(documents), len(self.vocabularies[field])), dtype=np.float32)
+        vocabulary = self.vocabularies[field]
+        columns = np.empty(len(vectorizer.vocabulary_), dtype=np.int64)
+        for term, column in vectorizer.vocabulary_.items():
+            columns[column] = vocabulary.setdefault(term, len(vocabulary))
+        return csr_matrix((counts.data, columns[counts.indices], counts.indptr), shape=(len(documents), len(vocabulary)))
+
+    def get_outdated_ids(self, incidents: List[Dict]) -> List[str]:
+        """
+        Return ids of the incidents which are not in the index or were modified since they were indexed
+        :param incidents: List of incidents with id and modified fields
+        :return: List of incident ids
+        """
+        return [incident['id'] for incident in incidents
+                if incident['id'] not in self.id_to_row
+                or self.modified[self.id_to_row[incident['id']]] != incident.get('modified')]
+
+    def keep(self, incident_ids: List[str]):
+        """
+        Remove from the index all the incidents which are not in incident_ids
+        :param incident_ids: List of incident ids to keep
+        :return:
+        """
+        rows = sorted(self.id_to_row[incident_id] for incident_id in set(incident_ids) if incident_id in self.id_to_row)
+        if len(rows) == len(self.ids):
+            return
+        self.ids = [self.ids[row] for row in rows]
+        self.modified = [self.modified[row] for row in rows]
+        for field in self.fields:
+            self.values[field] = [self.values[field][row] for row in rows]
+            matrix = self.matrices[field][rows]
+            # remove the n-grams which appear only in the removed incidents
+            used_columns = np.unique(matrix.indices)
+            columns = np.full(matrix.shape[1], -1, dtype=np.int64)
+            columns[used_columns] = np.arange(len(used_columns))
+            self.vocabularies[field] = {term: int(columns[column]) for term, column in self.vocabularies[field].items()
+                                        if columns[column] >= 0}
+            self.matrices[field] = csr_matrix((matrix.data, columns[matrix.indices], matrix.indptr),
+                                              shape=(matrix.shape[0], len(used_columns)))
+        self.id_to_row = {incident_id: row for row, incident_id in enumerate(self.ids)}
+        self.is_updated = True
+
+    def add(self, incidents: List[Dict]):
+        """
+        Vectorize incidents and add them to the index, replacing their previous version
+        :param incidents: List of incidents with id, modified and the indexed fields
+        :return:
+        """
+        if not incidents:
+            return
+        new_ids = {incident['id'] for incident in incidents}
+        self.keep([incident_id for incident_id in self.ids if incident_id not in new_ids])
+        for field, transformer_type in self.fields.items():
+            normalize_function = self.transformation[transformer_type]['normalize']
+            field_values = [get_field_value(incident, field) for incident in incidents]
+            counts = self.vectorize(field, [normalize_function(value) for value in field_values])
+            matrix = self.matrices[field]
+            matrix.resize((matrix.shape[0], counts.shape[1]))
+            self.matrices[field] = vstack([matrix, counts], format='csr')
+            if transformer_type == 'json':
+                # only the existence of json fields is needed once they are vectorized
+                field_values = [True if field in incident else None for incident in incidents]
+            self.values[field] += field_values
+        for incident in incidents:
+            self.id_to_row[incident['id']] = len(self.ids)
+            self.ids.append(incident['id'])
+            self.modified.append(incident.get('modified'))
+        self.is_updated = True
+
+    def fill_fields(self, incidents_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Add to incidents_df the indexed fields which exist in the incidents
+        :param incidents_df: DataFrame of incidents indexed by id
+        :return: incidents_df
+        """
+        rows = [self.id_to_row[incident_id] for incident_id in incidents_df.index]
+        for field in self.fields:
+            values = [self.values[field][row] for row in rows]
+            if '.' in field or any(value is not None for value in values):
+                incidents_df[field] = values
+        return incidents_df
+
+    def get_similarity(self, field: str, transformation: Dict, current_incident: pd.DataFrame,
+                       incident_ids: List[str]) -> np.ndarray:
+        """
+        Compute for each incident the same score as the Tfidf transformer with euclidian_similarity_capped, using the
+        vocabulary of the current incident and the idf of the incidents
+        :param field: incident field
+        :param transformation: transformation of the field type
+        :param current_incident: DataFrame of the current incident
+        :param incident_ids: List of incident ids to score
+        :return: np.array of similarity for each incident
+        """
+        params = transformation['params']
+        current_incident = current_incident[field]
+        if transformation['normalize']:
+            current_incident = current_incident.apply(transformation['normalize'])
+        vocabulary = TfidfVectorizer(**params, use_idf=False).fit(current_incident).vocabulary_
+        incident_counts = CountVectorizer(**params, vocabulary=vocabulary).transform(current_incident)
+
+        # counts of the n-grams of the current incident, n-grams which are not in the index have no counts
+        known_terms = [(column, self.vocabularies[field][term]) for term, column in vocabulary.items()
+                       if term in self.vocabularies[field]]
+        projection = csr_matrix((np.ones(len(known_terms)),
+                                 (np.arange(len(known_terms)), [column for column, _ in known_terms])),
+                                shape=(len(known_terms), len(vocabulary)))
+        counts = self.matrices[field][[self.id_to_row[incident_id] for incident_id in incident_ids]]
+        counts = (counts[:, [index_column for _, index_column in known_terms]].astype(np.float64) @ projection).tocsr()
+
+        # smooth idf, as computed by TfidfVectorizer
+        counts.eliminate_zeros()
+        document_frequency = np.bincount(counts.indices, minlength=len(vocabulary))
+        idf = np.log((1 + counts.shape[0]) / (1 + document_frequency)) + 1
+        x = normalize(counts.multiply(idf).tocsr())
+        y = normalize(incident_counts.multiply(idf).tocsr())
+        square_distance = np.asarray(x.multiply(x).sum(axis=1)).ravel() + y.multiply(y).sum() \
+            - 2 * (x @ y.T).toarray().ravel()
+        return np.maximum(1 - np.sqrt(np.maximum(square_distance, 0)), 0)
+
+    def to_model_data(self) -> str:
+        data = {
+            'version': SIMILARITY_INDEX_VERSION,
+            'signature': self.signature,
+            'ids': self.ids,
+            'modified': self.modified,
+            'values': self.values,
+            'vocabularies': self.vocabularies,
+            'matrices': self.matrices,
+        }
+        return base64.b64encode(pickle.dumps(data)).decode('utf-8')  # guardrails-disable-line
+
+
+def load_similarity_index(index_name: str, fields: Dict[str, str], transformation: Dict) -> SimilarityIndex:
+    """
+    Load the similarity index stored as a ML model, or create an empty one if it does not exist
+    :param index_name: name of the ML model of the index
+    :param fields: Dict of incident field to its transformer type
+    :param transformation: Dict of all the transformation - TRANSFORMATION
+    :return: SimilarityIndex
+    """
+    data = None
+    res = demisto.executeCommand("getMLModel", {"modelName": index_name})[0]
+    if not is_error(res):
+        try:
+            data = pickle.loads(base64.b64decode(res['Contents']['modelData']))  # guardrails-disable-line
+        except Exception as e:
+            demisto.debug('Could not load the similarity index %s, rebuilding it: %s' % (index_name, e))
+    return SimilarityIndex(fields, transformation, data)
+
+
+def store_similarity_index(index: SimilarityIndex, index_name: str) -> None:
+    res = demisto.executeCommand('createMLModel', {'modelData': index.to_model_data(),
+                                                   'modelName': index_name,
+                                                   'modelOverride': 'true',
+                                                   'modelHidden': True,
+                                                   })
+    if is_error(res):
+        return_error(get_error(res))
+
+
+def update_similarity_index(index: SimilarityIndex, incidents: List[Dict], from_date: str, to_date: str) -> List[Dict]:
+    """
+    Fetch and add to the index the incidents which are not indexed yet or were modified since
+    :param index: SimilarityIndex
+    :param incidents: List of incidents with id and modified fields
+    :param from_date: from_date
+    :param to_date: to_date
+    :return: the incidents which are in the index
+    """
+    populate_fields = keep_high_level_field(list(index.fields)) + ['id', 'modified']
+    outdated_ids = index.get_outdated_ids(incidents)
+    for i in range(0, len(outdated_ids), SIMILARITY_INDEX_FETCH_CHUNK_SIZE):
+        chunk = outdated_ids[i:i + SIMILARITY_INDEX_FETCH_CHUNK_SIZE]
+        res = demisto.executeCommand('GetIncidentsByQuery', {
+            'query': "id:(%s)" % ' '.join(chunk),
+            'populateFields': ' , '.join(populate_fields),
+            'fromDate': from_date,
+            'toDate': to_date,
+            'limit': len(chunk)
+        })
+        if is_error(res):
+            return_error(res)
+        index.add(json.loads(res[0]['Contents']))
+    if len(index) > SIMILARITY_INDEX_MAX_SIZE:
+        index.keep([incident['id'] for incident in incidents])
+    # incidents deleted since they were fetched can't be scored
+    return [incident for incident in incidents if incident['id'] in index.id_to_row]
+
+
 def return_clean_date(timestamp: str) -> str:
     """
     Return YYYY-MM-DD
@@ -632,10 +926,11 @@ def get_args():  # type: ignore
     show_actual_incident = demisto.args().get('showCurrentIncident')
     incident_id = demisto.args().get('incidentId')
     include_indicators_similarity = demisto.args().get('includeIndicatorsSimilarity')
+    similarity_index_name = demisto.args().get('similarityIndexName')
 
     return similar_text_field, similar_json_field, similar_categorical_field, exact_match_fields, display_fields, \
         from_date, to_date, show_similarity, confidence, max_incidents, query, aggregate, limit, \
-        show_actual_incident, incident_id, include_indicators_similarity
+        show_actual_incident, incident_id, include_indicators_similarity, similarity_index_name
 
 
 def load_current_incident(incident_id: str, populate_fields: List[str], from_date: str, to_date: str):
@@ -878,7 +1173,7 @@ def prepare_current_incident(incident_df: pd.DataFrame, display_fields: List[str
 def main():
     similar_text_field, similar_json_field, similar_categorical_field, exact_match_fields, display_fields, from_date, \
         to_date, show_distance, confidence, max_incidents, query, aggregate, limit, show_actual_incident, \
-        incident_id, include_indicators_similarity = get_args()
+        incident_id, include_indicators_similarity, similarity_index_name = get_args()
 
     global_msg = ""
 
@@ -893,11 +1188,25 @@ def main():
 
     # load the related incidents
     populate_fields.remove('id')
-    incidents, msg = get_all_incidents_for_time_window_and_exact_match(exact_match_fields, populate_high_level_fields,
+    if similarity_index_name:
+        # the text and json fields are fetched only for the incidents which are not in the index
+        fetch_fields = keep_high_level_field([x for x in populate_fields if x not in similar_text_field
+                                              + similar_json_field]) + ['id', 'modified']
+    else:
+        fetch_fields = populate_high_level_fields
+    incidents, msg = get_all_incidents_for_time_window_and_exact_match(exact_match_fields, fetch_fields,
                                                                        incident,
                                                                        from_date, to_date, query, limit)
     global_msg += "%s \n" % msg
 
+    similarity_index = None
+    if incidents and similarity_index_name:
+        similarity_index = load_similarity_index(
+            similarity_index_name,
+            {**{field: 'commandline' for field in similar_text_field}, **{field: 'json' for field in similar_json_field}},
+            TRANSFORMATION)
+        incidents = update_similarity_index(similarity_index, incidents, from_date, to_date)
+
     if not incidents:
         return_outputs_summary(confidence, 0, 0, [], global_msg)
         return_outputs_similar_incidents_empty()
@@ -907,7 +1216,13 @@ def main():
     incidents_df = pd.DataFrame(incidents)
     incidents_df.index = incidents_df.id
 
-    incidents_df = fill_nested_fields(incidents_df, incidents, similar_text_field, similar_categorical_field)
+    if similarity_index is not None:
+        incidents_df = fill_nested_fields(incidents_df, incidents, similar_categorical_field)
+        incidents_df = similarity_index.fill_fields(incidents_df)
+        if similarity_index.is_updated:
+            store_similarity_index(similarity_index, similarity_index_name)
+    else:
+        incidents_df = fill_nested_fields(incidents_df, incidents, similar_text_field, similar_categorical_field)
 
     # Find given fields that does not exist in the incident
     global_msg, incorrect_fields = find_incorrect_fields(populate_fields, incidents_df, global_msg)
@@ -922,7 +1237,7 @@ def main():
     incident_df = fill_nested_fields(incident_df, incident, similar_text_field, similar_categorical_field)
 
     # Model prediction
-    model = Model(p_transformation=TRANSFORMATION)
+    model = Model(p_transformation=TRANSFORMATION, p_index=similarity_index)
     model.init_prediction(incident_df, incidents_df, similar_text_field,
                           similar_categorical_field, display_fields, similar_json_field)
     similar_incidents, fields_used = model.predict()
@@ -4,9 +4,11 @@ from DBotFindSimilarIncidents import normalize_command_line, main, demisto, keep
     preprocess_incidents_field, PREFIXES_TO_REMOVE, check_list_of_dict, REGEX_IP, match_one_regex, \
     SIMILARITY_COLUNM_NAME_INDICATOR, SIMILARITY_COLUNM_NAME, euclidian_similarity_capped, find_incorrect_fields, \
     MESSAGE_NO_INCIDENT_FETCHED, MESSAGE_INCORRECT_FIELD, MESSAGE_WARNING_TRUNCATED, COLUMN_ID, COLUMN_TIME, \
-    TAG_SCRIPT_INDICATORS
+    TAG_SCRIPT_INDICATORS, SimilarityIndex, Transformer, TRANSFORMATION, dumps_json_field_in_incident
 
+import base64
 import json
+import pickle
 import numpy as np
 import pandas as pd
 
@@ -331,3 +333,134 @@ def test_main_incident_nested(mocker):
     df, msg = main()
     assert not df.empty
     assert (df['similarity %s' % nested_field] == [1.0, 1.0, 1.0]).all()
+
+
+INDEX_INCIDENTS = [
+    {'id': str(i), 'modified': '2021-01-30', 'created': '2021-01-30', 'name': 'incident_name_%s' % i,
+     'commandline': 'powershell -enc %s IP=1.1.1.%s' % ('abc' * (i % 4), i),
+     'CustomFields': {'user': 'user_%s' % (i % 3), 'host': 'host_%s' % (i % 5)}}
+    for i in range(1, 21)
+]
+INDEX_CURRENT_INCIDENT = {'id': '123', 'commandline': 'powershell -enc abcabc IP=1.1.1.1',
+                          'CustomFields': {'user': 'user_1', 'host': 'host_2'}}
+
+
+def test_similarity_index_same_score_as_tfidf():
+    """
+    Given
+    - incidents added to a similarity index
+    When
+    - computing the similarity of the incidents to the current incident from the index
+    Then
+    - the similarity is the same as the one computed by vectorizing the incidents with TFIDF
+    """
+    fields = {'commandline': 'commandline', 'CustomFields': 'json'}
+    index = SimilarityIndex(fields, TRANSFORMATION)
+    index.add(INDEX_INCIDENTS[:10])
+    index.add(INDEX_INCIDENTS[10:])
+    incidents_df = pd.DataFrame(INDEX_INCIDENTS)
+    incidents_df.index = incidents_df.id
+    incident_df = dumps_json_field_in_incident(dict(INDEX_CURRENT_INCIDENT))
+
+    for field, transformer_type in fields.items():
+        expected = Transformer(transformer_type, field, incidents_df.copy(), incident_df,
+                               TRANSFORMATION).get_score()['similarity %s' % field]
+        similarity = index.get_similarity(field, TRANSFORMATION[transformer_type], incident_df,
+                                          incidents_df.index.tolist())
+        assert np.allclose(similarity, expected, atol=0.01)
+        assert len(set(expected)) > 1
+
+
+def test_similarity_index_update():
+    """
+    Given
+    - a similarity index
+    When
+    - loading it with other fields, and checking which incidents should be indexed again
+    Then
+    - the stored index is ignored if it was built for other fields
+    - only new and modified incidents are outdated
+    - removed incidents are dropped from the index
+    """
+    index = SimilarityIndex({'commandline': 'commandline'}, TRANSFORMATION)
+    index.add(INDEX_INCIDENTS[:5])
+    data = pickle.loads(base64.b64decode(index.to_model_data()))
+    assert len(SimilarityIndex({'commandline': 'commandline'}, TRANSFORMATION, data)) == 5
+    assert len(SimilarityIndex({'commandline': 'json'}, TRANSFORMATION, data)) == 0
+
+    incidents = [dict(incident) for incident in INDEX_INCIDENTS[:6]]
+    incidents[2]['modified'] = '2021-02-01'
+    assert index.get_outdated_ids(incidents) == ['3', '6']
+
+    index.add([incidents[2]])
+    index.keep(['1', '3'])
+    assert index.ids == ['1', '3']
+    assert index.values['commandline'] == [INDEX_INCIDENTS[0]['commandline'], INDEX_INCIDENTS[2]['commandline']]
+    assert index.matrices['commandline'].shape[0] == 2
+
+
+@pytest.mark.filterwarnings("ignore::pandas.core.common.SettingWithCopyWarning")
+def test_main_similarity_index(mocker):
+    """
+    Given
+    - a similarity index name
+    When
+    - running the script twice
+    Then
+    - the text and json fields of the incidents are fetched only in the first run
+    - the results are the same as without the index
+    """
+    stored_models = {}
+    fetched_ids = []
+
+    def execute_command(command, args):
+        if command == 'getMLModel':
+            if args['modelName'] not in stored_models:
+                return [{'Contents': 'model not found', 'Type': 4}]
+            return [{'Contents': {'modelData': stored_models[args['modelName']]}, 'Type': 'note'}]
+        if command == 'createMLModel':
+            stored_models[args['modelName']] = args['modelData']
+            return [{'Contents': 'ok', 'Type': 'note'}]
+        if command == 'GetIncidentsByQuery':
+            if 'limit' not in args:
+                return [{'Contents': json.dumps([INDEX_CURRENT_INCIDENT]), 'Type': 'note'}]
+            populate_fields = [field.strip() for field in args['populateFields'].split(',')]
+            incidents = INDEX_INCIDENTS
+            if args['query'].startswith('id:'):
+                ids = args['query'][4:-1].split()
+                fetched_ids.extend(ids)
+                incidents = [incident for incident in INDEX_INCIDENTS if incident['id'] in ids]
+            incidents = [{k: v for k, v in incident.items() if k in populate_fields} for incident in incidents]
+            return [{'Contents': json.dumps(incidents), 'Type': 'note'}]
+
+    args = {
+        'incidentId': 123,
+        'similarTextField': 'commandline',
+        'similarCategoricalField': '',
+        'similarJsonField': 'CustomFields',
+        'limit': 1000,
+        'fieldExactMatch': '',
+        'fieldsToDisplay': '',
+        'showIncidentSimilarityForAllFields': True,
+        'minimunIncidentSimilarity': 0.2,
+        'maxIncidentsToDisplay': 100,
+        'query': '',
+        'aggreagateIncidentsDifferentDate': 'False',
+        'includeIndicatorsSimilarity': 'False'
+    }
+    mocker.patch.object(demisto, 'executeCommand', side_effect=execute_command)
+    mocker.patch.object(demisto, 'args', return_value=args)
+    expected, _ = main()
+
+    args['similarityIndexName'] = 'similarity_index'
+    res, _ = main()
+    assert sorted(fetched_ids) == sorted(incident['id'] for incident in INDEX_INCIDENTS)
+    assert 'similarity_index' in stored_models
+
+    fetched_ids.clear()
+    res_second_run, _ = main()
+    assert not fetched_ids
+    for df in [res, res_second_run]:
+        assert df.index.tolist() == expected.index.tolist()
+        assert np.allclose(df[SIMILARITY_COLUNM_NAME], expected[SIMILARITY_COLUNM_NAME], atol=0.01)
+        assert df['commandline'].tolist() == expected['commandline'].tolist()
@@ -3,6 +3,7 @@ from collections import Counter
 from CommonServerUserPython import *
 from CommonServerPython import *
 from sklearn.feature_extraction.text import TfidfVectorizer
+import hashlib
 import pickle
 import uuid
 import spacy
@@ -40,6 +41,7 @@ html_patterns = [
 ]
 
 LANGUAGE_KEY = 'language'
+DEFAULT_BATCH_SIZE = 100
 
 
 def create_text_result(original_text, tokenized_text, original_words_to_tokens, hash_seed=None):
@@ -69,7 +71,7 @@ class Tokenizer:
     def __init__(self, clean_html=True, remove_new_lines=True, hash_seed=None, remove_non_english=True,
                  remove_stop_words=True, remove_punct=True, remove_non_alpha=True, replace_emails=True,
                  replace_numbers=True, lemma=True, replace_urls=True, language=ANY_LANGUAGE,
-                 tokenization_method='tokenizer'):
+                 tokenization_method='tokenizer', batch_size=DEFAULT_BATCH_SIZE, n_process=1):
         self.number_pattern = "NUMBER_PATTERN"
         self.url_pattern = "URL_PATTERN"
         self.email_pattern = "EMAIL_PATTERN"
@@ -94,6 +96,11 @@ class Tokenizer:
         self._unicode_chr_splitter = _Re('(?s)((?:[\ud800-\udbff][\udc00-\udfff])|.)').split
         self.spacy_count = 0
         self.spacy_reset_count = 500
+        self.batch_size = batch_size
+        self.n_process = n_process
+        # tokenization results of already seen texts, keyed by the hash of the cleaned text
+        self.tokenized_texts_cache = {}  # type: ignore
+        self.max_cache_size = 10 ** 5
 
     def handle_long_text(self):
         return '', ''
@@ -118,14 +125,6 @@ class Tokenizer:
     def remove_multiple_whitespaces(self, text):
         return re.sub(r"\s+", " ", text).strip()
 
-    def handle_tokenizaion_method(self, text):
-        if self.tokenization_method == 'tokenizer':
-            tokens_list, original_words_to_tokens = self.tokenize_text_spacy(text)
-        else:
-            tokens_list, original_words_to_tokens = self.tokenize_text_other(text)
-        tokenized_text = ' '.join(tokens_list).strip()
-        return tokenized_text, original_words_to_tokens
-
     def tokenize_text_other(self, text):
         tokens_list = []
         tokenization_method = self.tokenization_method
@@ -144,11 +143,27 @@ class Tokenizer:
             return_error('Unsupported tokenization method: when language is "Other" ({})'.format(tokenization_method))
         return tokens_list, original_words_to_tokens
 
-    def tokenize_text_spacy(self, text):
-        if self.nlp is None or self.spacy_count % self.spacy_reset_count == 0:
-            self.init_spacy_model()
-        doc = self.nlp(text)  # type: ignore
-        self.spacy_count += 1
+    def tokenize_texts_spacy(self, texts):
+        """
+        Tokenizes the texts with nlp.pipe, which processes them in batches (and in several processes, if n_process
+        is greater than 1). The model is still re-initialized every spacy_reset_count texts.
+        """
+        results = []
+        i = 0
+        while i < len(texts):
+            if self.nlp is None or self.spacy_count % self.spacy_reset_count == 0:
+                self.init_spacy_model()
+            chunk = texts[i:i + self.spacy_reset_count - self.spacy_count % self.spacy_reset_count]
+            pipe_kwargs = {'batch_size': self.batch_size}
+            if self.n_process > 1:
+                pipe_kwargs['n_process'] = self.n_process
+            for doc, text in zip(self.nlp.pipe(chunk, **pipe_kwargs), chunk):  # type: ignore
+                results.append(self.tokenize_spacy_doc(doc, text))
+            self.spacy_count += len(chunk)
+            i += len(chunk)
+        return results
+
+    def tokenize_spacy_doc(self, doc, text):
         original_text_indices_to_words = self.map_indices_to_words(text)
         tokens_list = []
         original_words_to_tokens = {}  # type: ignore
@@ -182,29 +197,62 @@ class Tokenizer:
         return tokens_list, original_words_to_tokens
 
     def init_spacy_model(self):
-        self.nlp = spacy.load('en_core_web_sm', disable=['parser', 'ner', 'textcat'])
+        disable = ['parser', 'ner', 'textcat']
+        if not self.lemma and not self.replace_numbers:
+            # the tagger is needed only for the lemmas and the numbers part-of-speech
+            disable.append('tagger')
+        self.nlp = spacy.load('en_core_web_sm', disable=disable)
+
+    def clean_text(self, text):
+        original_text = text
+        if self.remove_new_lines:
+            text = self.remove_line_breaks(text)
+        if self.clean_html:
+            text = clean_html_from_text(text)
+            original_text = text
+        return original_text, self.remove_multiple_whitespaces(text)
+
+    def tokenize_texts(self, texts):
+        if self.tokenization_method == 'tokenizer':
+            tokenized_texts = self.tokenize_texts_spacy(texts)
+        else:
+            tokenized_texts = [self.tokenize_text_other(t) for t in texts]
+        return [(' '.join(tokens_list).strip(), original_words_to_tokens)
+                for tokens_list, original_words_to_tokens in tokenized_texts]
 
     def word_tokenize(self, text):
         if not isinstance(text, list):
             text = [text]
+        result = self.word_tokenize_batch(text)
+        if len(result) == 1:
+            result = result[0]  # type: ignore
+        return result
+
+    def word_tokenize_batch(self, texts):
+        """
+        Tokenizes a list of texts. Texts which were already tokenized are taken from the cache, and the rest are
+        tokenized together.
+        """
+        cleaned_texts = [self.clean_text(t) for t in texts]
+        keys = [hashlib.md5(t.encode('utf-8')).hexdigest() for _, t in cleaned_texts]  # nosec
+        texts_to_tokenize = {}
+        for key, (_, t) in zip(keys, cleaned_texts):
+            if len(t) < self.max_text_length and key not in self.tokenized_texts_cache:
+                texts_to_tokenize[key] = t
+        if len(self.tokenized_texts_cache) + len(texts_to_tokenize) > self.max_cache_size:
+            self.tokenized_texts_cache = {}
+            texts_to_tokenize = {key: t for key, (_, t) in zip(keys, cleaned_texts) if len(t) < self.max_text_length}
+        tokenized_texts = self.tokenize_texts(list(texts_to_tokenize.values()))
+        self.tokenized_texts_cache.update(zip(texts_to_tokenize, tokenized_texts))
         result = []
-        for t in text:
-            original_text = t
-            if self.remove_new_lines:
-                t = self.remove_line_breaks(t)
-            if self.clean_html:
-                t = clean_html_from_text(t)
-                original_text = t
-            t = self.remove_multiple_whitespaces(t)
+        for key, (original_text, t) in zip(keys, cleaned_texts):
             if len(t) < self.max_text_length:
-                tokenized_text, original_words_to_tokens = self.handle_tokenizaion_method(t)
+                tokenized_text, original_words_to_tokens = self.tokenized_texts_cache[key]
             else:
                 tokenized_text, original_words_to_tokens = self.handle_long_text()
             text_result = create_text_result(original_text, tokenized_text, original_words_to_tokens,
                                              hash_seed=self.hash_seed)
             result.append(text_result)
-        if len(result) == 1:
-            result = result[0]  # type: ignore
         return result
 
 
@@ -290,9 +338,13 @@ def clean_text_of_incidents_list(data, source_text_field, remove_html_tags):
 
 def pre_process_batch(data, source_text_field, target_text_field, pre_process_type, hash_seed):
     raw_text_data = [x[source_text_field] for x in data]
+    if pre_process_type == 'nlp':
+        # the tokenizer processes all the texts together
+        processed_texts = get_tokenizer(hash_seed).word_tokenize_batch(raw_text_data)
+    else:
+        processed_texts = [pre_process_single_text(raw_text, hash_seed, pre_process_type) for raw_text in raw_text_data]
     tokenized_text_data = []
-    for raw_text in raw_text_data:
-        tokenized_text = pre_process_single_text(raw_text, hash_seed, pre_process_type)
+    for tokenized_text in processed_texts:
         if hash_seed is None:
             tokenized_text_data.append(tokenized_text['tokenizedText'])
         else:
@@ -308,12 +360,18 @@ def pre_process_single_text(raw_text, hash_seed, pre_process_type):
     return tokenized_text
 
 
-def pre_process_tokenizer(text, seed):
+def get_tokenizer(seed):
     global tokenizer
     if tokenizer is None:
         tokenizer = Tokenizer(tokenization_method=demisto.args()['tokenizationMethod'],
-                              language=demisto.args()['language'], hash_seed=seed)
-    processed_text = tokenizer.word_tokenize(text)
+                              language=demisto.args()['language'], hash_seed=seed,
+                              batch_size=int(demisto.args().get('batchSize', DEFAULT_BATCH_SIZE)),
+                              n_process=int(demisto.args().get('processesCount', 1)))
+    return tokenizer
+
+
+def pre_process_tokenizer(text, seed):
+    processed_text = get_tokenizer(seed).word_tokenize(text)
     return processed_text
 
 
@@ -426,6 +426,64 @@ I have 3 dogs
         assert res1['originalWordsToTokens'] == expected
 
 
+def test_word_tokenize_batch(mocker):
+    """
+    Given
+    - a list of texts with a duplicate text
+    When
+    - tokenizing the texts in a batch, and then tokenizing one of them again
+    Then
+    - the results are the same as tokenizing each text separately
+    - each distinct text is tokenized once, and texts which were already tokenized are taken from the cache
+    """
+    texts = ['I have 3 dogs', 'let it be', 'I have   3 dogs', 'see you s00n']
+    expected = [Tokenizer(**negative_initialization).word_tokenize(t) for t in texts]
+    t1 = Tokenizer(**negative_initialization)
+    tokenize_texts_spy = mocker.spy(t1, 'tokenize_texts')
+    assert t1.word_tokenize_batch(texts) == expected
+    assert tokenize_texts_spy.call_args[0][0] == ['I have 3 dogs', 'let it be', 'see you s00n']
+
+    assert t1.word_tokenize(texts[1]) == expected[1]
+    assert tokenize_texts_spy.call_args[0][0] == []
+
+
+def test_word_tokenize_batch_resets_model(mocker):
+    """
+    Given
+    - a tokenizer which re-initializes the spacy model every 2 texts
+    When
+    - tokenizing 5 texts in a batch
+    Then
+    - the texts are piped through the model in chunks of 2, and the model is initialized 3 times
+    """
+    t1 = Tokenizer(**negative_initialization)
+    t1.spacy_reset_count = 2
+    init_spy = mocker.spy(t1, 'init_spacy_model')
+    texts = ['text number {}'.format(word) for word in ['one', 'two', 'three', 'four', 'five']]
+    res = t1.word_tokenize_batch(texts)
+    assert [r['tokenizedText'] for r in res] == texts
+    assert init_spy.call_count == 3
+
+
+def test_pre_process_batch_nlp(mocker):
+    """
+    Given
+    - incidents with duplicate texts
+    When
+    - pre-processing them with the nlp pre-process type
+    Then
+    - each incident gets the same tokenized text as tokenizing its text separately
+    """
+    import DBotPreprocessTextData
+    mocker.patch.object(DBotPreprocessTextData, 'tokenizer', None)
+    mocker.patch.object(demisto, 'args', return_value={'tokenizationMethod': 'tokenizer', 'language': 'English',
+                                                       'batchSize': '2'})
+    texts = ['my email is a@gmail.com', 'I have 3 dogs', 'my email is a@gmail.com']
+    data = pre_process_batch([{'body': text} for text in texts], 'body', 'processed', 'nlp', None)
+    assert DBotPreprocessTextData.tokenizer.batch_size == 2
+    assert [d['processed'] for d in data] == [Tokenizer().word_tokenize(text)['tokenizedText'] for text in texts]
+
+
 def test_read_file(mocker):
     mocker.patch.object(demisto, 'getFilePath', return_value={'path': './TestData/input_json_file_test'})
     obj = read_file('231342@343', 'json')
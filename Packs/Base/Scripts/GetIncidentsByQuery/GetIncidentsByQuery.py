@@ -50,6 +50,24 @@ def get_context(incident_id):
         return {}
 
 
+def add_incidents_context(incidents, limit):
+    """
+    Adds the context to the incidents in order, until `limit` incidents without python magic in their context
+    were found, so the context is fetched only for the incidents which are returned.
+    Returns the incidents with their context.
+    """
+    incidents_with_context = []
+    for inc in incidents:
+        if len(incidents_with_context) >= limit:
+            break
+        inc['context'] = get_context(inc['id'])
+        if is_incident_contains_python_magic(inc):
+            demisto.debug("Warning: skip incident [id:%s] that contains python magic" % str(inc['id']))
+            continue
+        incidents_with_context.append(inc)
+    return incidents_with_context
+
+
 def build_incidents_query(extra_query, incident_types, time_field, from_date, to_date, non_empty_fields):
     query_parts = []
     if extra_query:
@@ -74,19 +92,42 @@ def build_incidents_query(extra_query, incident_types, time_field, from_date, to
     return query
 
 
-def handle_incident(inc, fields_to_populate, include_context):
+def handle_incident(inc, fields_to_populate):
     # we flat the custom field to the incident structure, like in the context
     custom_fields = inc.get('CustomFields', {}) or {}
     inc.update(custom_fields)
     if fields_to_populate and len(fields_to_populate) > 0:
         inc = {k: v for k, v in inc.items() if k in fields_to_populate}
-    if include_context:
-        inc['context'] = get_context(inc['id'])
     return inc
 
 
 def is_incident_contains_python_magic(inc):
-    return PYTHON_MAGIC in json.dumps(inc)
+    # scan the keys and the string values instead of serializing the whole incident.
+    # other json values can't contain the magic when serialized.
+    stack = [inc]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, str):
+            if PYTHON_MAGIC in value:
+                return True
+        elif isinstance(value, dict):
+            for key, item in value.items():
+                if isinstance(key, str) and PYTHON_MAGIC in key:
+                    return True
+                stack.append(item)
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return False
+
+
+def skip_incidents_with_python_magic(incidents):
+    parsed_incidents = []
+    for inc in incidents:
+        if is_incident_contains_python_magic(inc):
+            demisto.debug("Warning: skip incident [id:%s] that contains python magic" % str(inc['id']))
+            continue
+        parsed_incidents.append(inc)
+    return parsed_incidents
 
 
 def get_fields_to_populate_arg(fields_to_populate):
@@ -100,7 +141,11 @@ def get_fields_to_populate_arg(fields_to_populate):
     return ",".join(incidents_fields_to_populate)
 
 
-def get_incidents_by_page(args, page, fields_to_populate, include_context):
+def get_incidents_by_page(args, page, fields_to_populate):
+    """
+    Returns the incidents of a single page and the total number of incidents matching the query,
+    or None if the server did not return the total.
+    """
     args['page'] = page
     if is_demisto_version_ge('6.2.0') and len(fields_to_populate) > 0:
         args['populateFields'] = get_fields_to_populate_arg(fields_to_populate)
@@ -108,18 +153,34 @@ def get_incidents_by_page(args, page, fields_to_populate, include_context):
     if is_error(res):
         error_message = get_error(res)
         raise Exception("Failed to get incidents by query args: %s error: %s" % (args, error_message))
-    if res[0]['Contents'].get('data') is None:
-        return []
-    incidents = res[0]['Contents'].get('data') or []
-
-    parsed_incidents = []
-    for inc in incidents:
-        new_incident = handle_incident(inc, fields_to_populate, include_context)
-        if is_incident_contains_python_magic(new_incident):
-            demisto.debug("Warning: skip incident [id:%s] that contains python magic" % str(inc['id']))
-            continue
-        parsed_incidents.append(new_incident)
-    return parsed_incidents
+    contents = res[0]['Contents']
+    incidents = contents.get('data') or []
+    return [handle_incident(inc, fields_to_populate) for inc in incidents], contents.get('total')
+
+
+def iter_incidents_pages(args, size, fields_to_populate, include_context):
+    """
+    Yields the parsed incidents page by page, in the query order, until `size` incidents were yielded.
+    The contexts are fetched only for the incidents which are returned, and no page is fetched past the
+    total number of incidents returned by the server.
+    """
+    page_size = args['size']
+    remaining = size
+    page = 0
+    while remaining > 0:
+        incidents, total = get_incidents_by_page(args, page, fields_to_populate)
+        if not incidents:
+            return
+        page += 1
+        incidents = skip_incidents_with_python_magic(incidents)
+        if include_context:
+            incidents = add_incidents_context(incidents, remaining)
+        else:
+            incidents = incidents[:remaining]
+        remaining -= len(incidents)
+        yield incidents
+        if total is not None and page * page_size >= total:
+            return
 
 
 def get_demisto_datetme_format(date_string):
@@ -140,7 +201,7 @@ def get_demisto_datetme_format(date_string):
             return None
 
 
-def get_incidents(query, time_field, size, from_date, to_date, fields_to_populate, include_context):
+def build_get_incidents_args(query, time_field, size, from_date, to_date):
     query_size = min(PAGE_SIZE, size)
     args = {"query": query, "size": query_size, "sort": "%s.%s" % (time_field, "desc")}
     # apply only when created time field
@@ -158,16 +219,38 @@ def get_incidents(query, time_field, size, from_date, to_date, fields_to_populat
                 args['todate'] = to_datetime
             else:
                 demisto.results("did not set to date due to a wrong format: " + from_date)
+    return args
 
+
+def get_incidents(query, time_field, size, from_date, to_date, fields_to_populate, include_context):
+    args = build_get_incidents_args(query, time_field, size, from_date, to_date)
     incident_list = []  # type: ignore
-    page = 0
-    while len(incident_list) < size:
-        incidents = get_incidents_by_page(args, page, fields_to_populate, include_context)
-        if not incidents:
-            break
+    for incidents in iter_incidents_pages(args, size, fields_to_populate, include_context):
         incident_list += incidents
-        page += 1
-    return incident_list[:size]
+    return incident_list
+
+
+def stream_incidents_to_file(file_name, query, time_field, size, from_date, to_date, fields_to_populate,
+                             include_context):
+    """
+    Writes the incidents to a json file entry page by page, instead of keeping all of them in memory.
+    Returns the file entry and the number of incidents written.
+    """
+    args = build_get_incidents_args(query, time_field, size, from_date, to_date)
+    temp = demisto.uniqueFile()
+    count = 0
+    with open(demisto.investigation()['id'] + '_' + temp, 'w') as f:
+        f.write('[')
+        for incidents in iter_incidents_pages(args, size, fields_to_populate, include_context):
+            for inc in incidents:
+                if count:
+                    f.write(', ')
+                f.write(json.dumps(inc))
+                count += 1
+        f.write(']')
+    entry = {'Contents': '', 'ContentsFormat': formats['text'], 'Type': entryTypes['file'], 'File': file_name,
+             'FileID': temp}
+    return entry, count
 
 
 def get_comma_sep_list(value):
@@ -206,26 +289,38 @@ def main():
             fields_to_populate.append('id')
             fields_to_populate = set([x for x in fields_to_populate if x])  # type: ignore
         include_context = d_args['includeContext'] == 'true'
-        incidents = get_incidents(query, d_args['timeField'],
-                                  int(d_args['limit']),
-                                  d_args.get('fromDate'),
-                                  d_args.get('toDate'),
-                                  fields_to_populate,
-                                  include_context)
-
-        # output
         file_name = str(uuid.uuid4())
         output_format = d_args['outputFormat']
-        if output_format == 'pickle':
-            data_encoded = pickle.dumps(incidents, protocol=2)
-        elif output_format == 'json':
-            data_encoded = json.dumps(incidents)  # type: ignore
+        if d_args.get('streamOutput') == 'true':
+            if output_format != 'json':
+                raise Exception("Streaming output is supported only for the json output format")
+            entry, incidents_count = stream_incidents_to_file(file_name, query, d_args['timeField'],
+                                                              int(d_args['limit']),
+                                                              d_args.get('fromDate'),
+                                                              d_args.get('toDate'),
+                                                              fields_to_populate,
+                                                              include_context)
         else:
-            raise Exception("Invalid output format: %s" % output_format)
+            incidents = get_incidents(query, d_args['timeField'],
+                                      int(d_args['limit']),
+                                      d_args.get('fromDate'),
+                                      d_args.get('toDate'),
+                                      fields_to_populate,
+                                      include_context)
+
+            # output
+            if output_format == 'pickle':
+                data_encoded = pickle.dumps(incidents, protocol=2)
+            elif output_format == 'json':
+                data_encoded = json.dumps(incidents)  # type: ignore
+            else:
+                raise Exception("Invalid output format: %s" % output_format)
+
+            entry = fileResult(file_name, data_encoded)
+            entry['Contents'] = incidents
+            incidents_count = len(incidents)
 
-        entry = fileResult(file_name, data_encoded)
-        entry['Contents'] = incidents
-        entry['HumanReadable'] = "Fetched %d incidents successfully by the query: %s" % (len(incidents), query)
+        entry['HumanReadable'] = "Fetched %d incidents successfully by the query: %s" % (incidents_count, query)
         entry['EntryContext'] = {
             'GetIncidentsByQuery': {
                 'Filename': file_name,
@@ -182,3 +182,110 @@ def test_get_fields_to_populate_arg():
     assert get_fields_to_populate_arg(["field1", "grid_field.test1"]) == "field1,grid_field"
     assert get_fields_to_populate_arg(["field1", "field2"]) == "field1,field2"
     assert get_fields_to_populate_arg([]) == ""
+
+
+def execute_command_paged_incidents(total, contexts_requests, magic_context_ids=(5,)):
+    all_incidents = [{'id': i, 'name': 'incident %d' % i} for i in range(total)]
+
+    def execute_command(command, args):
+        if command == 'getContext':
+            contexts_requests.append(args['id'])
+            context = {'magic': PYTHON_MAGIC} if args['id'] in magic_context_ids else {'id': args['id']}
+            return [{'Type': entryTypes['note'], 'Contents': {'context': context}}]
+        page, size = args['page'], args['size']
+        data = all_incidents[page * size:(page + 1) * size] or None
+        return [{'Type': entryTypes['note'], 'Contents': {'data': data, 'total': total}}]
+    return execute_command
+
+
+def test_get_incidents_pages(mocker):
+    """
+    Given
+    - 25 incidents matching the query, in pages of 10 incidents
+    When
+    - getting 25 incidents, and getting 15 incidents with their context
+    Then
+    - the pages are fetched once, in order, up to the total, and the incidents are returned in the query order
+    - incidents with python magic in the context are skipped and replaced by the next incident
+    - the context is fetched only for the returned incidents
+    """
+    mocker.patch('GetIncidentsByQuery.PAGE_SIZE', 10)
+    contexts_requests = []
+    pages_requests = []
+    execute_command = execute_command_paged_incidents(25, contexts_requests)
+
+    def execute_command_recording_pages(command, args):
+        if command == 'getIncidents':
+            pages_requests.append(args['page'])
+        return execute_command(command, args)
+    mocker.patch.object(demisto, 'executeCommand', side_effect=execute_command_recording_pages)
+
+    incidents = get_incidents('query', 'modified', 25, None, None, None, False)
+    assert [inc['id'] for inc in incidents] == list(range(25))
+    assert pages_requests == [0, 1, 2]
+
+    incidents = get_incidents('query', 'modified', 15, None, None, None, True)
+    assert [inc['id'] for inc in incidents] == [i for i in range(16) if i != 5]
+    assert incidents[0]['context'] == {'id': 0}
+    assert sorted(contexts_requests) == list(range(16))
+
+
+def test_get_incidents_context_magic_in_truncated_page(mocker):
+    """
+    Given
+    - 25 incidents matching the query, in pages of 10 incidents
+    - incident 12 has python magic in its context
+    When
+    - getting 16 incidents with their context
+    Then
+    - incident 12 is replaced by the next incident of its page, not by an incident of the next page
+    - the context is fetched only for the returned incidents and incident 12
+    """
+    mocker.patch('GetIncidentsByQuery.PAGE_SIZE', 10)
+    contexts_requests = []
+    execute_command = execute_command_paged_incidents(25, contexts_requests, magic_context_ids=(12,))
+    mocker.patch.object(demisto, 'executeCommand', side_effect=execute_command)
+
+    incidents = get_incidents('query', 'modified', 16, None, None, None, True)
+    assert [inc['id'] for inc in incidents] == [i for i in range(17) if i != 12]
+    assert contexts_requests == list(range(17))
+
+
+def test_is_incident_contains_python_magic():
+    from GetIncidentsByQuery import is_incident_contains_python_magic
+    assert not is_incident_contains_python_magic(incident1)
+    assert is_incident_contains_python_magic(incident_with_magic)
+    assert is_incident_contains_python_magic({'id': 1, 'labels': [{'type': 'a', 'value': ['b', 'x%sx' % PYTHON_MAGIC]}]})
+    assert is_incident_contains_python_magic({'id': 1, 'context': {PYTHON_MAGIC: 1}})
+
+
+def test_main_stream_output(mocker, tmp_path, monkeypatch):
+    """
+    Given
+    - the streamOutput argument
+    When
+    - running the script
+    Then
+    - the incidents are written to the file entry, in the same format as the json output format
+    """
+    monkeypatch.chdir(tmp_path)
+    args = dict(get_args())
+    args['limit'] = '25'
+    args['streamOutput'] = 'true'
+    mocker.patch.object(demisto, 'args', return_value=args)
+    mocker.patch('GetIncidentsByQuery.PAGE_SIZE', 10)
+    mocker.patch.object(demisto, 'executeCommand', side_effect=execute_command_paged_incidents(25, []))
+    mocker.patch.object(demisto, 'investigation', return_value={'id': 'inv'})
+    mocker.patch.object(demisto, 'uniqueFile', return_value='stream')
+
+    entry = main()
+    assert "Fetched 25 incidents successfully" in entry['HumanReadable']
+    assert entry['Contents'] == ''
+    with open(tmp_path / 'inv_stream') as f:
+        file_content = f.read()
+    assert file_content == json.dumps(get_incidents('query', 'created', 25, None, None, None, False))
+
+    args['outputFormat'] = 'pickle'
+    return_error_mock = mocker.patch('GetIncidentsByQuery.return_error')
+    main()
+    assert 'only for the json output format' in return_error_mock.call_args[0][0]
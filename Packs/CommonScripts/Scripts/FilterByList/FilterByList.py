@@ -2,6 +2,8 @@ import demistomock as demisto
 from CommonServerPython import *
 from CommonServerUserPython import *
 
+import bisect
+
 
 def empty_list_context(items, list_name):
     ec = {'List.In': [], 'List.NotIn': items}
@@ -10,37 +12,87 @@ def empty_list_context(items, list_name):
     return human_readable, ec
 
 
-def build_filtered_data(lst, items, ignore_case, match_exact, regex_ignore_case_flag):
+# Regex constructs whose match depends on the text around the matched text
+CONTEXT_DEPENDENT_REGEX = re.compile(r'[\^$]|\\[AZbB]|\(\?<?[=!]')
+
+
+class ListIndex(object):
+    """
+    Index of the list items, built once and used to match all the values with the list.
+    """
+
+    def __init__(self, lst, ignore_case, delimiter, regex_ignore_case_flag):
+        self.ignore_case = ignore_case
+        self.regex_ignore_case_flag = regex_ignore_case_flag
+        self.list_items = set(lst)
+        self.lowercase_list_items = {list_item.lower().strip() for list_item in lst}
+        self.search_list_items = [list_item for list_item in lst if list_item]
+        self.search_text = delimiter.join(self.search_list_items)
+        self.search_offsets = []  # type: list
+        offset = 0
+        for list_item in self.search_list_items:
+            self.search_offsets.append(offset)
+            offset += len(list_item) + len(delimiter)
+
+    def count_exact_matches(self, item):
+        if self.ignore_case:
+            return int(item.lower() in self.lowercase_list_items)
+        return int(item in self.list_items)
+
+    def count_search_matches(self, item):
+        """
+        Count the list items in which the value (as a regex) is found.
+
+        Unless the regex depends on the text around the match, a match in a list item is also a match in the
+        joined list items. So the list items before the first match in the joined list items don't match,
+        and only the list item of each match found has to be searched.
+        """
+        if not self.search_list_items:
+            return 0
+
+        pattern = re.compile(item, self.regex_ignore_case_flag)
+        if CONTEXT_DEPENDENT_REGEX.search(item):
+            return sum(1 for list_item in self.search_list_items if pattern.search(list_item))
+
+        matches = 0
+        pos = 0
+        while True:
+            match = pattern.search(self.search_text, pos)
+            if not match:
+                break
+            i = bisect.bisect_right(self.search_offsets, match.start()) - 1
+            if pattern.search(self.search_list_items[i]):
+                matches += 1
+            if i + 1 == len(self.search_offsets):
+                break
+            pos = self.search_offsets[i + 1]
+        return matches
+
+
+def build_filtered_data(lst, items, ignore_case, match_exact, regex_ignore_case_flag, delimiter=','):
     not_white_listed = []  # type: list
     white_listed = []  # type: list
-    human_readable = ''
+    human_readable = []  # type: list
 
     # fill whitelisted array with all the the values that match the regex items in listname argument
-    list_to_lowercase = [list_item.lower().strip() for list_item in lst]
+    index = ListIndex(lst, ignore_case, delimiter, regex_ignore_case_flag)
     for item in items:
         if match_exact:
-            if ignore_case:
-                if item.lower() not in list_to_lowercase:
-                    continue
-            else:
-                if item not in lst:
-                    continue
-
-            human_readable += item + ' is in the list\n'
-            white_listed.append(item)
+            matches = index.count_exact_matches(item)
         else:
-            for list_item in lst:
-                if list_item and re.search(item, list_item, regex_ignore_case_flag):
-                    human_readable += item + ' is in the list\n'
-                    white_listed.append(item)
+            matches = index.count_search_matches(item)
+
+        human_readable += [item + ' is in the list\n'] * matches
+        white_listed += [item] * matches
 
     # fill not_white_listed array with all the the values that not in whitelisted
+    white_listed_set = set(white_listed)
     for item in items:
-        if item not in white_listed:
-            human_readable += item + ' is not part of the list\n'
+        if item not in white_listed_set:
+            human_readable.append(item + ' is not part of the list\n')
             not_white_listed.append(item)
 
-    return white_listed, not_white_listed, human_readable
+    return white_listed, not_white_listed, ''.join(human_readable)
 
 
 def filter_list(lst, items, ignore_case, match_exact, list_name, delimiter):
@@ -52,7 +104,7 @@ def filter_list(lst, items, ignore_case, match_exact, list_name, delimiter):
     regex_ignore_case_flag = re.IGNORECASE if ignore_case else 0
 
     white_listed, not_white_listed, human_readable = build_filtered_data(lst, items, ignore_case, match_exact,
-                                                                         regex_ignore_case_flag)
+                                                                         regex_ignore_case_flag, delimiter)
 
     ec = {
         'List': {
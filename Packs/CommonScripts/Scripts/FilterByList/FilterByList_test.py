@@ -156,3 +156,23 @@ def test_no_ignore_yes_match(lst, items, ignore_case, match_exact, expected_resu
 def test_yes_ignore_yes_match(lst, items, ignore_case, match_exact, expected_result, list_name, delimiter):
     result, _ = filter_list(lst, items, ignore_case, match_exact, list_name, delimiter)
     assert result == expected_result
+
+
+def test_build_filtered_data_search():
+    """
+    Given
+    - a list, and values some of which are found in more than one list item, or depend on the text around the match
+    When
+    - filtering the values with the list without exact match
+    Then
+    - each value is returned once for each list item it is found in, in the order of the values
+    """
+    from FilterByList import build_filtered_data
+
+    lst = ['foo.com', 'bar.foo.com', 'baz.org', '']
+    items = ['foo', '^bar', 'com$', r'org\b', 'qux', r'(?<=\.)foo']
+
+    white_listed, not_white_listed, _ = build_filtered_data(lst, items, False, False, 0, ',')
+
+    assert white_listed == ['foo', 'foo', '^bar', 'com$', 'com$', r'org\b', r'(?<=\.)foo']
+    assert not_white_listed == ['qux']
@@ -2,43 +2,88 @@ import demistomock as demisto  # noqa: F401
 from CommonServerPython import *  # noqa: F401
 
 
+MAX_VALUES_PER_QUERY = 100
+INDICATOR_FIELDS = 'value,indicator_type,score,aggregatedReliability,expirationStatus'
+
+
+def escape_special_characters(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def search_cached_indicators(values: List[str]) -> Dict[str, dict]:
+    """
+    Search the indicators of the given values, with a single query for each chunk of values.
+
+    :param values: The indicator values.
+    :return: The indicators found, by their value.
+    """
+    indicators: Dict[str, dict] = {}
+    for i in range(0, len(values), MAX_VALUES_PER_QUERY):
+        chunk = values[i:i + MAX_VALUES_PER_QUERY]
+        query = ' or '.join(f'value:"{escape_special_characters(value)}"' for value in chunk)
+        searcher = IndicatorsSearcher(query=query, size=len(chunk), filter_fields=INDICATOR_FIELDS)
+        for res in searcher:
+            for indicator in res.get('iocs') or []:
+                indicators.setdefault(indicator.get('value'), indicator)
+    return indicators
+
+
+def get_values(args: dict) -> List[str]:
+    """
+    Get the indicator values to check. A list is used as is, while a string is a single value (URLs may contain commas)
+    unless a delimiter is given to split it by.
+
+    :param args: The script arguments.
+    :return: The indicator values, without duplicates.
+    """
+    value = args.get("value")
+    delimiter = args.get("delimiter")
+    if isinstance(value, list):
+        values = value
+    elif delimiter:
+        values = argToList(value, separator=delimiter)
+    else:
+        values = [value] if value else []
+    return list(dict.fromkeys(values))
+
+
 def main():
-    value = demisto.args().get("value", None)
+    values = get_values(demisto.args())
 
-    res = demisto.executeCommand("getIndicator", {"value": value})
+    indicators = search_cached_indicators(values)
+    lowercase_indicators = {value.lower(): indicator for value, indicator in indicators.items() if value}
 
-    if len(res[0]["Contents"]) > 0:
-        data = res[0]["Contents"][0]
-        score = data["score"]
-        vendor = "XSOAR"
-        reliability = data.get("aggregatedReliability")
-        indicatorType = data["indicator_type"]
-        expirationStatus = False if data.get("expirationStatus") == "active" else True
+    dbotscores = []
+    misses = []
+    for value in values:
+        data = indicators.get(value) or lowercase_indicators.get(value.lower())
+        if not data:
+            misses.append(value)
+            continue
 
-        dbotscore = {
+        dbotscores.append({
             "Indicator": value,
-            "Type": indicatorType,
-            "Vendor": vendor,
-            "Score": score,
-            "Reliability": reliability,
-            "Expired": expirationStatus
-        }
-
-        md = tableToMarkdown("Indicator", dbotscore)
-
-        entry = {
-            "Type": entryTypes["note"],
-            "ReadableContentsFormat": formats['markdown'],
-            "ContentsFormat": formats["json"],
-            "Contents": dbotscore,
-            "EntryContext": {"DBotScoreCache": dbotscore},
-            "HumanReadable": md
-        }
-
-        return_results(entry)
+            "Type": data["indicator_type"],
+            "Vendor": "XSOAR",
+            "Score": data["score"],
+            "Reliability": data.get("aggregatedReliability"),
+            "Expired": False if data.get("expirationStatus") == "active" else True
+        })
 
-    else:
-        return_results(f"Could not find {value} in cache")
+    md = tableToMarkdown("Indicators", dbotscores) if dbotscores else ''
+    if misses:
+        md += f"Could not find {', '.join(misses)} in cache"
+
+    entry = {
+        "Type": entryTypes["note"],
+        "ReadableContentsFormat": formats['markdown'],
+        "ContentsFormat": formats["json"],
+        "Contents": dbotscores,
+        "EntryContext": {"DBotScoreCache": dbotscores, "DBotScoreCacheMisses": misses},
+        "HumanReadable": md
+    }
+
+    return_results(entry)
 
 
 if __name__ == "__builtin__" or __name__ == "builtins":
@@ -0,0 +1,118 @@
+import demistomock as demisto
+import GetIndicatorDBotScoreFromCache
+
+
+def prepare_mocks(mocker, values, indicators, delimiter=None):
+    mocker.patch.object(demisto, 'args', return_value={'value': values, 'delimiter': delimiter})
+    mocker.patch.object(demisto, 'demistoVersion', return_value={'version': '6.5.0', 'buildNumber': '12345'})
+
+    def search_indicators(query, **kwargs):
+        iocs = [indicator for indicator in indicators if f'value:"{indicator["value"].lower()}"' in query.lower()]
+        return {'iocs': iocs, 'total': len(iocs)}
+
+    mocker.patch.object(demisto, 'searchIndicators', side_effect=search_indicators)
+    return mocker.patch.object(GetIndicatorDBotScoreFromCache, 'return_results')
+
+
+def test_all_indicators_found(mocker):
+    """
+    Given
+    - indicator values which are all in the cache, one of them in a different case
+    When
+    - running the script
+    Then
+    - the scores of all the indicators are returned, with no misses
+    """
+    indicators = [
+        {'value': '1.1.1.1', 'indicator_type': 'IP', 'score': 1, 'expirationStatus': 'active'},
+        {'value': 'Example.com', 'indicator_type': 'Domain', 'score': 3, 'aggregatedReliability': 'A - Completely reliable',
+         'expirationStatus': 'expired'},
+    ]
+    return_results_mock = prepare_mocks(mocker, ['1.1.1.1', 'example.com'], indicators)
+
+    GetIndicatorDBotScoreFromCache.main()
+
+    entry = return_results_mock.call_args[0][0]
+    assert entry['EntryContext']['DBotScoreCache'] == [
+        {'Indicator': '1.1.1.1', 'Type': 'IP', 'Vendor': 'XSOAR', 'Score': 1, 'Reliability': None, 'Expired': False},
+        {'Indicator': 'example.com', 'Type': 'Domain', 'Vendor': 'XSOAR', 'Score': 3,
+         'Reliability': 'A - Completely reliable', 'Expired': True},
+    ]
+    assert entry['EntryContext']['DBotScoreCacheMisses'] == []
+
+
+def test_bulk_values_with_misses(mocker):
+    """
+    Given
+    - 250 indicator values, only the even ones are in the cache
+    When
+    - running the script
+    Then
+    - the values are searched in 3 chunks instead of one search per value
+    - the scores of the cached indicators are returned, and the rest are returned as misses
+    """
+    values = [f'https://example.com/{i}' for i in range(250)]
+    indicators = [{'value': value, 'indicator_type': 'URL', 'score': 2, 'expirationStatus': 'active'} for value in values[::2]]
+    return_results_mock = prepare_mocks(mocker, values, indicators)
+
+    GetIndicatorDBotScoreFromCache.main()
+
+    assert demisto.searchIndicators.call_count == 3
+    entry = return_results_mock.call_args[0][0]
+    assert [dbotscore['Indicator'] for dbotscore in entry['EntryContext']['DBotScoreCache']] == values[::2]
+    assert entry['EntryContext']['DBotScoreCacheMisses'] == values[1::2]
+
+
+def test_indicator_not_found(mocker):
+    """
+    Given
+    - an indicator value which is not in the cache
+    When
+    - running the script
+    Then
+    - the value is returned as a miss
+    """
+    return_results_mock = prepare_mocks(mocker, '8.8.8.8', [])
+
+    GetIndicatorDBotScoreFromCache.main()
+
+    entry = return_results_mock.call_args[0][0]
+    assert entry['HumanReadable'] == 'Could not find 8.8.8.8 in cache'
+    assert entry['EntryContext'] == {'DBotScoreCache': [], 'DBotScoreCacheMisses': ['8.8.8.8']}
+
+
+def test_string_value_with_comma(mocker):
+    """
+    Given
+    - a single URL value which contains a comma
+    When
+    - running the script
+    Then
+    - the URL is looked up as a single value, and not split on the comma
+    """
+    indicators = [{'value': 'https://x.com/a,b', 'indicator_type': 'URL', 'score': 3, 'expirationStatus': 'active'}]
+    return_results_mock = prepare_mocks(mocker, 'https://x.com/a,b', indicators)
+
+    GetIndicatorDBotScoreFromCache.main()
+
+    assert demisto.searchIndicators.call_args[1]['query'] == 'value:"https://x.com/a,b"'
+    entry = return_results_mock.call_args[0][0]
+    assert [dbotscore['Indicator'] for dbotscore in entry['EntryContext']['DBotScoreCache']] == ['https://x.com/a,b']
+    assert entry['EntryContext']['DBotScoreCacheMisses'] == []
+
+
+def test_string_value_with_delimiter(mocker):
+    """
+    Given
+    - a string of indicator values separated by the given delimiter, one of them a URL which contains a comma
+    When
+    - running the script
+    Then
+    - the string is split by the delimiter only
+    """
+    return_results_mock = prepare_mocks(mocker, 'https://x.com/a,b;8.8.8.8', [], delimiter=';')
+
+    GetIndicatorDBotScoreFromCache.main()
+
+    entry = return_results_mock.call_args[0][0]
+    assert entry['EntryContext']['DBotScoreCacheMisses'] == ['https://x.com/a,b', '8.8.8.8']
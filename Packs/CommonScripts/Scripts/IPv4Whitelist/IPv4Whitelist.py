@@ -1,21 +1,13 @@
 import demistomock as demisto
 from CommonServerPython import *
 
-from netaddr import IPAddress, IPNetwork
-
 
 def main():
     ip_addresses = argToList(demisto.args()['value'])
     cidr_range_list = argToList(demisto.args()['cidr_ranges'])
 
-    included_addresses = []
-
-    for ip_address in ip_addresses:
-        ip = IPAddress(ip_address)
-
-        for cidr_range in cidr_range_list:
-            if ip in IPNetwork(cidr_range):
-                included_addresses.append(ip_address)
+    cidr_ranges = get_cidr_index(cidr_range_list).lookup_many(ip_addresses)
+    included_addresses = [ip_address for ip_address, cidr_range in zip(ip_addresses, cidr_ranges) if cidr_range is not None]
 
     if not included_addresses:
         demisto.results(None)
@@ -23,5 +15,7 @@ def main():
         demisto.results(included_addresses)
 
 
+from CIDRApiModule import *  # noqa: E402
+
 if __name__ == "__builtin__" or __name__ == "builtins":
     main()
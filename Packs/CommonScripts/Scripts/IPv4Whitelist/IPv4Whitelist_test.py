@@ -28,3 +28,23 @@ def test_main(mocker):
     assert len(results) == 2
     assert results[0] == '10.0.0.5'
     assert results[1] == '5.6.7.8'
+
+
+def test_main_overlapping_ranges(mocker):
+    """
+    Given
+    - IP addresses, and CIDR ranges some of which include others
+    When
+    - running the script
+    Then
+    - each included IP address is returned once, in the order of the given IP addresses
+    """
+    from IPv4Whitelist import main
+
+    mocker.patch.object(demisto, 'args', return_value={
+        'value': '10.1.2.3,172.16.0.1,10.0.0.5,192.168.1.1',
+        'cidr_ranges': '10.1.0.0/16,10.0.0.0/8,192.168.1.0/24,192.168.0.0/16'
+    })
+    mocker.patch.object(demisto, 'results')
+    main()
+    assert demisto.results.call_args[0][0] == ['10.1.2.3', '10.0.0.5', '192.168.1.1']
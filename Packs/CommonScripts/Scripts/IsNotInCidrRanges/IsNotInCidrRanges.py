@@ -1,20 +1,15 @@
 import demistomock as demisto
 from CommonServerPython import *
 
-from netaddr import IPAddress, IPNetwork
-
 
 def main():
     ip_address = demisto.args()['left']
     cidr_range_list = argToList(demisto.args()['right'])
 
-    for cidr in cidr_range_list:
-        if IPAddress(ip_address) in IPNetwork(cidr):
-            demisto.results(False)
-            return
+    demisto.results(get_cidr_index(cidr_range_list).lookup(ip_address) is None)
 
-    demisto.results(True)
 
+from CIDRApiModule import *  # noqa: E402
 
 if __name__ == "__builtin__" or __name__ == "builtins":
     main()
@@ -51,6 +51,9 @@ FETCH_INDEX = param.get('fetch_index', '')
 FETCH_QUERY = param.get('fetch_query', '')
 FETCH_TIME = param.get('fetch_time', '3 days')
 FETCH_SIZE = int(param.get('fetch_size', 50))
+FETCH_MAX_PAGES = int(param.get('fetch_max_pages') or 1)
+FETCH_TIEBREAKER_FIELD = param.get('fetch_tiebreaker_field', '')
+PIT_KEEP_ALIVE = '1m'
 INSECURE = not param.get('insecure', False)
 TIME_METHOD = param.get('time_method', 'Simple-Date')
 TIMEOUT = int(param.get('timeout') or 60)
@@ -490,7 +493,7 @@ def results_to_incidents_timestamp(response, last_fetch):
     """Converts the current results into incidents.
 
     Args:
-        response(dict): the raw search results from Elasticsearch.
+        response(dict): the raw search results from Elasticsearch, containing only hits that were not fetched before.
         last_fetch(num): the date or timestamp of the last fetch before this fetch
         - this will hold the last date of the incident brought by this fetch.
 
@@ -498,7 +501,6 @@ def results_to_incidents_timestamp(response, last_fetch):
         (list).The incidents.
         (num).The date of the last incident brought by this fetch.
     """
-    current_fetch = last_fetch
     incidents = []
     for hit in response.get('hits', {}).get('hits'):
         if hit.get('_source') is not None and hit.get('_source').get(str(TIME_FIELD)) is not None:
@@ -509,18 +511,16 @@ def results_to_incidents_timestamp(response, last_fetch):
             if hit_timestamp > last_fetch:
                 last_fetch = hit_timestamp
 
-            # avoid duplication due to weak time query
-            if hit_timestamp > current_fetch:
-                inc = {
-                    'name': 'Elasticsearch: Index: ' + str(hit.get('_index')) + ", ID: " + str(hit.get('_id')),
-                    'rawJSON': json.dumps(hit),
-                    'occurred': hit_date.isoformat() + 'Z'
-                }
+            inc = {
+                'name': 'Elasticsearch: Index: ' + str(hit.get('_index')) + ", ID: " + str(hit.get('_id')),
+                'rawJSON': json.dumps(hit),
+                'occurred': hit_date.isoformat() + 'Z'
+            }
 
-                if MAP_LABELS:
-                    inc['labels'] = incident_label_maker(hit.get('_source'))
+            if MAP_LABELS:
+                inc['labels'] = incident_label_maker(hit.get('_source'))
 
-                incidents.append(inc)
+            incidents.append(inc)
 
     return incidents, last_fetch
 
@@ -529,7 +529,7 @@ def results_to_incidents_datetime(response, last_fetch):
     """Converts the current results into incidents.
 
     Args:
-        response(dict): the raw search results from Elasticsearch.
+        response(dict): the raw search results from Elasticsearch, containing only hits that were not fetched before.
         last_fetch(datetime): the date or timestamp of the last fetch before this fetch
         - this will hold the last date of the incident brought by this fetch.
 
@@ -538,7 +538,6 @@ def results_to_incidents_datetime(response, last_fetch):
         (datetime).The date of the last incident brought by this fetch.
     """
     last_fetch_timestamp = int(last_fetch.timestamp() * 1000)
-    current_fetch = last_fetch_timestamp
     incidents = []
 
     for hit in response.get('hits', {}).get('hits'):
@@ -550,21 +549,19 @@ def results_to_incidents_datetime(response, last_fetch):
                 last_fetch = hit_date
                 last_fetch_timestamp = hit_timestamp
 
-            # avoid duplication due to weak time query
-            if hit_timestamp > current_fetch:
-                inc = {
-                    'name': 'Elasticsearch: Index: ' + str(hit.get('_index')) + ", ID: " + str(hit.get('_id')),
-                    'rawJSON': json.dumps(hit),
-                    # parse function returns iso format sometimes as YYYY-MM-DDThh:mm:ss+00:00
-                    # and sometimes as YYYY-MM-DDThh:mm:ss
-                    # we want to return format: YYYY-MM-DDThh:mm:ssZ in our incidents
-                    'occurred': format_to_iso(hit_date.isoformat())
-                }
+            inc = {
+                'name': 'Elasticsearch: Index: ' + str(hit.get('_index')) + ", ID: " + str(hit.get('_id')),
+                'rawJSON': json.dumps(hit),
+                # parse function returns iso format sometimes as YYYY-MM-DDThh:mm:ss+00:00
+                # and sometimes as YYYY-MM-DDThh:mm:ss
+                # we want to return format: YYYY-MM-DDThh:mm:ssZ in our incidents
+                'occurred': format_to_iso(hit_date.isoformat())
+            }
 
-                if MAP_LABELS:
-                    inc['labels'] = incident_label_maker(hit.get('_source'))
+            if MAP_LABELS:
+                inc['labels'] = incident_label_maker(hit.get('_source'))
 
-                incidents.append(inc)
+            incidents.append(inc)
 
     return incidents, format_to_iso(last_fetch.isoformat())
 
@@ -590,6 +587,158 @@ def format_to_iso(date_string):
     return date_string
 
 
+def get_hit_timestamp(hit):
+    """Gets the time field of a hit in the representation used for range queries on the time field.
+
+    Args:
+        hit(dict): a single hit of the search.
+
+    Returns:
+        (num).The timestamp in the time field format, or epoch milliseconds for a Simple-Date, None if missing.
+    """
+    hit_time = (hit.get('_source') or {}).get(str(TIME_FIELD))
+    if hit_time is None:
+        return None
+    if 'Timestamp' in TIME_METHOD:
+        return int(hit_time)
+    # Elastic search can use epoch timestamps (in milliseconds) as date representation regardless of date format.
+    return int(parse(str(hit_time)).timestamp() * 1000)
+
+
+def open_point_in_time(es):
+    """Opens a point in time on the fetch index, so all the pages of a single fetch are read from the same snapshot.
+
+    Args:
+        es(Elasticsearch): an Elasticsearch object.
+
+    Returns:
+        (str).The point in time ID, None if the client or the server don't support point in time (before 7.10).
+    """
+    if not hasattr(es, 'open_point_in_time'):
+        return None
+    try:
+        return es.open_point_in_time(index=FETCH_INDEX, keep_alive=PIT_KEEP_ALIVE).get('id')
+    except Exception as e:
+        demisto.debug('Point in time is not available, paging without it: {}'.format(str(e)))
+        return None
+
+
+def close_point_in_time(es, pit_id):
+    """Closes a point in time opened by open_point_in_time. Failures are ignored as it expires on its own.
+
+    Args:
+        es(Elasticsearch): an Elasticsearch object.
+        pit_id(str): the point in time ID.
+    """
+    try:
+        es.close_point_in_time(body={'id': pit_id})
+    except Exception as e:
+        demisto.debug('Failed closing point in time: {}'.format(str(e)))
+
+
+def build_fetch_search(es, time_filter, excluded_ids, pit_id, search_after):
+    """Builds the search of a single page of the fetch, sorted by the time field and the tiebreaker field.
+
+    Args:
+        es(Elasticsearch): an Elasticsearch object.
+        time_filter(dict): the range filter on the time field.
+        excluded_ids(list): IDs of hits that were already fetched.
+        pit_id(str): the point in time ID, None to search the fetch index directly.
+        search_after(list): the sort values of the last hit of the previous page.
+
+    Returns:
+        (Search).The page search.
+    """
+    query = QueryString(query=FETCH_QUERY + " AND " + TIME_FIELD + ":*")
+    # a search on a point in time must not specify an index
+    search = Search(using=es) if pit_id else Search(using=es, index=FETCH_INDEX)
+    search = search.filter({'range': {TIME_FIELD: time_filter}})
+    if excluded_ids:
+        search = search.exclude('ids', values=excluded_ids)
+    sort = [{TIME_FIELD: {'order': 'asc'}}]
+    if FETCH_TIEBREAKER_FIELD:
+        sort.append({FETCH_TIEBREAKER_FIELD: {'order': 'asc'}})
+    search = search.sort(*sort)[0:FETCH_SIZE].query(query)
+    extra = {}
+    if pit_id:
+        extra['pit'] = {'id': pit_id, 'keep_alive': PIT_KEEP_ALIVE}
+    if search_after:
+        extra['search_after'] = search_after
+    return search.extra(**extra) if extra else search
+
+
+def fetch_new_hits(es, last_run, last_fetch_timestamp):
+    """Fetches the hits that were not fetched before, draining up to FETCH_MAX_PAGES pages of FETCH_SIZE hits.
+
+    Notes:
+        Pages are read with search_after, on a point in time where available if more than one page may be fetched.
+        The cursor of the last fetched hit is kept in the last run - the sort values if a tiebreaker field is
+        configured, otherwise its time and the IDs of the hits that share it - so bursts of hits with the same time
+        are neither dropped nor fetched twice.
+
+    Args:
+        es(Elasticsearch): an Elasticsearch object.
+        last_run(dict): the last run object.
+        last_fetch_timestamp(num): the time of the last fetch, for fetches without a cursor in the last run.
+
+    Returns:
+        (list).The new hits, sorted by the time field.
+        (dict).The cursor to save in the last run.
+    """
+    last_timestamp = last_run.get('last_timestamp')
+    search_after = last_run.get('search_after') if FETCH_TIEBREAKER_FIELD else None
+    boundary_ids = [] if FETCH_TIEBREAKER_FIELD else last_run.get('ids', [])
+    if last_timestamp is None:
+        time_filter = {'gt': last_fetch_timestamp}
+    else:
+        time_filter = {'gte': last_timestamp}
+    excluded_ids = list(boundary_ids)
+
+    hits = []  # type: List
+    # a unique tiebreaker field already makes the pages stable, otherwise the point in time provides one.
+    # a single page is always stable, so the point in time is opened only when more pages may be fetched.
+    pit_id = open_point_in_time(es) if FETCH_MAX_PAGES > 1 and not FETCH_TIEBREAKER_FIELD else None
+    page_search_after = search_after
+    try:
+        for _ in range(FETCH_MAX_PAGES):
+            search = build_fetch_search(es, time_filter, excluded_ids, pit_id, page_search_after)
+            response = search.execute().to_dict()
+            page_hits = response.get('hits', {}).get('hits', [])
+            pit_id = response.get('pit_id', pit_id)
+
+            for hit in page_hits:
+                hit_timestamp = get_hit_timestamp(hit)
+                if hit_timestamp is None:
+                    continue
+                if hit_timestamp != last_timestamp:
+                    last_timestamp = hit_timestamp
+                    boundary_ids = []
+                boundary_ids.append(hit.get('_id'))
+                search_after = hit.get('sort', [])[:2 if FETCH_TIEBREAKER_FIELD else 1]
+                hits.append(hit)
+
+            if len(page_hits) < FETCH_SIZE:
+                break
+            if pit_id or FETCH_TIEBREAKER_FIELD:
+                # the sort values of a point in time search include its implicit tiebreaker
+                page_search_after = page_hits[-1].get('sort')
+            else:
+                time_filter = {'gte': last_timestamp}
+                excluded_ids = list(boundary_ids)
+    finally:
+        if pit_id:
+            close_point_in_time(es, pit_id)
+
+    if last_timestamp is None:
+        return hits, {}
+    cursor = {'last_timestamp': last_timestamp}
+    if FETCH_TIEBREAKER_FIELD:
+        cursor['search_after'] = search_after
+    else:
+        cursor['ids'] = boundary_ids
+    return hits, cursor
+
+
 def fetch_incidents(proxies):
     last_run = demisto.getLastRun()
     last_fetch = last_run.get('time')
@@ -616,24 +765,19 @@ def fetch_incidents(proxies):
         last_fetch_timestamp = last_fetch
 
     es = elasticsearch_builder(proxies)
-
-    query = QueryString(query=FETCH_QUERY + " AND " + TIME_FIELD + ":*")
-    # Elastic search can use epoch timestamps (in milliseconds) as date representation regardless of date format.
-    search = Search(using=es, index=FETCH_INDEX).filter({'range': {TIME_FIELD: {'gt': last_fetch_timestamp}}})
-    search = search.sort({TIME_FIELD: {'order': 'asc'}})[0:FETCH_SIZE].query(query)
-    response = search.execute().to_dict()
-    _, total_results = get_total_results(response)
+    hits, cursor = fetch_new_hits(es, last_run, last_fetch_timestamp)
 
     incidents = []  # type: List
 
-    if total_results > 0:
+    if hits:
+        response = {'hits': {'hits': hits}}
         if 'Timestamp' in TIME_METHOD:
             incidents, last_fetch = results_to_incidents_timestamp(response, last_fetch)
-            demisto.setLastRun({'time': last_fetch})
+            demisto.setLastRun({'time': last_fetch, **cursor})
 
         else:
             incidents, last_fetch = results_to_incidents_datetime(response, last_fetch)
-            demisto.setLastRun({'time': str(last_fetch)})
+            demisto.setLastRun({'time': str(last_fetch), **cursor})
 
         demisto.info('extract {} incidents'.format(len(incidents)))
     demisto.incidents(incidents)
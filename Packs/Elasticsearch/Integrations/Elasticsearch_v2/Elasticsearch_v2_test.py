@@ -848,3 +848,135 @@ class TestIncidentLabelMaker(unittest.TestCase):
 
         labels = incident_label_maker(sources)
         self.assertEqual(labels, expected_labels)
+
+
+def mock_hit(hit_id, timestamp, sort=None):
+    return {'_index': 'customer', '_id': hit_id, '_source': {'Date': str(timestamp)}, 'sort': sort or [timestamp]}
+
+
+class PagesMock:
+    """Mocks the searches of the fetch pages, returning the given pages in order."""
+
+    def __init__(self, pages, pit_id=None):
+        self.pages = pages
+        self.pit_id = pit_id
+        self.calls = []
+
+    def build_fetch_search(self, es, time_filter, excluded_ids, pit_id, search_after):
+        self.calls.append((time_filter, excluded_ids, pit_id, search_after))
+        response = {'hits': {'hits': self.pages.pop(0)}}
+        if self.pit_id:
+            response['pit_id'] = self.pit_id
+        return mock.Mock(**{'execute.return_value.to_dict.return_value': response})
+
+
+@pytest.mark.parametrize('params', MOCK_PARAMS[:1])
+def test_fetch_new_hits_burst_with_same_time(params, mocker):
+    """
+    Given
+    - more hits with the same time than the fetch size
+    - no point in time and no tiebreaker field
+    When
+    - fetching new hits with up to 3 pages
+    Then
+    - all the hits are fetched, each page excludes the hits already fetched with the boundary time
+    - the cursor holds the last time and the IDs fetched with it
+    """
+    mocker.patch.object(demisto, 'params', return_value=params)
+    importlib.reload(Elasticsearch_v2)  # To reset the Elasticsearch client with the OpenSearch library
+    mocker.patch('Elasticsearch_v2.TIME_METHOD', 'Timestamp-Seconds')
+    mocker.patch('Elasticsearch_v2.FETCH_SIZE', 2)
+    mocker.patch('Elasticsearch_v2.FETCH_MAX_PAGES', 3)
+    mocker.patch('Elasticsearch_v2.open_point_in_time', return_value=None)
+    pages = PagesMock([[mock_hit('1', 10), mock_hit('2', 20)], [mock_hit('3', 20), mock_hit('4', 20)],
+                       [mock_hit('5', 20)]])
+    mocker.patch('Elasticsearch_v2.build_fetch_search', side_effect=pages.build_fetch_search)
+
+    hits, cursor = Elasticsearch_v2.fetch_new_hits(None, {'last_timestamp': 10, 'ids': ['0']}, 5)
+
+    assert [hit['_id'] for hit in hits] == ['1', '2', '3', '4', '5']
+    assert cursor == {'last_timestamp': 20, 'ids': ['2', '3', '4', '5']}
+    assert pages.calls == [({'gte': 10}, ['0'], None, None),
+                           ({'gte': 20}, ['2'], None, None),
+                           ({'gte': 20}, ['2', '3', '4'], None, None)]
+
+
+@pytest.mark.parametrize('params', MOCK_PARAMS[:1])
+def test_fetch_new_hits_single_page_without_point_in_time(params, mocker):
+    """
+    Given
+    - the default of a single page per fetch, and no tiebreaker field
+    When
+    - fetching new hits
+    Then
+    - no point in time is opened, since a single page is always stable
+    """
+    mocker.patch.object(demisto, 'params', return_value=params)
+    importlib.reload(Elasticsearch_v2)  # To reset the Elasticsearch client with the OpenSearch library
+    mocker.patch('Elasticsearch_v2.TIME_METHOD', 'Timestamp-Seconds')
+    mocker.patch('Elasticsearch_v2.FETCH_MAX_PAGES', 1)
+    pit_mock = mocker.patch('Elasticsearch_v2.open_point_in_time')
+    pages = PagesMock([[mock_hit('1', 10)]])
+    mocker.patch('Elasticsearch_v2.build_fetch_search', side_effect=pages.build_fetch_search)
+
+    hits, cursor = Elasticsearch_v2.fetch_new_hits(None, {}, 5)
+
+    assert [hit['_id'] for hit in hits] == ['1']
+    assert pages.calls == [({'gt': 5}, [], None, None)]
+    pit_mock.assert_not_called()
+
+
+@pytest.mark.parametrize('params', MOCK_PARAMS[:1])
+def test_fetch_new_hits_with_point_in_time(params, mocker):
+    """
+    Given
+    - a server that supports point in time
+    When
+    - fetching new hits with up to 2 pages when there are more hits
+    Then
+    - the second page is read with search_after on the point in time, which is closed at the end
+    - the fetch stops after 2 pages
+    """
+    mocker.patch.object(demisto, 'params', return_value=params)
+    importlib.reload(Elasticsearch_v2)  # To reset the Elasticsearch client with the OpenSearch library
+    mocker.patch('Elasticsearch_v2.TIME_METHOD', 'Timestamp-Seconds')
+    mocker.patch('Elasticsearch_v2.FETCH_SIZE', 2)
+    mocker.patch('Elasticsearch_v2.FETCH_MAX_PAGES', 2)
+    mocker.patch('Elasticsearch_v2.open_point_in_time', return_value='pit1')
+    close_mock = mocker.patch('Elasticsearch_v2.close_point_in_time')
+    pages = PagesMock([[mock_hit('1', 10, [10, 0]), mock_hit('2', 10, [10, 1])],
+                       [mock_hit('3', 10, [10, 2]), mock_hit('4', 11, [11, 3])]], pit_id='pit2')
+    mocker.patch('Elasticsearch_v2.build_fetch_search', side_effect=pages.build_fetch_search)
+
+    hits, cursor = Elasticsearch_v2.fetch_new_hits(None, {}, 5)
+
+    assert len(hits) == 4
+    assert cursor == {'last_timestamp': 11, 'ids': ['4']}
+    assert pages.calls == [({'gt': 5}, [], 'pit1', None), ({'gt': 5}, [], 'pit2', [10, 1])]
+    close_mock.assert_called_once_with(None, 'pit2')
+
+
+@pytest.mark.parametrize('params', MOCK_PARAMS[:1])
+def test_fetch_new_hits_with_tiebreaker(params, mocker):
+    """
+    Given
+    - a tiebreaker field and the search_after cursor of the previous fetch
+    When
+    - fetching new hits
+    Then
+    - the fetch continues after the cursor and saves the sort values of the last hit
+    """
+    mocker.patch.object(demisto, 'params', return_value=params)
+    importlib.reload(Elasticsearch_v2)  # To reset the Elasticsearch client with the OpenSearch library
+    mocker.patch('Elasticsearch_v2.TIME_METHOD', 'Timestamp-Seconds')
+    mocker.patch('Elasticsearch_v2.FETCH_TIEBREAKER_FIELD', 'event_id')
+    pit_mock = mocker.patch('Elasticsearch_v2.open_point_in_time')
+    pages = PagesMock([[mock_hit('1', 10, [10000, 'b'])]])
+    mocker.patch('Elasticsearch_v2.build_fetch_search', side_effect=pages.build_fetch_search)
+
+    hits, cursor = Elasticsearch_v2.fetch_new_hits(None, {'last_timestamp': 10, 'search_after': [10000, 'a']}, 5)
+
+    assert len(hits) == 1
+    assert cursor == {'last_timestamp': 10, 'search_after': [10000, 'b']}
+    assert pages.calls == [({'gte': 10}, [], None, [10000, 'a'])]
+    pit_mock.assert_not_called()
@@ -1,11 +1,12 @@
 import base64
 import copy
 import fnmatch
+import functools
 import hashlib
 import json
 import re
 from email.header import decode_header
-from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple, Union
 
 import demistomock as demisto  # noqa: F401
 from CommonServerPython import *  # noqa: F401
@@ -18,6 +19,25 @@ ITERATE_NODE: int = 0
 ITERATE_VALUE: int = 1
 ITERATE_KEY: int = 2
 
+# The conditional operators which are evaluated for each value by ExtFilter.match_value()
+MATCH_VALUE_OPERATORS: FrozenSet[str] = frozenset([
+    "===", "!==", "equals", "==", "doesn't equal", "!=", "greater or equal", ">=", "greater than", ">",
+    "less or equal", "<=", "less than", "<", "in", "not in", "in caseless", "not in caseless", "in range",
+    "starts with", "starts with caseless", "doesn't start with", "doesn't start with caseless", "ends with",
+    "ends with caseless", "doesn't end with", "doesn't end with caseless", "includes", "includes caseless",
+    "doesn't include", "doesn't include caseless", "matches", "matches caseless", "doesn't match",
+    "doesn't match caseless", "wildcard: matches", "wildcard: matches caseless", "wildcard: doesn't match",
+    "wildcard: doesn't match caseless", "regex: matches", "regex: matches caseless", "regex: doesn't match",
+    "regex: doesn't match caseless", "in list", "in caseless list", "not in list", "not in caseless list",
+    "matches any line of", "matches any caseless line of", "doesn't match any line of",
+    "doesn't match any caseless line of", "matches any string of", "matches any caseless string of",
+    "doesn't match any string of", "doesn't match any caseless string of", "wildcard: matches any string of",
+    "wildcard: matches any caseless string of", "wildcard: doesn't match any string of",
+    "wildcard: doesn't match any caseless string of", "regex: matches any string of",
+    "regex: matches any caseless string of", "regex: doesn't match any string of",
+    "regex: doesn't match any caseless string of"
+])
+
 
 class Value:
     def __init__(self, value: Any):
@@ -261,81 +281,115 @@ def hashdigest(value: str, algorithm: str) -> str:
     return h.hexdigest()
 
 
-def match_pattern(
+@functools.lru_cache(maxsize=1024)
+def compile_pattern(
         pattern: str,
-        value: Any,
         caseless: bool,
-        patalg: int) -> bool:
-    """ Pattern matching
+        patalg: int) -> Callable[[str], bool]:
+    """ Compile a pattern into a function to match a string with it
 
     :param pattern: The pattern string.
-    :param value: The value to compare with the pattern.
     :param caseless: True if the pattern matching take places in case insensitive, otherwise False.
     :param patalg: The pattern matching algorithm. Spefify any of PATALG_BINARY, PATALG_WILDCARD and PATALG_REGEX.
-    :return: Return True if the value matches the pattern, otherwise False.
+    :return: The function which returns True if a string matches the pattern, otherwise False.
     """
     if patalg == PATALG_BINARY:
         if caseless:
             pattern = pattern.lower()
-            if isinstance(value, list):
-                return next(
-                    filter(
-                        lambda v: isinstance(v, str) and v.lower() == pattern,
-                        value),
-                    None) is not None
-            elif isinstance(value, str):
-                return pattern == value.lower()
+            return lambda v: pattern == v.lower()
         else:
-            if isinstance(value, list):
-                return pattern in value
-            elif isinstance(value, str):
-                return pattern == value
-        return False
+            return lambda v: pattern == v
 
     elif patalg == PATALG_WILDCARD:
         if caseless:
-            pattern = pattern.lower()
-            if isinstance(value, list):
-                return next(
-                    filter(
-                        lambda v:
-                        isinstance(v, str) and fnmatch.fnmatchcase(v.lower(), pattern),
-                        value),
-                    None) is not None
-            elif isinstance(value, str):
-                return fnmatch.fnmatchcase(value.lower(), pattern)
+            wmatch = re.compile(fnmatch.translate(pattern.lower())).match
+            return lambda v: wmatch(v.lower()) is not None
         else:
-            if isinstance(value, list):
-                return next(
-                    filter(
-                        lambda v:
-                        isinstance(v, str)
-                        and fnmatch.fnmatchcase(v, pattern),
-                        value),
-                    None) is not None
-            elif isinstance(value, str):
-                return fnmatch.fnmatchcase(value, pattern)
-        return False
+            wmatch = re.compile(fnmatch.translate(pattern)).match
+            return lambda v: wmatch(v) is not None
 
     elif patalg == PATALG_REGEX:
-        flags = re.IGNORECASE if caseless else 0
+        fullmatch = re.compile(pattern, re.IGNORECASE if caseless else 0).fullmatch
+        return lambda v: fullmatch(v) is not None
 
-        if isinstance(value, list):
-            return next(
-                filter(
-                    lambda v:
-                        isinstance(v, str)
-                        and re.fullmatch(pattern, v, flags),
-                    value),
-                None) is not None
-        elif isinstance(value, str):
-            return re.fullmatch(pattern, value, flags) is not None
-        return False
-    else:
+    exit_error(f"Unknown pattern algorithm: '{patalg}'")
+    return lambda v: False
+
+
+def match_pattern(
+        pattern: str,
+        value: Any,
+        caseless: bool,
+        patalg: int) -> bool:
+    """ Pattern matching
+
+    :param pattern: The pattern string.
+    :param value: The value to compare with the pattern.
+    :param caseless: True if the pattern matching take places in case insensitive, otherwise False.
+    :param patalg: The pattern matching algorithm. Spefify any of PATALG_BINARY, PATALG_WILDCARD and PATALG_REGEX.
+    :return: Return True if the value matches the pattern, otherwise False.
+    """
+    if patalg not in (PATALG_BINARY, PATALG_WILDCARD, PATALG_REGEX):
         exit_error(f"Unknown pattern algorithm: '{patalg}'")
+
+    if isinstance(value, list):
+        if patalg == PATALG_BINARY and not caseless:
+            return pattern in value
+        return any(isinstance(v, str) and compile_pattern(pattern, caseless, patalg)(v) for v in value)
+    elif isinstance(value, str):
+        return compile_pattern(pattern, caseless, patalg)(value)
     return False
 
 
+@functools.lru_cache(maxsize=4096)
+def compile_template(source: str) -> Tuple[Tuple[bool, str], ...]:
+    """ Split a string into the literal texts and the dt expressions (strings within ${})
+
+    :param source: The string that may include dt expressions.
+    :return: The list of (True if the text is a dt expression, otherwise False, the text).
+    """
+    def _skip(source: str, si: int, endc: str) -> int:
+        ci = si
+        while ci < len(source):
+            if source[ci] == endc:
+                return ci + len(endc)
+            nextec = {'(': ')', '{': '}',
+                      '[': ']', '"': '"', "'": "'"}.get(source[ci])
+            if nextec:
+                ci = _skip(source, ci + 1, nextec)
+            elif source[ci] == '\\':
+                ci += 2
+            else:
+                ci += 1
+        return ci
+
+    parts: List[Tuple[bool, str]] = []
+    endc: Optional[str] = None
+    si = ci = 0
+    while ci < len(source):
+        if endc is not None and source[ci] == endc:
+            parts.append((True, source[si:ci]))
+            si = ci = ci + len(endc)
+            endc = None
+        else:
+            nextec = {'(': ')', '{': '}',
+                      '[': ']', '"': '"', "'": "'"}.get(source[ci])
+            if nextec:
+                ci = _skip(source, ci + 1, nextec)
+            elif source[ci:ci + 2] == '${':
+                if si != ci:
+                    parts.append((False, source[si:ci]))
+                si = ci = ci + 2
+                endc = '}'
+            elif source[ci] == '\\':
+                ci += 2
+            else:
+                ci += 1
+    if si < len(source):
+        parts.append((False, source[si:]))
+    return tuple(parts)
+
+
 def extract_value(source: Any,
                   extractor: Callable[[str,
                                        Optional[ContextData],
@@ -351,51 +405,6 @@ def extract_value(source: Any,
     :param node: The current node.
     :return: The value extracted.
     """
-    def _extract(source: str,
-                 extractor: Optional[Callable[[str,
-                                               Optional[ContextData],
-                                               Optional[Dict[str, Any]]],
-                                              Any]],
-                 dx: Optional[ContextData],
-                 node: Optional[Dict[str, Any]],
-                 si: int,
-                 endc: Optional[str]) -> Tuple[Any, int]:
-        val = None
-        ci = si
-        while ci < len(source):
-            if endc is not None and source[ci] == endc:
-                if not extractor:
-                    return '', ci + len(endc)
-                xval = extractor(source[si:ci], dx, node)
-                if val is None:
-                    val = xval
-                elif xval is not None:
-                    val = str(val) + str(xval)
-                si = ci = ci + len(endc)
-                endc = None
-            else:
-                nextec = {'(': ')', '{': '}',
-                          '[': ']', '"': '"', "'": "'"}.get(source[ci])
-                if nextec:
-                    _, ci = _extract(source, None, dx, node, ci + 1, nextec)
-                elif extractor and source[ci:ci + 2] == '${':
-                    if si != ci:
-                        val = source[si:ci] if val is None else str(val) + source[si:ci]
-                    si = ci = ci + 2
-                    endc = '}'
-                elif source[ci] == '\\':
-                    ci += 2
-                else:
-                    ci += 1
-        if not extractor:
-            return ('', ci)
-        elif si >= len(source):
-            return (val, 0)
-        elif val is None:
-            return (source[si:], 0)
-        else:
-            return (str(val) + source[si:], 0)
-
     if isinstance(source, dict):
         return {
             extract_value(k, extractor, dx, node): extract_value(v, extractor, dx, node)
@@ -403,7 +412,17 @@ def extract_value(source: Any,
     elif isinstance(source, list):
         return [extract_value(v, extractor, dx, node) for v in source]
     elif isinstance(source, str):
-        return _extract(source, extractor, dx, node, 0, None)[0] if source else ''
+        if '${' not in source:
+            return source
+
+        val = None
+        for is_dt, text in compile_template(source):
+            xval = extractor(text, dx, node) if is_dt else text
+            if val is None:
+                val = xval
+            elif xval is not None:
+                val = str(val) + str(xval)
+        return val
     else:
         return source
 
@@ -462,6 +481,7 @@ def get_parent_child(root: dict,
 class ExtFilter:
     def __init__(self, dx: ContextData):
         self.__dx = dx
+        self.__conds_json_cache: Dict[str, Any] = {}
 
     def __conds_iter(self, conds: list, node: Any) -> CondIterator:
         return CondIterator(conds, self.__dx, node)
@@ -1054,7 +1074,14 @@ class ExtFilter:
         :param inlist: True if `root` is an element in a list, False otherwise.
         :return: Return the filtered value in Value object if the conditions matches it, otherwise None.
         """
-        if optype == "abort":
+        if not path and optype in MATCH_VALUE_OPERATORS:
+            if not inlist and isinstance(root, list):
+                return self.filter_values(root, optype, conds)
+
+            rhs = self.extract_value(conds, root)
+            return Value(root) if self.match_value(root, optype, rhs) else None
+
+        elif optype == "abort":
             exit_error(
                 f"ABORT: value = {root}, conds = {conds}, path = {path}")
 
@@ -1719,6 +1746,9 @@ class ExtFilter:
             jstr: str) -> Any:
         """ parse a json string
 
+        The conditions are applied to every element of a list, so each json string is parsed once and cached.
+        The value returned is shared between the calls, and must not be modified.
+
         :param self: This instance.
         :param jstr: A json string.
         :return: The value extracted.
@@ -1726,9 +1756,15 @@ class ExtFilter:
         if not isinstance(jstr, str):
             return jstr
         try:
-            return json.loads(jstr)
+            return self.__conds_json_cache[jstr]
+        except KeyError:
+            pass
+        try:
+            value = json.loads(jstr)
         except json.JSONDecodeError:
-            return jstr
+            value = jstr
+        self.__conds_json_cache[jstr] = value
+        return value
 
     def parse_and_extract_conds_json(
             self,
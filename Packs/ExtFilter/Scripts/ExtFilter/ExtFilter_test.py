@@ -1,6 +1,8 @@
 import demistomock as demisto
 import json
 
+import pytest
+
 
 def side_effect_demisto_dt(ctx, dt):
     def _get_value(ctx, dt):
@@ -54,3 +56,58 @@ def test_main(mocker):
                 print(json.dumps(results, indent=2))
             '''
             assert json.dumps(results) == json.dumps(eval['result'])
+
+
+@pytest.mark.parametrize('source, expected', [
+    ('text', 'text'),
+    ('${a}', 1),
+    ('x${a}y', 'x1y'),
+    ('${b}', [2]),
+    ('${n}', None),
+    ('${n}x', 'x'),
+    ('${a}${b}', '1[2]'),
+    ('"${a}"', '"${a}"'),
+    ('\\${a}', '\\${a}'),
+    ('${a.["}"]}', '<a.["}"]>'),
+    ('abc${', 'abc'),
+    ({'${a}': ['${b}', 'x']}, {1: [[2], 'x']})
+])
+def test_extract_value(source, expected):
+    """
+    Given
+    - values which may include dt expressions
+    When
+    - extracting the values twice, the second time with the compiled dt expressions
+    Then
+    - the dt expressions are replaced by the values extracted by the extractor
+    """
+    from ExtFilter import extract_value
+
+    def extractor(dtstr, dx, node):
+        return None if dtstr == 'n' else {'a': 1, 'b': [2]}.get(dtstr, f'<{dtstr}>')
+
+    assert extract_value(source, extractor, None) == expected
+    assert extract_value(source, extractor, None) == expected
+
+
+def test_filter_large_list(mocker):
+    """
+    Given
+    - a large list of values, and a json list of regex patterns
+    When
+    - filtering the values with 'regex: matches any caseless string of'
+    Then
+    - the values matching any of the patterns are returned
+    - the json conditions are parsed once
+    """
+    from ExtFilter import ExtFilter, ContextData
+
+    values = [f'host{i}.example{i % 10}.com' for i in range(5000)]
+    patterns = json.dumps([r'HOST\d+\.EXAMPLE1\.COM', r'HOST\d+\.EXAMPLE2\.COM'])
+    loads_spy = mocker.spy(json, 'loads')
+    xfilter = ExtFilter(ContextData(demisto=None, inputs=None, lists=None, incident=None, local=values))
+
+    res = xfilter.filter_value(values, 'regex: matches any caseless string of', patterns)
+
+    assert res.value == [v for v in values if v.endswith(('example1.com', 'example2.com'))]
+    assert loads_spy.call_count == 1
@@ -2,11 +2,12 @@ import demistomock as demisto
 from CommonServerPython import *
 from CommonServerUserPython import *
 
-from typing import Any, Tuple, Dict, List, Callable, Optional
+from typing import Any, Tuple, Dict, List, Callable, Optional, Iterator
 import sqlalchemy
 import pymysql
 import traceback
 import hashlib
+import csv
 import logging
 from sqlalchemy.sql import text
 from sqlalchemy.engine.url import URL
@@ -24,6 +25,13 @@ pymysql.install_as_MySQLdb()
 
 GLOBAL_CACHE_ATTR = '_generic_sql_engine_cache'
 DEFAULT_POOL_TTL = 600
+DEFAULT_FETCH_LIMIT = 50
+FETCH_CHUNK_SIZE = 1000
+KEYSET_BIND_VARIABLE = 'keyset_value'
+MSSQL_DIALECTS = {'Microsoft SQL Server', 'Microsoft SQL Server - MS ODBC Driver'}
+LIMIT_QUERY_DIALECTS = {'MySQL', 'PostgreSQL', 'Oracle'} | MSSQL_DIALECTS
+# clauses which can't be wrapped by or followed by a limit clause
+LIMIT_QUERY_EXCLUDED_CLAUSES = re.compile(r'\b(limit|offset|fetch\s+(first|next)|for\s+update|into)\b', re.IGNORECASE)
 
 
 class Client:
@@ -131,23 +139,148 @@ class Client:
                                               poolclass=sqlalchemy.pool.NullPool)
         return engine.connect()
 
-    def sql_query_execute_request(self, sql_query: str, bind_vars: Any) -> Tuple[Dict, List]:
+    def sql_query_execute_request(self, sql_query: str, bind_vars: Any, fetch_limit: Optional[int] = None,
+                                  skip: int = 0) -> Tuple[List, List]:
         """Execute query in DB via engine
         :param bind_vars: in case there are names and values - a bind_var dict, in case there are only values - list
         :param sql_query: the SQL query
+        :param fetch_limit: the maximum number of rows to read from the cursor, None means all rows
+        :param skip: the number of rows to discard from the cursor before reading
         :return: results of query, table headers
         """
-        if type(bind_vars) is dict:
-            sql_query = text(sql_query)
-
-        result = self.connection.execute(sql_query, bind_vars)
-        results = result.fetchall()
+        result = self.execute_streaming(sql_query, bind_vars)
+        try:
+            skip_rows(result, skip)
+            if fetch_limit is None:
+                results = result.fetchall()
+            else:
+                results = result.fetchmany(fetch_limit) if fetch_limit > 0 else []
+        finally:
+            result.close()
         headers = []
         if results:
             # if the table isn't empty
             headers = list(results[0].keys() if results[0].keys() else '')
         return results, headers
 
+    def execute_streaming(self, sql_query: str, bind_vars: Any) -> sqlalchemy.engine.ResultProxy:
+        """Execute query in DB and return the open result, using a server side cursor where the dialect supports it,
+        so the rows are read from the DB in chunks as they are fetched. Note that some drivers read the rest of the result
+        when it is closed, and dialects without server side cursors read the whole result, so limit the query itself to
+        the needed rows where possible. The caller is responsible for closing the result.
+        :param bind_vars: in case there are names and values - a bind_var dict, in case there are only values - list
+        :param sql_query: the SQL query
+        :return: the open result of the query
+        """
+        if type(bind_vars) is dict:
+            sql_query = text(sql_query)
+        return self.connection.execution_options(stream_results=True).execute(sql_query, bind_vars)
+
+
+def skip_rows(result: Any, skip: int, chunk_size: int = FETCH_CHUNK_SIZE):
+    """
+    Discards the first rows of an open result in bounded chunks, so skipping doesn't hold all the skipped rows in memory
+    :param result: the open result of a query
+    :param skip: number of rows to discard
+    :param chunk_size: maximum number of rows to fetch at once
+    """
+    while skip > 0:
+        rows = result.fetchmany(min(skip, chunk_size))
+        if not rows:
+            break
+        skip -= len(rows)
+
+
+def iterate_chunks(result: Any, limit: int = 0, chunk_size: int = FETCH_CHUNK_SIZE) -> Iterator[List]:
+    """
+    Yields the rows of an open result in chunks of at most chunk_size rows
+    :param result: the open result of a query
+    :param limit: the maximum number of rows to yield, 0 means all rows
+    :param chunk_size: maximum number of rows to fetch at once
+    :return: an iterator of row lists
+    """
+    remaining = limit
+    while not limit or remaining > 0:
+        rows = result.fetchmany(min(remaining, chunk_size) if limit else chunk_size)
+        if not rows:
+            break
+        remaining -= len(rows)
+        yield rows
+
+
+def generate_limit_query(sql_query: str, dialect: str, limit: int) -> str:
+    """
+    Wraps a select query so the DB itself returns at most limit rows, using the syntax of the given dialect
+    :param sql_query: a select query, may contain an ORDER BY clause except for Microsoft SQL Server
+    :param dialect: sql db type
+    :param limit: maximum number of rows to return
+    :return: the limited query
+    """
+    if dialect in MSSQL_DIALECTS:
+        return f'SELECT TOP {limit} * FROM ({sql_query}) AS limited_query'
+    if dialect == 'Oracle':
+        return f'SELECT * FROM ({sql_query}) WHERE ROWNUM <= {limit}'
+    return f'{sql_query} LIMIT {limit}'
+
+
+def generate_page_query(sql_query: str, dialect: str, limit: int) -> Optional[str]:
+    """
+    Limits a single select query in the DB to the given number of rows, if the query and the dialect allow it
+    :param sql_query: the query to limit
+    :param dialect: sql db type
+    :param limit: maximum number of rows to return
+    :return: the limited query, or None if the query can't be limited and the rows should be limited on the cursor
+    """
+    sql_query = sql_query.strip().rstrip(';').rstrip()
+    if dialect not in LIMIT_QUERY_DIALECTS or not re.match(r'select\b', sql_query, re.IGNORECASE) or ';' in sql_query:
+        return None
+    if LIMIT_QUERY_EXCLUDED_CLAUSES.search(sql_query):
+        return None
+    if dialect in MSSQL_DIALECTS and re.search(r'\border\s+by\b', sql_query, re.IGNORECASE):
+        # an ORDER BY clause isn't allowed in the wrapped query
+        return None
+    return generate_limit_query(sql_query, dialect, limit)
+
+
+def generate_keyset_query(sql_query: str, dialect: str, keyset_column: str, keyset_value: Any = None,
+                          limit: int = 0, inclusive: bool = False) -> str:
+    """
+    Wraps a select query for keyset pagination - only rows with a keyset column value greater than the keyset value
+    are returned, ordered by the keyset column, so each page is an index range scan instead of an OFFSET scan.
+    The keyset value is expected as the named bind variable 'keyset_value'.
+    :param sql_query: the select query to paginate, without an ORDER BY clause
+    :param dialect: sql db type
+    :param keyset_column: a unique and monotonic column of the query, e.g. an id or a timestamp, can be qualified
+                          with a table name of the query
+    :param keyset_value: the last keyset column value of the previous page, None for the first page
+    :param limit: the page size, 0 means no limit
+    :param inclusive: whether to also return rows with a keyset column value equal to the keyset value,
+                      used when the keyset column isn't unique (e.g. a timestamp)
+    :return: the keyset query
+    """
+    top = f'TOP {limit} ' if limit and dialect in MSSQL_DIALECTS else ''
+    alias = 'keyset_query' if dialect == 'Oracle' else 'AS keyset_query'
+    # the tables of the query aren't visible outside of it, so the column is referenced by the alias of the query
+    column = f'keyset_query.{keyset_column.split(".")[-1]}'
+    keyset_query = f'SELECT {top}* FROM ({sql_query}) {alias}'
+    if keyset_value is not None:
+        operator = '>=' if inclusive else '>'
+        keyset_query += f' WHERE {column} {operator} :{KEYSET_BIND_VARIABLE}'
+    keyset_query += f' ORDER BY {column}'
+    if limit and not top:
+        keyset_query = generate_limit_query(keyset_query, dialect, limit)
+    return keyset_query
+
+
+def get_keyset_value(row: Any, keyset_column: str) -> Any:
+    """
+    Returns the keyset column value of a result row, used as the keyset value of the next page
+    :param row: a result row
+    :param keyset_column: the keyset column name, can be qualified with a table name
+    :return: the value of the keyset column in the row
+    """
+    return row[keyset_column.split('.')[-1]]
+
 
 def generate_default_port_by_dialect(dialect: str) -> Optional[str]:
     """
@@ -190,6 +323,34 @@ def test_module(client: Client, *_) -> Tuple[str, Dict[Any, Any], List[Any]]:
     return 'ok', {}, []
 
 
+def generate_query_and_bind_vars(client: Client, args: dict, fetch_limit: int = 0) -> Tuple[str, Any]:
+    """
+    Builds the query to execute and its bind variables from the command arguments,
+    wrapping the query for keyset pagination if a keyset column was given, and limiting it to the needed rows otherwise
+    :param client: the client object with the db connection
+    :param args: demisto.args() including the sql query
+    :param fetch_limit: the number of rows the query needs to return, 0 means no limit
+    :return: the query to execute and the bind variables
+    """
+    sql_query = str(args.get('query'))
+    bind_variables_names = args.get('bind_variables_names', "")
+    bind_variables_values = args.get('bind_variables_values', "")
+    bind_variables = generate_bind_vars(bind_variables_names, bind_variables_values)
+    keyset_column = args.get('keyset_column')
+    if keyset_column:
+        if not bind_variables:
+            bind_variables = {}
+        if type(bind_variables) is not dict:
+            raise ValueError('Keyset pagination requires the bind variables to be given with names')
+        keyset_value = args.get('keyset_value')
+        if keyset_value is not None:
+            bind_variables[KEYSET_BIND_VARIABLE] = keyset_value
+        sql_query = generate_keyset_query(sql_query, client.dialect, keyset_column, keyset_value, fetch_limit)
+    elif fetch_limit > 0:
+        sql_query = generate_page_query(sql_query, client.dialect, fetch_limit) or sql_query
+    return sql_query, bind_variables
+
+
 def sql_query_execute(client: Client, args: dict, *_) -> Tuple[str, Dict[str, Any], List[Dict[str, Any]]]:
     """
     Executes the sql query with the connection that was configured in the client
@@ -198,27 +359,27 @@ def sql_query_execute(client: Client, args: dict, *_) -> Tuple[str, Dict[str, An
     :return: Demisto outputs
     """
     try:
-        sql_query = str(args.get('query'))
         limit = int(args.get('limit', 50))
         skip = int(args.get('skip', 0))
-        bind_variables_names = args.get('bind_variables_names', "")
-        bind_variables_values = args.get('bind_variables_values', "")
-        bind_variables = generate_bind_vars(bind_variables_names, bind_variables_values)
+        sql_query, bind_variables = generate_query_and_bind_vars(client, args, skip + limit if limit > 0 else 0)
 
-        result, headers = client.sql_query_execute_request(sql_query, bind_variables)
+        # the query is limited to skip + limit rows in the DB where possible, and the skipped rows are discarded from
+        # the cursor. queries which can't be limited are limited on the cursor only.
+        result, headers = client.sql_query_execute_request(sql_query, bind_variables, limit, skip)
         # converting an sqlalchemy object to a table
         converted_table = [dict(row) for row in result]
         # converting b'' and datetime objects to readable ones
         table = [{str(key): str(value) for key, value in dictionary.items()} for dictionary in converted_table]
-        table = table[skip:skip + limit]
         human_readable = tableToMarkdown(name="Query result:", t=table, headers=headers,
                                          removeNull=True)
         context = {
             "Result": table,
             "Headers": headers,
-            "Query": sql_query,
+            "Query": str(args.get('query')),
             "InstanceName": f"{client.dialect}_{client.dbname}",
         }
+        if args.get('keyset_column') and table:
+            context['NextKeysetValue'] = str(get_keyset_value(result[-1], args['keyset_column']))
         entry_context: Dict = {'GenericSQL(val.Query && val.Query === obj.Query)': {'GenericSQL': context}}
         return human_readable, entry_context, table
 
@@ -231,6 +392,119 @@ def sql_query_execute(client: Client, args: dict, *_) -> Tuple[str, Dict[str, An
         raise err
 
 
+def sql_query_execute_to_file(client: Client, args: dict) -> Dict[str, Any]:
+    """
+    Executes the sql query and writes the result rows to a CSV file entry in chunks,
+    so large results are never held in memory as a whole
+    :param client: the client object with the db connection
+    :param args: demisto.args() including the sql query
+    :return: a file entry
+    """
+    limit = int(args.get('limit', 50))
+    skip = int(args.get('skip', 0))
+    chunk_size = int(args.get('chunk_size') or FETCH_CHUNK_SIZE)
+    sql_query, bind_variables = generate_query_and_bind_vars(client, args, skip + limit if limit > 0 else 0)
+    file_name = args.get('file_name') or 'query_result.csv'
+    file_id = demisto.uniqueFile()
+    rows_count = 0
+    result = client.execute_streaming(sql_query, bind_variables)
+    try:
+        skip_rows(result, skip, chunk_size)
+        with open(demisto.investigation()['id'] + '_' + file_id, 'w', newline='', encoding='utf-8') as result_file:
+            writer = csv.writer(result_file)
+            writer.writerow(result.keys())
+            # a limit of 0 or less writes all the rows of the result
+            for rows in iterate_chunks(result, max(limit, 0), chunk_size):
+                writer.writerows([str(value) for value in row] for row in rows)
+                rows_count += len(rows)
+    finally:
+        result.close()
+    demisto.debug(f'Wrote {rows_count} rows to file {file_name}')
+    return {'Contents': '', 'ContentsFormat': formats['text'], 'Type': entryTypes['file'], 'File': file_name,
+            'FileID': file_id}
+
+
+def row_to_incident(row: Any, incident_name_column: Optional[str]) -> Dict[str, Any]:
+    """
+    Converts a result row to an incident
+    :param row: a result row
+    :param incident_name_column: the column to use as the incident name
+    :return: the incident
+    """
+    # converting b'' and datetime objects to readable ones
+    raw = {str(key): str(value) for key, value in dict(row).items()}
+    name = raw.get(incident_name_column.split('.')[-1]) if incident_name_column else None
+    return {
+        'name': name or f'Generic SQL incident {raw}',
+        'rawJSON': json.dumps(raw),
+    }
+
+
+def get_row_id(row: Any, id_column: Optional[str]) -> str:
+    """
+    Returns an identifier of a result row, used to dedup rows at the watermark boundary
+    :param row: a result row
+    :param id_column: a unique column of the query, if not given a hash of the entire row is used
+    :return: the row identifier
+    """
+    if id_column:
+        return str(row[id_column.split('.')[-1]])
+    return hashlib.sha256(repr(tuple(str(value) for value in row)).encode('utf-8')).hexdigest()
+
+
+def fetch_incidents(client: Client, params: dict, last_run: dict) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Fetches new rows of the fetch query as incidents, using the fetch column as a keyset watermark.
+    Rows are read from the cursor in bounded batches, and rows with the watermark value that were already fetched
+    are skipped, so a non unique fetch column (e.g. a timestamp) doesn't lose or duplicate rows at the boundary.
+    :param client: the client object with the db connection
+    :param params: demisto.params() with the fetch configuration
+    :param last_run: the last run object with the watermark of the previous fetch
+    :return: the incidents and the next last run object
+    """
+    fetch_query = params.get('fetch_query')
+    fetch_column = params.get('fetch_column')
+    if not fetch_query or not fetch_column:
+        raise ValueError('Fetch query and fetch column must be provided when fetching incidents')
+    max_fetch = int(params.get('max_fetch') or DEFAULT_FETCH_LIMIT)
+    id_column = params.get('id_column')
+    incident_name_column = params.get('incident_name')
+
+    last_value = last_run.get('last_value', params.get('first_fetch') or None)
+    boundary_ids = set(last_run.get('boundary_ids', []))
+    bind_variables: Dict[str, Any] = {}
+    if last_value is not None:
+        bind_variables[KEYSET_BIND_VARIABLE] = last_value
+    # rows with the watermark value are fetched again, so we read enough rows to skip the ones already fetched
+    sql_query = generate_keyset_query(fetch_query, client.dialect, fetch_column, last_value,
+                                      max_fetch + len(boundary_ids), inclusive=True)
+
+    incidents: List[Dict[str, Any]] = []
+    result = client.execute_streaming(sql_query, bind_variables)
+    try:
+        for rows in iterate_chunks(result, max_fetch + len(boundary_ids), min(max_fetch, FETCH_CHUNK_SIZE)):
+            for row in rows:
+                row_value = str(get_keyset_value(row, fetch_column))
+                row_id = get_row_id(row, id_column)
+                if row_value == last_value and row_id in boundary_ids:
+                    continue
+                if row_value != last_value:
+                    last_value = row_value
+                    boundary_ids = set()
+                boundary_ids.add(row_id)
+                incidents.append(row_to_incident(row, incident_name_column))
+                if len(incidents) >= max_fetch:
+                    break
+            if len(incidents) >= max_fetch:
+                break
+    finally:
+        result.close()
+
+    demisto.debug(f'Fetched {len(incidents)} incidents, watermark is {last_value}')
+    next_run = {'last_value': last_value, 'boundary_ids': sorted(boundary_ids)} if last_value is not None else last_run
+    return incidents, next_run
+
+
 # list of loggers we should set to debug when running in debug_mode
 # taken from: https://docs.sqlalchemy.org/en/13/core/engines.html#configuring-logging
 SQL_LOGGERS = [
@@ -279,8 +553,19 @@ def main():
             'pgsql-query': sql_query_execute,
             'sql-command': sql_query_execute
         }
-        if command in commands:
-            return_outputs(*commands[command](client, demisto.args(), command))
+        if command == 'fetch-incidents':
+            incidents, next_run = fetch_incidents(client, params, demisto.getLastRun())
+            demisto.setLastRun(next_run)
+            demisto.incidents(incidents)
+        elif command in commands:
+            if command == 'test-module' and params.get('isFetch'):
+                # validates the fetch configuration, the last run isn't updated
+                fetch_incidents(client, params, {})
+            args = demisto.args()
+            if command != 'test-module' and argToBoolean(args.get('result_as_file', False)):
+                demisto.results(sql_query_execute_to_file(client, args))
+            else:
+                return_outputs(*commands[command](client, args, command))
         else:
             raise NotImplementedError(f'{command} is not an existing Generic SQL command')
     except Exception as err:
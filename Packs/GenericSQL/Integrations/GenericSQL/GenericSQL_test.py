@@ -3,15 +3,29 @@ import os
 import pytest
 import sqlalchemy
 
-from GenericSQL import Client, sql_query_execute, generate_default_port_by_dialect
+from GenericSQL import Client, sql_query_execute, generate_default_port_by_dialect, generate_keyset_query, \
+    skip_rows, iterate_chunks, sql_query_execute_to_file, fetch_incidents, generate_page_query
 
 
 class ResultMock:
-    def __init__(self):
-        pass
+    def __init__(self, rows=None, keys=None):
+        self.rows = rows or []
+        self._keys = keys or []
+        self.closed = False
 
     def fetchall(self):
-        return []
+        rows, self.rows = self.rows, []
+        return rows
+
+    def fetchmany(self, size):
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+    def keys(self):
+        return self._keys
+
+    def close(self):
+        self.closed = True
 
 
 ARGS1 = {
@@ -221,6 +235,7 @@ def test_sql_queries_with_empty_table(mocker):
     """
     mocker.patch.object(Client, '_create_engine_and_connect', return_value=mocker.Mock(spec=sqlalchemy.engine.base.Connection))
     client = Client('sql_dialect', 'server_url', 'username', 'password', 'port', 'database', "", False)
+    mocker.patch.object(client.connection, 'execution_options', return_value=client.connection)
     mocker.patch.object(client.connection, 'execute', return_value=ResultMock())
     result = sql_query_execute(client, ARGS3)
     assert EMPTY_OUTPUT == result[1]  # entry context is found in the 2nd place in the result of the command
@@ -253,3 +268,201 @@ def test_mysql_integration():
      {'arg1': 'value1', 'arg2': 'value2', 'driver': 'ODBC Driver 17 for SQL Server'})])
 def test_parse_connect_parameters(connect_parameters, dialect, expected_response):
     assert Client.parse_connect_parameters(connect_parameters, dialect) == expected_response
+
+
+def test_sql_queries_skip_and_limit_on_cursor(mocker):
+    """Unit test
+    Given
+    - select query with skip and limit
+    When
+    - the database returns more rows than skip + limit
+    Then
+    - only the requested page is returned
+    - rows after the page are not fetched from the cursor and the cursor is closed
+    """
+    mocker.patch.object(Client, '_create_engine_and_connect', return_value=mocker.Mock(spec=sqlalchemy.engine.base.Connection))
+    client = Client('sql_dialect', 'server_url', 'username', 'password', 'port', 'database', "", False)
+    result_mock = ResultMock([{'Name': str(i)} for i in range(10)])
+    mocker.patch.object(client.connection, 'execution_options', return_value=client.connection)
+    mocker.patch.object(client.connection, 'execute', return_value=result_mock)
+    result = sql_query_execute(client, {'query': 'select Name from city', 'limit': 3, 'skip': 4})
+    assert result[2] == [{'Name': '4'}, {'Name': '5'}, {'Name': '6'}]
+    assert len(result_mock.rows) == 3
+    assert result_mock.closed
+
+
+@pytest.mark.parametrize('sql_query, dialect, expected_query', [
+    ('select * from t;', 'MySQL', 'select * from t LIMIT 7'),
+    ('SELECT * FROM t ORDER BY id', 'PostgreSQL', 'SELECT * FROM t ORDER BY id LIMIT 7'),
+    ('select * from t', 'Microsoft SQL Server', 'SELECT TOP 7 * FROM (select * from t) AS limited_query'),
+    ('select * from t order by id', 'Oracle', 'SELECT * FROM (select * from t order by id) WHERE ROWNUM <= 7'),
+    # queries which can't be limited in the DB
+    ('select * from t order by id', 'Microsoft SQL Server', None),
+    ('select * from t limit 3', 'MySQL', None),
+    ('select * from t for update', 'PostgreSQL', None),
+    ('insert into t values (1)', 'MySQL', None),
+    ('select 1; select 2', 'MySQL', None),
+    ('select * from t', 'sql_dialect', None),
+])
+def test_generate_page_query(sql_query, dialect, expected_query):
+    assert generate_page_query(sql_query, dialect, 7) == expected_query
+
+
+def test_sql_query_execute_limit_in_query(mocker):
+    """Unit test
+    Given
+    - select query with skip and limit, in a dialect which supports limiting the query
+    When
+    - executing the query
+    Then
+    - the query is limited to skip + limit rows in the DB, and the skipped rows are discarded from the cursor
+    """
+    mocker.patch.object(Client, '_create_engine_and_connect', return_value=mocker.Mock(spec=sqlalchemy.engine.base.Connection))
+    client = Client('MySQL', 'server_url', 'username', 'password', 'port', 'database', "", False)
+    mocker.patch.object(client.connection, 'execution_options', return_value=client.connection)
+    execute_mock = mocker.patch.object(client.connection, 'execute',
+                                       return_value=ResultMock([{'Name': str(i)} for i in range(7)]))
+    result = sql_query_execute(client, {'query': 'select Name from city', 'limit': 3, 'skip': 4})
+    assert str(execute_mock.call_args[0][0]) == 'select Name from city LIMIT 7'
+    assert result[2] == [{'Name': '4'}, {'Name': '5'}, {'Name': '6'}]
+
+
+def test_skip_rows_and_iterate_chunks():
+    """Unit test
+    Given
+    - an open result with 25 rows
+    When
+    - skipping 7 rows and iterating the rest in chunks of 5 with a limit of 12
+    Then
+    - 12 rows starting from the 8th row are returned in chunks of at most 5 rows
+    """
+    result_mock = ResultMock(list(range(25)))
+    skip_rows(result_mock, 7, chunk_size=5)
+    chunks = list(iterate_chunks(result_mock, limit=12, chunk_size=5))
+    assert chunks == [[7, 8, 9, 10, 11], [12, 13, 14, 15, 16], [17, 18]]
+    assert list(iterate_chunks(result_mock, chunk_size=5)) == [[19, 20, 21, 22, 23], [24]]
+
+
+@pytest.mark.parametrize('dialect, keyset_value, limit, expected_query', [
+    ('MySQL', None, 10, 'SELECT * FROM (select * from t) AS keyset_query ORDER BY keyset_query.id LIMIT 10'),
+    ('PostgreSQL', 5, 10,
+     'SELECT * FROM (select * from t) AS keyset_query WHERE keyset_query.id > :keyset_value '
+     'ORDER BY keyset_query.id LIMIT 10'),
+    ('Microsoft SQL Server', 5, 10,
+     'SELECT TOP 10 * FROM (select * from t) AS keyset_query WHERE keyset_query.id > :keyset_value ORDER BY keyset_query.id'),
+    ('Oracle', 5, 10,
+     'SELECT * FROM (SELECT * FROM (select * from t) keyset_query WHERE keyset_query.id > :keyset_value '
+     'ORDER BY keyset_query.id) WHERE ROWNUM <= 10'),
+    ('MySQL', 5, 0,
+     'SELECT * FROM (select * from t) AS keyset_query WHERE keyset_query.id > :keyset_value ORDER BY keyset_query.id'),
+])
+def test_generate_keyset_query(dialect, keyset_value, limit, expected_query):
+    assert generate_keyset_query('select * from t', dialect, 'id', keyset_value, limit) == expected_query
+
+
+def test_generate_keyset_query_qualified_column():
+    """Unit test
+    Given
+    - a join query, and a keyset column qualified with a table name of the query
+    When
+    - generating the keyset query
+    Then
+    - the keyset column is referenced by the alias of the wrapped query, since the table isn't visible outside of it
+    """
+    sql_query = 'select a.id, b.name from a join b on a.b_id = b.id'
+    assert generate_keyset_query(sql_query, 'PostgreSQL', 'a.id', 5, 10) == \
+        f'SELECT * FROM ({sql_query}) AS keyset_query WHERE keyset_query.id > :keyset_value ' \
+        'ORDER BY keyset_query.id LIMIT 10'
+
+
+def test_sql_query_execute_keyset_pagination(mocker):
+    """Unit test
+    Given
+    - select query with a keyset column and the keyset value of the previous page
+    When
+    - executing the query
+    Then
+    - the keyset value is passed as a named bind variable
+    - the keyset value of the last returned row is returned for the next page
+    """
+    mocker.patch.object(Client, '_create_engine_and_connect', return_value=mocker.Mock(spec=sqlalchemy.engine.base.Connection))
+    client = Client('MySQL', 'server_url', 'username', 'password', 'port', 'database', "", False)
+    request_mock = mocker.patch.object(Client, 'sql_query_execute_request',
+                                       return_value=([{'id': 6}, {'id': 7}], ['id']))
+    result = sql_query_execute(client, {'query': 'select id from t', 'limit': 2, 'keyset_column': 'id',
+                                        'keyset_value': '5'})
+    assert request_mock.call_args[0][0] == 'SELECT * FROM (select id from t) AS keyset_query ' \
+                                           'WHERE keyset_query.id > :keyset_value ORDER BY keyset_query.id LIMIT 2'
+    assert request_mock.call_args[0][1] == {'keyset_value': '5'}
+    assert result[1]['GenericSQL(val.Query && val.Query === obj.Query)']['GenericSQL']['NextKeysetValue'] == '7'
+
+
+def test_sql_query_execute_to_file(mocker, tmp_path):
+    """Unit test
+    Given
+    - select query with result_as_file and a limit of 0
+    When
+    - the database returns more rows than the chunk size
+    Then
+    - all the rows are written to a CSV file entry
+    """
+    mocker.patch.object(Client, '_create_engine_and_connect', return_value=mocker.Mock(spec=sqlalchemy.engine.base.Connection))
+    client = Client('sql_dialect', 'server_url', 'username', 'password', 'port', 'database', "", False)
+    result_mock = ResultMock([(i, f'name{i}') for i in range(5)], keys=['id', 'name'])
+    mocker.patch.object(client, 'execute_streaming', return_value=result_mock)
+    mocker.patch('demistomock.investigation', return_value={'id': str(tmp_path / 'inv')})
+    mocker.patch('demistomock.uniqueFile', return_value='file_id')
+    entry = sql_query_execute_to_file(client, {'query': 'select * from t', 'limit': 0, 'chunk_size': 2,
+                                               'result_as_file': 'true'})
+    assert entry['File'] == 'query_result.csv'
+    assert entry['FileID'] == 'file_id'
+    with open(str(tmp_path / 'inv') + '_file_id') as result_file:
+        assert result_file.read().splitlines() == ['id,name', '0,name0', '1,name1', '2,name2', '3,name3', '4,name4']
+    assert result_mock.closed
+
+
+FETCH_PARAMS = {
+    'fetch_query': 'select * from alerts',
+    'fetch_column': 'time',
+    'id_column': 'id',
+    'incident_name': 'name',
+    'max_fetch': '2',
+}
+
+
+@pytest.mark.parametrize('last_run, rows, expected_names, expected_next_run', [
+    # first fetch, the watermark is the fetch column value of the last fetched row
+    ({}, [{'id': 1, 'time': 10, 'name': 'a'}, {'id': 2, 'time': 10, 'name': 'b'}], ['a', 'b'],
+     {'last_value': '10', 'boundary_ids': ['1', '2']}),
+    # rows with the watermark value that were already fetched are skipped
+    ({'last_value': '10', 'boundary_ids': ['1', '2']},
+     [{'id': 1, 'time': 10, 'name': 'a'}, {'id': 2, 'time': 10, 'name': 'b'}, {'id': 3, 'time': 10, 'name': 'c'},
+      {'id': 4, 'time': 11, 'name': 'd'}], ['c', 'd'],
+     {'last_value': '11', 'boundary_ids': ['4']}),
+    # no new rows, the last run is kept
+    ({'last_value': '11', 'boundary_ids': ['4']}, [{'id': 4, 'time': 11, 'name': 'd'}], [],
+     {'last_value': '11', 'boundary_ids': ['4']}),
+])
+def test_fetch_incidents(mocker, last_run, rows, expected_names, expected_next_run):
+    """Unit test
+    Given
+    - fetch query with a non unique fetch column and a unique id column
+    - the last run of the previous fetch
+    When
+    - fetching incidents
+    Then
+    - only rows that weren't fetched before are returned as incidents, up to max_fetch
+    - the watermark and the ids of the rows fetched with it are saved in the next run
+    """
+    mocker.patch.object(Client, '_create_engine_and_connect', return_value=mocker.Mock(spec=sqlalchemy.engine.base.Connection))
+    client = Client('MySQL', 'server_url', 'username', 'password', 'port', 'database', "", False)
+    execute_mock = mocker.patch.object(client, 'execute_streaming', return_value=ResultMock(rows))
+    incidents, next_run = fetch_incidents(client, FETCH_PARAMS, last_run)
+    assert [incident['name'] for incident in incidents] == expected_names
+    assert next_run == expected_next_run
+    if last_run:
+        limit = 2 + len(last_run['boundary_ids'])
+        assert execute_mock.call_args[0][0] == 'SELECT * FROM (select * from alerts) AS keyset_query ' \
+                                               'WHERE keyset_query.time >= :keyset_value ' \
+                                               f'ORDER BY keyset_query.time LIMIT {limit}'
+        assert execute_mock.call_args[0][1] == {'keyset_value': last_run['last_value']}
@@ -1,3 +1,5 @@
+import asyncio
+import math
 from collections import deque
 from copy import copy
 from secrets import compare_digest
@@ -18,6 +20,9 @@ from CommonServerUserPython import *
 
 sample_events_to_store = deque(maxlen=20)  # type: ignore[var-annotated]
 
+SAMPLES_WRITE_INTERVAL = 10  # seconds
+CREATE_INCIDENTS_RETRIES = 3
+
 
 class Incident(BaseModel):
     name: Optional[str] = None
@@ -49,6 +54,177 @@ class GenericWebhookAccessFormatter(AccessFormatter):
         return super().formatMessage(recordcopy)
 
 
+def store_sample_events(incidents: List[Dict]) -> None:
+    """Adds the incidents to the sample events stored in the integration context.
+
+    Args:
+        incidents: The incidents to store as sample events.
+    """
+    try:
+        sample_events_to_store.extend(incidents)
+        integration_context = get_integration_context()
+        sample_events = deque(json.loads(integration_context.get('sample_events', '[]')), maxlen=20)
+        sample_events += sample_events_to_store
+        integration_context['sample_events'] = list(sample_events)
+        set_to_integration_context_with_retries(integration_context)
+    except Exception as e:
+        demisto.error(f'Failed storing sample events - {e}')
+
+
+class IncidentQueue:
+    """A bounded in-process queue of incidents, flushed to the server in batches by a background task.
+
+    A batch is created once it reaches ``batch_size`` incidents, or ``flush_interval`` seconds after its first
+    incident was queued. Sample events are written to the integration context at most once every
+    ``samples_interval`` seconds, instead of on every request.
+    """
+
+    def __init__(self, max_size: int = 1000, batch_size: int = 100, flush_interval: float = 1,
+                 store_samples: bool = False, samples_interval: float = SAMPLES_WRITE_INTERVAL):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.store_samples = store_samples
+        self.samples_interval = samples_interval
+        self.created = 0
+        self.rejected = 0
+        self.failed = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopped = False
+        self._batch: List[Dict] = []
+        self._pending_samples: List[Dict] = []
+        self._last_samples_write = 0.0
+
+    def start(self) -> None:
+        """Creates the queue and starts the flushing task. Must be called from within the server's event loop."""
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._stopped = False
+        self._task = asyncio.ensure_future(self.run())
+
+    async def stop(self) -> None:
+        """Stops the flushing task and creates the incidents left in the queue."""
+        if self._task:
+            # wait_for() may swallow the cancellation if the queue returned an item at the same time,
+            # so the flag makes sure the task exits at the end of the current iteration.
+            self._stopped = True
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        batch, self._batch = self._batch, []
+        while self._queue and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+            if len(batch) == self.batch_size:
+                await self.flush(batch)
+                batch = []
+        if batch:
+            await self.flush(batch)
+        self.write_samples(force=True)
+
+    def put(self, incident: Dict) -> bool:
+        """Queues an incident without waiting.
+
+        Args:
+            incident: The incident to create.
+
+        Returns:
+            bool: False if the queue is full and the incident was not queued, True otherwise.
+        """
+        try:
+            self._queue.put_nowait(incident)  # type: ignore[union-attr]
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return False
+        return True
+
+    async def next_batch(self) -> List[Dict]:
+        """Waits for the next batch of incidents, which is returned once it is full or the flush interval passed.
+
+        The batch is collected on the instance, so the incidents already taken from the queue are not lost if the
+        task is cancelled while waiting.
+        """
+        queue: asyncio.Queue = self._queue  # type: ignore[assignment]
+        loop = asyncio.get_event_loop()
+        if self._pending_samples:
+            try:
+                self._batch.append(await asyncio.wait_for(queue.get(), self.samples_interval))
+            except asyncio.TimeoutError:
+                return self._batch
+        else:
+            self._batch.append(await queue.get())
+        deadline = loop.time() + self.flush_interval
+        while len(self._batch) < self.batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                self._batch.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return self._batch
+
+    async def run(self) -> None:
+        while not self._stopped:
+            batch = await self.next_batch()
+            if batch:
+                await self.flush(batch)
+            self._batch = []
+            self.write_samples(force=not batch)
+
+    async def flush(self, batch: List[Dict]) -> None:
+        """Creates a batch of incidents, retrying failed attempts.
+
+        Args:
+            batch: The incidents to create.
+        """
+        for attempt in range(1, CREATE_INCIDENTS_RETRIES + 1):
+            try:
+                demisto.createIncidents(batch)
+                self.created += len(batch)
+                break
+            except Exception as e:
+                if attempt == CREATE_INCIDENTS_RETRIES:
+                    self.failed += len(batch)
+                    demisto.error(f'Failed creating {len(batch)} incidents - {e}')
+                    demisto.updateModuleHealth(f'Failed creating {len(batch)} incidents: {e}')
+                else:
+                    await asyncio.sleep(attempt)
+        if self.store_samples:
+            self._pending_samples = (self._pending_samples + batch)[-sample_events_to_store.maxlen:]  # type: ignore[misc]
+
+    def write_samples(self, force: bool = False) -> None:
+        """Writes the pending sample events to the integration context, if the samples interval has passed.
+
+        Args:
+            force: Whether to write the pending sample events regardless of the samples interval.
+        """
+        if not self._pending_samples:
+            return
+        now = time.time()
+        if force or now - self._last_samples_write >= self.samples_interval:
+            store_sample_events(self._pending_samples)
+            self._pending_samples = []
+            self._last_samples_write = now
+
+
+INCIDENT_QUEUE: Optional[IncidentQueue] = None
+
+
+@app.on_event('startup')
+async def start_incident_queue():
+    if INCIDENT_QUEUE:
+        INCIDENT_QUEUE.start()
+
+
+@app.on_event('shutdown')
+async def stop_incident_queue():
+    if INCIDENT_QUEUE:
+        await INCIDENT_QUEUE.stop()
+
+
 @app.post('/')
 async def handle_post(
         incident: Incident,
@@ -85,16 +261,14 @@ async def handle_post(
         'rawJSON': json.dumps(raw_json)
     }
 
+    if INCIDENT_QUEUE:
+        if not INCIDENT_QUEUE.put(incident):
+            return Response(status_code=status.HTTP_429_TOO_MANY_REQUESTS, content='Incident queue is full.',
+                            headers={'Retry-After': str(math.ceil(INCIDENT_QUEUE.flush_interval))})
+        return Response(status_code=status.HTTP_202_ACCEPTED, content='Incident queued.')
+
     if demisto.params().get('store_samples'):
-        try:
-            sample_events_to_store.append(incident)
-            integration_context = get_integration_context()
-            sample_events = deque(json.loads(integration_context.get('sample_events', '[]')), maxlen=20)
-            sample_events += sample_events_to_store
-            integration_context['sample_events'] = list(sample_events)
-            set_to_integration_context_with_retries(integration_context)
-        except Exception as e:
-            demisto.error(f'Failed storing sample events - {e}')
+        store_sample_events([incident])
 
     return demisto.createIncidents([incident])
 
@@ -110,7 +284,27 @@ def fetch_samples() -> None:
     demisto.incidents(sample_events)
 
 
+def init_incident_queue(params: Dict) -> Optional[IncidentQueue]:
+    """Creates the incident queue, if incidents should be created in batches.
+
+    Args:
+        params: The integration parameters.
+
+    Returns:
+        Optional[IncidentQueue]: The incident queue, or None if incidents should be created per request.
+    """
+    if not argToBoolean(params.get('queue_incidents', False)):
+        return None
+    return IncidentQueue(
+        max_size=arg_to_number(params.get('queue_size')) or 1000,
+        batch_size=arg_to_number(params.get('batch_size')) or 100,
+        flush_interval=float(params.get('batch_interval') or 1),
+        store_samples=argToBoolean(params.get('store_samples', False)),
+    )
+
+
 def main() -> None:
+    global INCIDENT_QUEUE
     demisto.debug(f'Command being called is {demisto.command()}')
     try:
         try:
@@ -122,6 +316,7 @@ def main() -> None:
         elif demisto.command() == 'fetch-incidents':
             fetch_samples()
         elif demisto.command() == 'long-running-execution':
+            INCIDENT_QUEUE = init_incident_queue(demisto.params())
             while True:
                 certificate = demisto.params().get('certificate', '')
                 private_key = demisto.params().get('key', '')
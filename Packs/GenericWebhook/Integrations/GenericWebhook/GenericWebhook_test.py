@@ -0,0 +1,133 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+
+import demistomock as demisto
+import GenericWebhook
+from GenericWebhook import IncidentQueue, app, init_incident_queue
+
+
+@pytest.fixture
+def incident_queue(mocker):
+    def _incident_queue(**kwargs):
+        queue = IncidentQueue(**kwargs)
+        mocker.patch.object(GenericWebhook, 'INCIDENT_QUEUE', queue)
+        return queue
+    mocker.patch.object(demisto, 'params', return_value={})
+    return _incident_queue
+
+
+def test_init_incident_queue():
+    """
+    Given
+    - integration params with and without batch incident creation
+    When
+    - initializing the incident queue
+    Then
+    - a queue is created with the configured sizes only if batch incident creation is enabled
+    """
+    assert init_incident_queue({}) is None
+    queue = init_incident_queue({'queue_incidents': True, 'queue_size': '50', 'batch_size': '10',
+                                 'batch_interval': '0.5', 'store_samples': True})
+    assert (queue.max_size, queue.batch_size, queue.flush_interval, queue.store_samples) == (50, 10, 0.5, True)
+
+
+def test_incident_queue_load(mocker, incident_queue):
+    """
+    Given
+    - an incident queue which creates batches of up to 50 incidents
+    When
+    - posting 500 incidents concurrently
+    Then
+    - all the requests are accepted, and all the incidents are created in batches
+    """
+    create_incidents_mock = mocker.patch.object(demisto, 'createIncidents')
+    queue = incident_queue(max_size=1000, batch_size=50, flush_interval=0.2)
+
+    with TestClient(app) as client:
+        with ThreadPoolExecutor(max_workers=20) as executor:
+            responses = list(executor.map(
+                lambda i: client.post('/', json={'name': f'incident {i}', 'raw_json': {'i': i}}), range(500)
+            ))
+
+    assert all(response.status_code == 202 for response in responses)
+    batches = [call_args[0][0] for call_args in create_incidents_mock.call_args_list]
+    assert sorted(json.loads(incident['rawJSON'])['i'] for batch in batches for incident in batch) == list(range(500))
+    assert all(len(batch) <= 50 for batch in batches)
+    assert len(batches) < 500
+    assert queue.created == 500
+
+
+def test_incident_queue_backpressure(mocker, incident_queue):
+    """
+    Given
+    - a full incident queue
+    When
+    - posting an incident
+    Then
+    - the request is rejected with 429 and a Retry-After header
+    - the queued incident is created when the server shuts down
+    """
+    create_incidents_mock = mocker.patch.object(demisto, 'createIncidents')
+    queue = incident_queue(max_size=1, flush_interval=2)
+    mocker.patch.object(IncidentQueue, 'start', lambda self: setattr(self, '_queue', asyncio.Queue(self.max_size)))
+
+    with TestClient(app) as client:
+        assert client.post('/', json={'name': 'first'}).status_code == 202
+        response = client.post('/', json={'name': 'second'})
+        assert response.status_code == 429
+        assert response.headers['Retry-After'] == '2'
+        assert not create_incidents_mock.called
+
+    assert queue.rejected == 1
+    create_incidents_mock.assert_called_once()
+    assert create_incidents_mock.call_args[0][0][0]['name'] == 'first'
+
+
+def test_incident_queue_failed_batch(mocker, incident_queue):
+    """
+    Given
+    - an incident queue, and a server which fails to create incidents
+    When
+    - flushing a batch
+    Then
+    - the batch is retried, and then reported as failed in the module health
+    """
+    mocker.patch.object(demisto, 'createIncidents', side_effect=Exception('server is down'))
+    mocker.patch.object(demisto, 'updateModuleHealth')
+    mocker.patch.object(GenericWebhook.asyncio, 'sleep')
+    queue = incident_queue()
+
+    asyncio.run(queue.flush([{'name': 'incident'}]))
+
+    assert demisto.createIncidents.call_count == GenericWebhook.CREATE_INCIDENTS_RETRIES
+    assert queue.failed == 1
+    assert 'server is down' in demisto.updateModuleHealth.call_args[0][0]
+
+
+def test_incident_queue_samples_writes(mocker, incident_queue):
+    """
+    Given
+    - an incident queue which stores sample events
+    When
+    - posting many incidents within the samples write interval
+    Then
+    - the sample events are written to the integration context for the first batch and on shutdown only,
+      with the last 20 incidents
+    """
+    mocker.patch.object(demisto, 'createIncidents')
+    mocker.patch.object(GenericWebhook, 'get_integration_context', side_effect=lambda: {})
+    set_context_mock = mocker.patch.object(GenericWebhook, 'set_to_integration_context_with_retries')
+    mocker.patch.object(GenericWebhook, 'sample_events_to_store', GenericWebhook.deque(maxlen=20))
+    incident_queue(batch_size=5, flush_interval=0.1, store_samples=True, samples_interval=60)
+
+    with TestClient(app) as client:
+        for i in range(30):
+            client.post('/', json={'name': f'incident {i}'})
+
+    assert set_context_mock.call_count == 2
+    sample_events = set_context_mock.call_args[0][0]['sample_events']
+    assert [event['name'] for event in sample_events] == [f'incident {i}' for i in range(10, 30)]
@@ -14,6 +14,7 @@ import logging
 requests.packages.urllib3.disable_warnings()
 
 SUPPORTED_GENERAL_OFFSETS = ['smallest', 'earliest', 'beginning', 'largest', 'latest', 'end', 'error']
+STREAM_METRICS_CONTEXT_KEY = 'stream_metrics'
 
 ''' CLIENT CLASS '''
 
@@ -137,6 +138,23 @@ class KafkaCommunicator:
         else:
             raise DemistoException('Kafka consumer was not yet initialized.')
 
+    def get_partitions_lag(self, kafka_consumer: KConsumer) -> Dict[str, int]:
+        """Get the lag of every partition assigned to the consumer, the number of messages between the consumer's
+        position and the end of the partition.
+
+        Args:
+            kafka_consumer: The consumer.
+
+        Return a dict of partition number to lag.
+        """
+        partitions_lag = {}
+        for topic_partition in kafka_consumer.position(kafka_consumer.assignment()):
+            _, latest_offset = kafka_consumer.get_watermark_offsets(topic_partition, timeout=self.REQUESTS_TIMEOUT)
+            # A negative position means the consumer did not consume from the partition yet
+            position = topic_partition.offset if topic_partition.offset >= 0 else latest_offset
+            partitions_lag[str(topic_partition.partition)] = max(latest_offset - position, 0)
+        return partitions_lag
+
     def test_connection(self, log_stream: Optional[StringIO] = None) -> str:
         """Test getting topics with the consumer and producer configurations."""
         error_msg = ''
@@ -754,6 +772,191 @@ def fetch_incidents(kafka: KafkaCommunicator, demisto_params: dict) -> None:
     demisto.incidents(incidents)
 
 
+''' LONG RUNNING '''
+
+
+class StreamMetrics:
+    """Throughput and lag metrics of the long running consumer."""
+
+    def __init__(self, report_interval: int = 60):
+        self.report_interval = report_interval
+        self.started = time.time()
+        self.last_report = self.started
+        self.total_messages = 0
+        self.messages_since_report = 0
+        self.failed_batches = 0
+
+    def record(self, messages_count: int) -> None:
+        self.total_messages += messages_count
+        self.messages_since_report += messages_count
+
+    def is_report_due(self) -> bool:
+        return time.time() - self.last_report >= self.report_interval
+
+    def report(self, partitions_lag: Dict[str, int]) -> dict:
+        """Build the metrics since the previous report and start a new reporting period.
+
+        Args:
+            partitions_lag: The lag of every assigned partition.
+
+        Return the metrics.
+        """
+        now = time.time()
+        elapsed = max(now - self.last_report, 1e-6)
+        metrics = {
+            'MessagesPerSecond': round(self.messages_since_report / elapsed, 2),
+            'TotalMessages': self.total_messages,
+            'FailedBatches': self.failed_batches,
+            'Lag': sum(partitions_lag.values()),
+            'PartitionsLag': partitions_lag,
+            'UptimeSeconds': int(now - self.started),
+            'Time': timestamp_to_datestring(int(now * 1000)),
+        }
+        self.last_report = now
+        self.messages_since_report = 0
+        return metrics
+
+
+def get_next_offsets(messages: List[Message], topic: str) -> List[TopicPartition]:
+    """Get the offsets to commit after consuming messages, the offset following the last message of every partition.
+
+    Args:
+        messages: The consumed messages.
+        topic: The messages' topic.
+
+    Return a list of TopicPartition objects to commit.
+    """
+    next_offsets: Dict[int, int] = {}
+    for message in messages:
+        next_offsets[message.partition()] = max(next_offsets.get(message.partition(), 0), message.offset() + 1)
+    return [TopicPartition(topic=topic, partition=partition, offset=offset) for partition, offset in next_offsets.items()]
+
+
+def get_first_offsets(messages: List[Message], topic: str) -> List[TopicPartition]:
+    """Get the offset of the first message of every partition, to consume a batch again after it failed.
+
+    Args:
+        messages: The consumed messages.
+        topic: The messages' topic.
+
+    Return a list of TopicPartition objects to seek to.
+    """
+    first_offsets: Dict[int, int] = {}
+    for message in messages:
+        partition = message.partition()
+        first_offsets[partition] = min(first_offsets.get(partition, message.offset()), message.offset())
+    return [TopicPartition(topic=topic, partition=partition, offset=offset) for partition, offset in first_offsets.items()]
+
+
+def consume_batch(kafka_consumer: KConsumer, topic: str, batch_size: int, consume_timeout: float) -> int:
+    """Consume a batch of messages, create incidents from them, and commit their offsets once the incidents are
+    created. If creating the incidents fails, the consumer goes back to the start of the batch, so the messages are
+    consumed again.
+
+    Args:
+        kafka_consumer: The consumer, already subscribed or assigned to the topic.
+        topic: The topic.
+        batch_size: The maximum number of messages to consume.
+        consume_timeout: The maximum time in seconds to wait for the batch.
+
+    Return the number of incidents created.
+    """
+    messages = []
+    for message in kafka_consumer.consume(num_messages=batch_size, timeout=consume_timeout):
+        if message.error():
+            demisto.debug(f'Kafka v3 - consumer error: {message.error()}')
+        else:
+            messages.append(message)
+
+    if not messages:
+        return 0
+
+    try:
+        demisto.createIncidents([create_incident(message=message, topic=topic) for message in messages])
+    except Exception:
+        for topic_partition in get_first_offsets(messages, topic):
+            kafka_consumer.seek(topic_partition)
+        raise
+
+    kafka_consumer.commit(offsets=get_next_offsets(messages, topic), asynchronous=False)
+    return len(messages)
+
+
+def long_running_execution(kafka: KafkaCommunicator, demisto_params: dict, log_stream: Optional[StringIO] = None,
+                           max_batches: Optional[int] = None) -> None:
+    """Consume messages from the topic with a persistent consumer and create incidents from them in batches.
+    Without partitions the consumer subscribes to the topic and the group balances the partitions between consumers.
+    The offsets are committed to the consumer group after the incidents of every batch are created, so the consumer
+    continues from where it stopped after a restart, or from the offset parameter the first time.
+
+    Args:
+        kafka: initialized KafkaCommunicator object to preform actions with.
+        demisto_params: The demisto parameters.
+        log_stream: The stream the kafka logs are captured to, emptied after every batch so it doesn't grow forever.
+        max_batches: The maximum number of batches to consume, used for testing. Consumes forever if not set.
+    """
+    topic = demisto_params.get('topic', '')
+    partitions = handle_empty(argToList(demisto_params.get('partition', '')), [])
+    message_max_bytes = int(handle_empty(demisto_params.get("max_bytes_per_message", 1048576), 1048576))
+    batch_size = int(handle_empty(demisto_params.get('stream_batch_size', 100), 100))
+    consume_timeout = float(handle_empty(demisto_params.get('stream_consume_timeout', 1), 1))
+
+    kafka.update_conf_for_fetch(message_max_bytes=message_max_bytes)
+    check_params(kafka, topic, partitions, None, True, False)
+
+    kafka_consumer = kafka.get_kafka_consumer()
+    if partitions:
+        # Without an offset, the assigned partitions start from the committed offsets of the group
+        kafka_consumer.assign([TopicPartition(topic=topic, partition=int(partition)) for partition in partitions])
+    else:
+        kafka_consumer.subscribe([topic])
+
+    metrics = StreamMetrics()
+    batches = 0
+    try:
+        while max_batches is None or batches < max_batches:
+            batches += 1
+            if log_stream:
+                log_stream.seek(0)
+                log_stream.truncate()
+            try:
+                metrics.record(consume_batch(kafka_consumer, topic, batch_size, consume_timeout))
+            except Exception as e:
+                metrics.failed_batches += 1
+                demisto.error(f'Kafka v3 - failed creating incidents, the batch will be consumed again: {e}')
+                demisto.updateModuleHealth(f'Failed creating incidents from Kafka messages: {e}')
+                time.sleep(consume_timeout)
+                continue
+
+            if metrics.is_report_due():
+                stream_metrics = metrics.report(kafka.get_partitions_lag(kafka_consumer))
+                demisto.debug(f'Kafka v3 - stream metrics: {stream_metrics}')
+                set_to_integration_context_with_retries({STREAM_METRICS_CONTEXT_KEY: stream_metrics})
+                demisto.updateModuleHealth('')
+    finally:
+        kafka_consumer.close()
+
+
+def get_stream_metrics() -> Union[CommandResults, str]:
+    """Get the latest metrics reported by the long running consumer.
+
+    Return CommandResults with the metrics, a message if no metrics were reported.
+    """
+    stream_metrics = get_integration_context().get(STREAM_METRICS_CONTEXT_KEY)
+    if not stream_metrics:
+        return 'No stream metrics were reported. Make sure the long running instance is enabled.'
+    stream_metrics = json.loads(stream_metrics) if isinstance(stream_metrics, str) else stream_metrics
+
+    readable_output = tableToMarkdown('Kafka Stream Metrics', stream_metrics,
+                                      headers=['Time', 'MessagesPerSecond', 'TotalMessages', 'Lag', 'FailedBatches',
+                                               'UptimeSeconds'])
+    return CommandResults(
+        outputs_prefix='Kafka.StreamMetrics',
+        outputs=stream_metrics,
+        readable_output=readable_output,
+    )
+
+
 ''' COMMANDS MANAGER / SWITCH PANEL '''
 
 
@@ -778,6 +981,10 @@ def commands_manager(kafka_kwargs: dict, demisto_params: dict, demisto_args: dic
             return_results(fetch_partitions(kafka, demisto_args))
         elif demisto_command == 'fetch-incidents':
             fetch_incidents(kafka, demisto_params)
+        elif demisto_command == 'long-running-execution':
+            long_running_execution(kafka, demisto_params, log_stream)
+        elif demisto_command == 'kafka-get-stream-metrics':
+            return_results(get_stream_metrics())
         else:
             raise NotImplementedError(f'Command {demisto_command} not found in command list')
     finally:
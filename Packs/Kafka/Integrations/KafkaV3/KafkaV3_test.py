@@ -1,7 +1,7 @@
 from CommonServerPython import DemistoException, demisto
 
 from KafkaV3 import KafkaCommunicator, command_test_module, KConsumer, KProducer, print_topics, fetch_partitions, \
-    consume_message, produce_message, fetch_incidents
+    consume_message, produce_message, fetch_incidents, long_running_execution, get_stream_metrics
 from confluent_kafka.admin import ClusterMetadata, TopicMetadata, PartitionMetadata
 from confluent_kafka import KafkaError, TopicPartition, TIMESTAMP_NOT_AVAILABLE, TIMESTAMP_CREATE_TIME
 
@@ -281,12 +281,16 @@ class MessageMock(object):
     topic_value = None
     partition_value = None
 
-    def __init__(self, message=None, offset=None, topic=None, partition=None, timestamp=None):
+    def __init__(self, message=None, offset=None, topic=None, partition=None, timestamp=None, error=None):
         self.message = message.encode('utf-8')
         self.offset_value = offset
         self.topic_value = topic
         self.partition_value = partition
         self.timestamp_value = timestamp
+        self.error_value = error
+
+    def error(self):
+        return self.error_value
 
     def value(self):
         return self.message
@@ -804,6 +808,120 @@ def test_fetch_incidents_no_messages(mocker, demisto_params, last_run, cluster_t
     set_last_run_mock.assert_called_once_with(last_run)
 
 
+STREAM_MESSAGES = [
+    MessageMock(message='first', partition=0, offset=1, timestamp=(TIMESTAMP_NOT_AVAILABLE, 0)),
+    MessageMock(message='second', partition=0, offset=2, timestamp=(TIMESTAMP_NOT_AVAILABLE, 0)),
+    MessageMock(message='eof', partition=0, offset=3, error=KafkaError(KafkaError._PARTITION_EOF)),
+    MessageMock(message='third', partition=1, offset=5, timestamp=(TIMESTAMP_NOT_AVAILABLE, 0)),
+]
+
+
+def assert_topic_partitions(topic_partitions, expected):
+    assert [(tp.topic, tp.partition, tp.offset) for tp in topic_partitions] == expected
+
+
+def test_long_running_execution(mocker):
+    """
+    Given:
+        - initialized KafkaCommunicator
+        - demisto_params without partitions
+    When:
+        - running the long running consumer for two batches, the first with messages and the second empty
+    Then:
+        - Assert the consumer subscribes to the topic and consumes in batches
+        - Assert incidents are created for the messages without errors
+        - Assert the offsets following the last message of every partition are committed, once
+        - Assert the consumer is closed
+    """
+    mocker.patch.object(KConsumer, '__init__', return_value=None)
+    mocker.patch.object(KConsumer, 'list_topics', return_value=create_cluster_metadata({'some-topic': [0, 1]}))
+    subscribe_mock = mocker.patch.object(KConsumer, 'subscribe')
+    consume_mock = mocker.patch.object(KConsumer, 'consume', side_effect=[STREAM_MESSAGES, []])
+    commit_mock = mocker.patch.object(KConsumer, 'commit')
+    close_mock = mocker.patch.object(KConsumer, 'close')
+    create_incidents_mock = mocker.patch.object(demisto, 'createIncidents')
+
+    long_running_execution(KAFKA, {'topic': 'some-topic', 'stream_batch_size': '500'}, max_batches=2)
+
+    subscribe_mock.assert_called_once_with(['some-topic'])
+    assert consume_mock.call_args.kwargs == {'num_messages': 500, 'timeout': 1.0}
+    create_incidents_mock.assert_called_once()
+    incidents = create_incidents_mock.call_args.args[0]
+    assert [incident['details'] for incident in incidents] == ['first', 'second', 'third']
+    commit_mock.assert_called_once()
+    assert_topic_partitions(commit_mock.call_args.kwargs['offsets'], [('some-topic', 0, 3), ('some-topic', 1, 6)])
+    close_mock.assert_called_once()
+
+
+def test_long_running_execution_failed_batch(mocker):
+    """
+    Given:
+        - initialized KafkaCommunicator
+        - demisto_params with partitions
+    When:
+        - creating the incidents of the first batch fails
+    Then:
+        - Assert the partitions are assigned to the consumer
+        - Assert the offsets are not committed and the consumer seeks back to the first message of every partition
+        - Assert the batch is consumed again and committed once the incidents are created
+    """
+    mocker.patch.object(KConsumer, '__init__', return_value=None)
+    mocker.patch.object(KConsumer, 'list_topics', return_value=create_cluster_metadata({'some-topic': [0, 1]}))
+    assign_mock = mocker.patch.object(KConsumer, 'assign')
+    mocker.patch.object(KConsumer, 'consume', side_effect=[STREAM_MESSAGES, STREAM_MESSAGES])
+    seek_mock = mocker.patch.object(KConsumer, 'seek')
+    commit_mock = mocker.patch.object(KConsumer, 'commit')
+    mocker.patch.object(KConsumer, 'close')
+    mocker.patch.object(KafkaV3.time, 'sleep')
+    mocker.patch.object(demisto, 'createIncidents', side_effect=[Exception('server is busy'), None])
+    health_mock = mocker.patch.object(demisto, 'updateModuleHealth')
+
+    long_running_execution(KAFKA, {'topic': 'some-topic', 'partition': '0,1'}, max_batches=2)
+
+    assert_topic_partitions(assign_mock.call_args.args[0], [('some-topic', 0, -1001), ('some-topic', 1, -1001)])
+    assert_topic_partitions([call.args[0] for call in seek_mock.call_args_list],
+                            [('some-topic', 0, 1), ('some-topic', 1, 5)])
+    assert 'server is busy' in health_mock.call_args_list[0].args[0]
+    commit_mock.assert_called_once()
+    assert_topic_partitions(commit_mock.call_args.kwargs['offsets'], [('some-topic', 0, 3), ('some-topic', 1, 6)])
+
+
+def test_long_running_execution_reports_metrics(mocker):
+    """
+    Given:
+        - initialized KafkaCommunicator
+    When:
+        - running the long running consumer and the metrics report is due
+    Then:
+        - Assert the throughput and the lag of every partition are saved in the integration context
+        - Assert the get stream metrics command returns the saved metrics
+    """
+    mocker.patch.object(KConsumer, '__init__', return_value=None)
+    mocker.patch.object(KConsumer, 'list_topics', return_value=create_cluster_metadata({'some-topic': [0, 1]}))
+    mocker.patch.object(KConsumer, 'subscribe')
+    mocker.patch.object(KConsumer, 'consume', return_value=STREAM_MESSAGES)
+    mocker.patch.object(KConsumer, 'commit')
+    mocker.patch.object(KConsumer, 'close')
+    assignment = [TopicPartition('some-topic', 0), TopicPartition('some-topic', 1)]
+    mocker.patch.object(KConsumer, 'assignment', return_value=assignment)
+    mocker.patch.object(KConsumer, 'position', return_value=[TopicPartition('some-topic', 0, 3),
+                                                             TopicPartition('some-topic', 1, -1001)])
+    mocker.patch.object(KConsumer, 'get_watermark_offsets', side_effect=[(0, 10), (0, 7)])
+    mocker.patch.object(demisto, 'createIncidents')
+    mocker.patch.object(KafkaV3.StreamMetrics, 'is_report_due', return_value=True)
+    integration_context = {}
+    mocker.patch.object(demisto, 'getIntegrationContext', side_effect=lambda: integration_context)
+    mocker.patch.object(demisto, 'setIntegrationContext', side_effect=integration_context.update)
+
+    long_running_execution(KAFKA, {'topic': 'some-topic'}, max_batches=1)
+    result = get_stream_metrics()
+
+    assert result.outputs['TotalMessages'] == 3
+    assert result.outputs['PartitionsLag'] == {'0': 7, '1': 0}
+    assert result.outputs['Lag'] == 7
+    assert result.outputs['FailedBatches'] == 0
+
+
 def test_ssl_configuration():
     """
     Given:
@@ -1,6 +1,6 @@
 import ssl
 from datetime import timezone
-from typing import Any, Dict, Tuple, List, Optional
+from typing import Any, Dict, Tuple, List, Optional, Iterator
 
 from dateparser import parse
 from mailparser import parse_from_bytes
@@ -10,6 +10,9 @@ from imapclient import IMAPClient
 import demistomock as demisto
 from CommonServerPython import *
 
+MAX_FETCH_BATCH_BYTES = 20 * 1024 * 1024
+MAX_FETCH_BATCH_COUNT = 50
+
 
 class Email(object):
     def __init__(self, message_bytes: bytes, include_raw_body: bool, save_file: bool, id_: int) -> None:
@@ -233,22 +236,24 @@ def fetch_incidents(client: IMAPClient,
     """
     uid_to_fetch_from = last_run.get('last_uid', 1)
     time_to_fetch_from = parse(last_run.get('last_fetch', f'{first_fetch_time} UTC'), settings={'TIMEZONE': 'UTC'})
-    mails_fetched, messages, uid_to_fetch_from = fetch_mails(
+    messages_uids, batches = search_messages(
         client=client,
-        include_raw_body=include_raw_body,
         time_to_fetch_from=time_to_fetch_from,
         limit=limit,
         with_headers=with_headers,
         permitted_from_addresses=permitted_from_addresses,
         permitted_from_domains=permitted_from_domains,
-        save_file=save_file,
         uid_to_fetch_from=uid_to_fetch_from
     )
+    last_uid = messages_uids[-1] if messages_uids else uid_to_fetch_from
     incidents = []
-    for mail in mails_fetched:
+    messages = []
+    # the incidents are created batch by batch, so only the parsed mails of a single batch are held in memory
+    for mail in iter_mails(client, batches, include_raw_body, save_file, time_to_fetch_from, uid_to_fetch_from):
         incidents.append(mail.convert_to_incident())
-        uid_to_fetch_from = max(uid_to_fetch_from, mail.id)
-    next_run = {'last_uid': uid_to_fetch_from}
+        messages.append(mail.id)
+        last_uid = max(last_uid, mail.id)
+    next_run = {'last_uid': last_uid}
     if delete_processed:
         client.delete_messages(messages)
     return next_run, incidents
@@ -285,37 +290,11 @@ def fetch_mails(client: IMAPClient,
         messages_fetched: A list of the ids of the messages fetched
         last_message_in_current_batch: The UID of the last message fetchedd
     """
-    if message_id:
-        messages_uids = [message_id]
-    else:
-        messages_query = generate_search_query(time_to_fetch_from,
-                                               with_headers,
-                                               permitted_from_addresses,
-                                               permitted_from_domains,
-                                               uid_to_fetch_from)
-        demisto.debug(f'Searching for email messages with criteria: {messages_query}')
-        messages_uids = client.search(messages_query)[:limit]
-    mails_fetched = []
-    messages_fetched = []
-    demisto.debug(f'Messages to fetch: {messages_uids}')
-    for mail_id, message_data in client.fetch(messages_uids, 'RFC822').items():
-        message_bytes = message_data.get(b'RFC822')
-        # For cases the message_bytes is returned as a string. If failed, will try to use the message_bytes returned.
-        try:
-            message_bytes = bytes(message_bytes)
-        except Exception as e:
-            demisto.debug(f"Converting data was un-successful. {mail_id=}, {message_data=}. Error: {e}")
-
-        if not message_bytes:
-            continue
-        email_message_object = Email(message_bytes, include_raw_body, save_file, mail_id)
-        if (not time_to_fetch_from or time_to_fetch_from < email_message_object.date) and \
-                int(email_message_object.id) > int(uid_to_fetch_from):
-            mails_fetched.append(email_message_object)
-            messages_fetched.append(email_message_object.id)
-        else:
-            demisto.debug(f'Skipping {email_message_object.id} with date {email_message_object.date}. '
-                          f'uid_to_fetch_from: {uid_to_fetch_from}, first_fetch_time: {time_to_fetch_from}')
+    messages_uids, batches = search_messages(client, time_to_fetch_from, with_headers, permitted_from_addresses,
+                                             permitted_from_domains, limit, message_id, uid_to_fetch_from)
+    mails_fetched = list(iter_mails(client, batches, include_raw_body, save_file, time_to_fetch_from,
+                                    uid_to_fetch_from))
+    messages_fetched = [mail.id for mail in mails_fetched]
     last_message_in_current_batch = uid_to_fetch_from
     if messages_uids:
         last_message_in_current_batch = messages_uids[-1]
@@ -323,6 +302,151 @@ def fetch_mails(client: IMAPClient,
     return mails_fetched, messages_fetched, last_message_in_current_batch
 
 
+def search_messages(client: IMAPClient,
+                    time_to_fetch_from: datetime = None,
+                    with_headers: bool = False,
+                    permitted_from_addresses: str = '',
+                    permitted_from_domains: str = '',
+                    limit: int = 200,
+                    message_id: int = None,
+                    uid_to_fetch_from: int = 1) -> Tuple[list, List[list]]:
+    """
+    Searches for the mails to fetch, and splits the mails to download into batches.
+
+    Args:
+        client: IMAP client
+        time_to_fetch_from: Fetch all incidents since first_fetch_time
+        with_headers: Whether to add headers to the search query
+        permitted_from_addresses: A string representation of list of mail addresses to fetch from
+        permitted_from_domains: A string representation list of domains to fetch from
+        limit: The maximum number of mails to fetch, if the value is -1 all mails will be fetched
+        message_id: A unique message ID with which a specific mail can be fetched
+        uid_to_fetch_from: The email message UID to start the fetch from as offset
+
+    Returns:
+        messages_uids: The UIDs of the messages returned from the search
+        batches: The batches of UIDs of the messages to download
+    """
+    if message_id:
+        return [message_id], [[message_id]]
+    messages_query = generate_search_query(time_to_fetch_from,
+                                           with_headers,
+                                           permitted_from_addresses,
+                                           permitted_from_domains,
+                                           uid_to_fetch_from)
+    demisto.debug(f'Searching for email messages with criteria: {messages_query}')
+    messages_uids = client.search(messages_query)[:limit]
+    demisto.debug(f'Messages to fetch: {messages_uids}')
+    # only the envelope and size are fetched first, so mails that are skipped are never downloaded
+    messages_to_fetch = filter_messages_by_envelope(client, messages_uids, time_to_fetch_from, uid_to_fetch_from)
+    return messages_uids, split_messages_to_batches(messages_to_fetch)
+
+
+def iter_mails(client: IMAPClient,
+               batches: List[list],
+               include_raw_body: bool = False,
+               save_file: bool = False,
+               time_to_fetch_from: datetime = None,
+               uid_to_fetch_from: int = 1) -> Iterator[Email]:
+    """
+    Downloads the mails batch by batch, and yields the mails which were not fetched before.
+    Only the mails of the current batch are held in memory, as long as the caller doesn't keep the yielded mails.
+
+    Args:
+        client: IMAP client
+        batches: The batches of UIDs of the messages to download
+        include_raw_body: Whether to include the raw body of the mail in the incident's body
+        save_file: Whether to save the .eml file of the incident's mail
+        time_to_fetch_from: Fetch all incidents since first_fetch_time
+        uid_to_fetch_from: The email message UID to start the fetch from as offset
+
+    Returns:
+        An iterator of Email objects
+    """
+    for batch in batches:
+        for mail_id, message_data in client.fetch(batch, 'RFC822').items():
+            message_bytes = message_data.get(b'RFC822')
+            # For cases the message_bytes is returned as a string. If failed, will try to use the message_bytes returned.
+            try:
+                message_bytes = bytes(message_bytes)
+            except Exception as e:
+                demisto.debug(f"Converting data was un-successful. {mail_id=}, {message_data=}. Error: {e}")
+
+            if not message_bytes:
+                continue
+            email_message_object = Email(message_bytes, include_raw_body, save_file, mail_id)
+            if (not time_to_fetch_from or time_to_fetch_from < email_message_object.date) and \
+                    int(email_message_object.id) > int(uid_to_fetch_from):
+                yield email_message_object
+            else:
+                demisto.debug(f'Skipping {email_message_object.id} with date {email_message_object.date}. '
+                              f'uid_to_fetch_from: {uid_to_fetch_from}, first_fetch_time: {time_to_fetch_from}')
+
+
+def filter_messages_by_envelope(client: IMAPClient,
+                                messages_uids: list,
+                                time_to_fetch_from: Optional[datetime],
+                                uid_to_fetch_from: int) -> List[Tuple[int, int]]:
+    """
+    Fetches only the ENVELOPE and RFC822.SIZE of the messages, and filters out messages that would be skipped after
+    downloading them - messages with a UID that was already fetched or a date before the time to fetch from.
+    Messages without an envelope date are kept, and are checked again after they are downloaded.
+
+    Args:
+        client: IMAP client
+        messages_uids: The UIDs of the messages returned from the search
+        time_to_fetch_from: Fetch all incidents since first_fetch_time
+        uid_to_fetch_from: The email message UID to start the fetch from as offset
+
+    Returns:
+        A list of (UID, size in bytes) of the messages to download, sorted by UID
+    """
+    if not messages_uids:
+        return []
+    messages_to_fetch = []
+    for mail_id, message_data in client.fetch(messages_uids, ['ENVELOPE', 'RFC822.SIZE']).items():
+        envelope_date = getattr(message_data.get(b'ENVELOPE'), 'date', None)
+        if envelope_date and not envelope_date.tzinfo:
+            # imapclient normalises the envelope date to a naive datetime in the local time
+            envelope_date = envelope_date.astimezone(timezone.utc)
+        if int(mail_id) <= int(uid_to_fetch_from) or \
+                (time_to_fetch_from and envelope_date and envelope_date <= time_to_fetch_from):
+            demisto.debug(f'Skipping {mail_id} with envelope date {envelope_date} before downloading it. '
+                          f'uid_to_fetch_from: {uid_to_fetch_from}, first_fetch_time: {time_to_fetch_from}')
+            continue
+        messages_to_fetch.append((mail_id, int(message_data.get(b'RFC822.SIZE') or 0)))
+    return sorted(messages_to_fetch)
+
+
+def split_messages_to_batches(messages: List[Tuple[int, int]],
+                              max_batch_bytes: int = MAX_FETCH_BATCH_BYTES,
+                              max_batch_count: int = MAX_FETCH_BATCH_COUNT) -> List[list]:
+    """
+    Splits the messages to download into batches, so the full bodies held in memory at once are bounded.
+    A message larger than max_batch_bytes is downloaded in a batch of its own.
+
+    Args:
+        messages: A list of (UID, size in bytes) of the messages to download
+        max_batch_bytes: The maximum total size of the messages in a batch
+        max_batch_count: The maximum number of messages in a batch
+
+    Returns:
+        A list of batches of UIDs
+    """
+    batches: List[list] = []
+    batch: list = []
+    batch_bytes = 0
+    for mail_id, size in messages:
+        if batch and (batch_bytes + size > max_batch_bytes or len(batch) >= max_batch_count):
+            batches.append(batch)
+            batch, batch_bytes = [], 0
+        batch.append(mail_id)
+        batch_bytes += size
+    if batch:
+        batches.append(batch)
+    return batches
+
+
 def generate_search_query(time_to_fetch_from: Optional[datetime],
                           with_headers: bool,
                           permitted_from_addresses: str,
@@ -203,7 +203,7 @@ def mock_email():
         return email
 
 
-@pytest.mark.parametrize('src_data, expected', [({1: {b'RFC822': r'C:\User\u'.encode('utf-8')}}, br'C:\User\u'),
+@pytest.mark.parametrize('src_data, expected', [({3: {b'RFC822': r'C:\User\u'.encode('utf-8')}}, br'C:\User\u'),
                                                 ({2: {b'RFC822': br'C:\User\u'}}, br'C:\User\u')])
 def test_fetch_mail_gets_bytes(mocker, src_data, expected):
     """
@@ -226,3 +226,118 @@ def test_fetch_mail_gets_bytes(mocker, src_data, expected):
     mocker.patch.object(IMAPClient, '_create_IMAP4')
     fetch_mails(IMAPClient('http://example_url.com'))
     assert mail_mocker.call_args[0][0] == expected
+
+
+def local_envelope_date(*utc_date_args):
+    """
+    Returns a UTC date as imapclient returns an envelope date - a naive datetime in the local time
+    """
+    from datetime import timezone
+    return datetime(*utc_date_args, tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+
+
+def test_filter_messages_by_envelope(mocker):
+    """
+    Given:
+        Envelopes and sizes of messages returned from the search
+    When:
+        Filtering the messages before downloading them
+    Then:
+        - Messages with an already fetched UID or a date before the time to fetch from are not downloaded
+        - Messages without an envelope date are kept
+        - The accepted messages are returned with their sizes, sorted by UID
+    """
+    from MailListenerV2 import filter_messages_by_envelope
+    from imapclient.response_types import Envelope
+    from datetime import datetime, timezone
+    client = mocker.Mock()
+    client.fetch.return_value = {
+        5: {b'ENVELOPE': Envelope(local_envelope_date(2020, 8, 10, 11), b'subject', None, None, None, None, None, None,
+                                  None, None), b'RFC822.SIZE': 300},
+        2: {b'ENVELOPE': Envelope(local_envelope_date(2020, 8, 10, 11), b'subject', None, None, None, None, None, None,
+                                  None, None), b'RFC822.SIZE': 100},
+        3: {b'ENVELOPE': Envelope(local_envelope_date(2020, 8, 9, 11), b'subject', None, None, None, None, None, None,
+                                  None, None), b'RFC822.SIZE': 200},
+        4: {b'ENVELOPE': Envelope(None, b'subject', None, None, None, None, None, None, None, None),
+            b'RFC822.SIZE': 400},
+    }
+    messages = filter_messages_by_envelope(client, [2, 3, 4, 5], datetime(2020, 8, 10, tzinfo=timezone.utc), 2)
+    assert messages == [(4, 400), (5, 300)]
+    assert client.fetch.call_args[0] == ([2, 3, 4, 5], ['ENVELOPE', 'RFC822.SIZE'])
+
+
+def test_filter_messages_by_envelope_local_time(mocker):
+    """
+    Given:
+        An envelope date in a local time ahead of UTC, which is after the time to fetch from only in the local time
+    When:
+        Filtering the messages before downloading them
+    Then:
+        The envelope date is converted from the local time to UTC, and the message is not downloaded
+    """
+    import os
+    import time
+    from MailListenerV2 import filter_messages_by_envelope
+    from imapclient.response_types import Envelope
+    from datetime import timezone
+    mocker.patch.dict(os.environ, {'TZ': 'Asia/Jerusalem'})
+    time.tzset()
+    try:
+        client = mocker.Mock()
+        client.fetch.return_value = {
+            3: {b'ENVELOPE': Envelope(datetime(2020, 8, 10, 2, 30), b'subject', None, None, None, None, None, None,
+                                      None, None), b'RFC822.SIZE': 100},
+        }
+        assert filter_messages_by_envelope(client, [3], datetime(2020, 8, 10, tzinfo=timezone.utc), 2) == []
+    finally:
+        mocker.stopall()
+        time.tzset()
+
+
+def test_fetch_incidents_per_batch(mocker):
+    """
+    Given:
+        Mails to download in two batches
+    When:
+        Fetching incidents
+    Then:
+        - The incident of each mail is created before the next batch is downloaded
+        - The last UID and the processed messages are the same as when fetching all the mails at once
+    """
+    from MailListenerV2 import fetch_incidents
+    events = []
+
+    def fetch_mock(batch, _):
+        events.append(('fetch', batch))
+        return {mail_id: {b'RFC822': b'mail'} for mail_id in batch}
+
+    def email_mock(message_bytes, include_raw_body, save_file, mail_id):
+        email = mocker.Mock(id=mail_id, date=datetime.now().astimezone())
+        email.convert_to_incident.side_effect = lambda: events.append(('incident', mail_id)) or {'name': mail_id}
+        return email
+
+    client = mocker.Mock()
+    client.fetch.side_effect = fetch_mock
+    mocker.patch('MailListenerV2.search_messages', return_value=([3, 4, 5, 6], [[3, 4], [6]]))
+    mocker.patch('MailListenerV2.Email', side_effect=email_mock)
+
+    next_run, incidents = fetch_incidents(client, {'last_uid': 2}, '3 days', False, False, '', '', True, 50, False)
+
+    assert events == [('fetch', [3, 4]), ('incident', 3), ('incident', 4), ('fetch', [6]), ('incident', 6)]
+    assert incidents == [{'name': 3}, {'name': 4}, {'name': 6}]
+    assert next_run == {'last_uid': 6}
+    client.delete_messages.assert_called_once_with([3, 4, 6])
+
+
+def test_split_messages_to_batches():
+    """
+    Given:
+        Messages to download with their sizes
+    When:
+        Splitting them to batches
+    Then:
+        Each batch is bounded by the total size and the number of messages, a large message gets its own batch
+    """
+    from MailListenerV2 import split_messages_to_batches
+    messages = [(1, 40), (2, 40), (3, 150), (4, 10), (5, 10), (6, 10)]
+    assert split_messages_to_batches(messages, max_batch_bytes=100, max_batch_count=2) == [[1, 2], [3], [4, 5], [6]]
@@ -4,7 +4,7 @@ import json
 import ssl
 import threading
 from distutils.util import strtobool
-from typing import Tuple
+from typing import Iterator, Tuple
 
 import aiohttp
 import slack_sdk
@@ -55,6 +55,7 @@ OBJECTS_TO_KEYS = {
 }
 SYNC_CONTEXT = True
 PROFILING_DUMP_ROWS_LIMIT = 20
+DIRECTORY_CONTEXT_KEY = 'directory'
 
 ''' GLOBALS '''
 
@@ -87,6 +88,10 @@ CACHED_INTEGRATION_CONTEXT: dict
 CACHE_EXPIRY: float
 MIRRORING_ENABLED: bool
 LONG_RUNNING_ENABLED: bool
+DIRECTORY_SYNC_INTERVAL: int
+NEXT_DIRECTORY_SYNC: float = 0
+DIRECTORY_SYNC_FUTURE: Optional[asyncio.Future] = None
+CACHED_DIRECTORY: Tuple[str, Optional['SlackDirectory']] = ('', None)
 
 ''' HELPER FUNCTIONS '''
 
@@ -292,8 +297,8 @@ def get_user_by_name_without_caching(user_to_search: str) -> dict:
     Returns:
         A slack user object
     """
-    user = {}
-    if re.match(emailRegex, user_to_search):
+    user = SlackDirectory.from_context(get_integration_context(SYNC_CONTEXT)).find_user(user_to_search)
+    if not user and re.match(emailRegex, user_to_search):
         demisto.debug(f"Checking via API for email of {user_to_search}")
         user = get_user_by_email(user_to_search)
     return user
@@ -303,15 +308,17 @@ def get_user_by_name_with_caching(user_to_search, add_to_context):
     """
     When Disable Caching is false, we look for the user first in the context. If the user is not found, then we proceed to
     search for the user by email, if that fails, then we will search for the user using a paginated call.
+    When the directory is synced, users are found in it and the paginated call is skipped.
 
     Args:
         user_to_search: The user's email
     Returns:
         A slack user object
     """
-    user = {}
     integration_context = get_integration_context(SYNC_CONTEXT)
-    if integration_context.get('users'):
+    directory = SlackDirectory.from_context(integration_context)
+    user = directory.find_user(user_to_search)
+    if not user and integration_context.get('users'):
         demisto.debug(f"Checking in context for {user_to_search}")
         # Check if we already have the user to prevent call to users.lookupByEmail
         users = json.loads(integration_context['users'])
@@ -323,7 +330,7 @@ def get_user_by_name_with_caching(user_to_search, add_to_context):
         if user and add_to_context:
             integration_context = get_integration_context(SYNC_CONTEXT)
             add_user_to_context(user=user, integration_context=integration_context)
-    if not user:
+    if not user and not directory.is_synced:
         demisto.debug(f"Couldn't find {user_to_search} and caching is disabled. Checking API")
         user = paginated_search_for_user(user_to_search)
         demisto.debug(f"Found {user_to_search} - {user}")
@@ -379,6 +386,165 @@ def search_slack_users(users: Union[list, str]) -> list:
     return slack_users
 
 
+''' DIRECTORY '''
+
+
+class SlackDirectory:
+    """
+    An index of the workspace users and conversations, built by crawling users.list and conversations.list in the
+    background (see sync_directory), so users and conversations are found without paging the Slack API on the request
+    path. The directory is saved compactly in the integration context, users as [id, name, display_name, email,
+    real_name] lists and conversations as [id, name] lists.
+    """
+
+    def __init__(self, users: Optional[List[list]] = None, conversations: Optional[List[list]] = None,
+                 synced_at: float = 0):
+        self.users = users or []
+        self.conversations = conversations or []
+        self.synced_at = synced_at
+        # the first user in the list with a matching name, display name, email or real name wins, like return_user_filter
+        self._user_index: Dict[str, list] = {}
+        for user in self.users:
+            for user_key in user[1:]:
+                if user_key:
+                    self._user_index.setdefault(user_key.lower(), user)
+        self._conversation_index: Dict[str, str] = {}
+        for conversation_id, name in self.conversations:
+            self._conversation_index.setdefault(name.lower(), conversation_id)
+
+    @classmethod
+    def from_context(cls, integration_context: dict) -> 'SlackDirectory':
+        """
+        Loads the directory from the integration context. The parsed directory is cached in memory until the
+        directory in the context changes.
+
+        Args:
+            integration_context: The integration context.
+
+        Returns:
+            The directory, empty if it was never synced.
+        """
+        global CACHED_DIRECTORY
+        raw_directory = integration_context.get(DIRECTORY_CONTEXT_KEY) or ''
+        cached_raw_directory, cached_directory = CACHED_DIRECTORY
+        if cached_directory is None or raw_directory != cached_raw_directory:
+            directory = json.loads(raw_directory) if raw_directory else {}
+            cached_directory = cls(directory.get('users'), directory.get('conversations'), directory.get('synced_at', 0))
+            CACHED_DIRECTORY = (raw_directory, cached_directory)
+        return cached_directory
+
+    def to_context(self) -> dict:
+        return {
+            'synced_at': self.synced_at,
+            'users': self.users,
+            'conversations': self.conversations
+        }
+
+    @property
+    def is_synced(self) -> bool:
+        return bool(self.synced_at)
+
+    def find_user(self, user_to_search: str) -> dict:
+        """
+        Args:
+            user_to_search: The user's name, display name, real name or email.
+
+        Returns:
+            The user in the format of format_user_results if found, else an empty dict.
+        """
+        user = self._user_index.get(user_to_search.lower())
+        if not user:
+            return {}
+        user_id, name, display_name, email, real_name = user
+        return {
+            'name': name,
+            'id': user_id,
+            'profile': {
+                'email': email,
+                'real_name': real_name,
+                'display_name': display_name,
+            }
+        }
+
+    def find_conversation(self, conversation_to_search: str) -> dict:
+        """
+        Args:
+            conversation_to_search: The conversation name.
+
+        Returns:
+            The conversation name and ID if found, else an empty dict.
+        """
+        conversation_id = self._conversation_index.get(conversation_to_search.lower())
+        if not conversation_id:
+            return {}
+        return {'name': conversation_to_search, 'id': conversation_id}
+
+
+def paginate_slack_list(method: str, items_key: str, body: dict) -> Iterator[dict]:
+    """
+    Iterates over all the items of a paginated Slack list method.
+
+    Args:
+        method: The Slack API method, for example users.list.
+        items_key: The key of the items in the response, for example members.
+        body: The request body, without the cursor.
+    """
+    body = dict(body, limit=PAGINATED_COUNT)
+    while True:
+        response = send_slack_request_sync(CLIENT, method, http_verb='GET', body=body)
+        yield from response.get(items_key) or []
+        cursor = response.get('response_metadata', {}).get('next_cursor')
+        if not cursor:
+            break
+        body = dict(body, cursor=cursor)
+
+
+def sync_directory() -> SlackDirectory:
+    """
+    Crawls the workspace users and conversations and saves them as the directory in the integration context.
+
+    Returns:
+        The synced directory.
+    """
+    demisto.debug('Syncing the Slack directory')
+    users = []
+    for member in paginate_slack_list('users.list', 'members', {}):
+        profile = member.get('profile', {})
+        users.append([member.get('id'), member.get('name') or '', profile.get('display_name') or '',
+                      profile.get('email') or '', profile.get('real_name') or ''])
+    conversations = []
+    conversations_body = {'types': 'private_channel,public_channel', 'exclude_archived': True}
+    for conversation in paginate_slack_list('conversations.list', 'channels', conversations_body):
+        conversations.append([conversation.get('id'), conversation.get('name') or ''])
+
+    directory = SlackDirectory(users, conversations, synced_at=time.time())
+    set_to_integration_context_with_retries({DIRECTORY_CONTEXT_KEY: directory.to_context()}, OBJECTS_TO_KEYS,
+                                            SYNC_CONTEXT)
+    demisto.debug(f'Synced the Slack directory with {len(users)} users and {len(conversations)} conversations')
+    return directory
+
+
+def sync_directory_in_background():
+    """
+    Starts syncing the directory in the default executor of the loop, if syncing is enabled, it is time to sync,
+    and a previous sync is not running.
+    """
+    global NEXT_DIRECTORY_SYNC, DIRECTORY_SYNC_FUTURE
+    if not DIRECTORY_SYNC_INTERVAL or time.time() < NEXT_DIRECTORY_SYNC:
+        return
+    if DIRECTORY_SYNC_FUTURE and not DIRECTORY_SYNC_FUTURE.done():
+        return
+
+    def sync():
+        try:
+            sync_directory()
+        except Exception as e:
+            demisto.error(f'Failed syncing the Slack directory: {e}')
+
+    NEXT_DIRECTORY_SYNC = time.time() + DIRECTORY_SYNC_INTERVAL * 60
+    DIRECTORY_SYNC_FUTURE = asyncio.get_running_loop().run_in_executor(None, sync)
+
+
 def find_mirror_by_investigation() -> dict:
     """
     Finds a mirrored channel by the mirrored investigation
@@ -783,6 +949,7 @@ async def long_running_loop():
             if MIRRORING_ENABLED:
                 check_for_mirrors()
             check_for_unanswered_questions()
+            sync_directory_in_background()
             await asyncio.sleep(15)
         except requests.exceptions.ConnectionError as e:
             error = f'Could not connect to the Slack endpoint: {str(e)}'
@@ -1680,9 +1847,10 @@ def get_conversation_by_name(conversation_name: str) -> dict:
     """
     Get a slack conversation by its name. Order of operation is:
     1. Check the COMMON_CHANNEL parameter for the conversation
-    2. Check the integration context for the conversation
-    3. If DISABLE_CACHING is false, then we will paginate the api
-    4. If DISABLE_CACHING is false, then we will save the results of the pagination to context
+    2. Check the synced directory for the conversation
+    3. Check the integration context for the conversation
+    4. If DISABLE_CACHING is false and the directory was not synced, then we will paginate the api
+    5. If DISABLE_CACHING is false, then we will save the results of the pagination to context
 
     Args:
         conversation_name: The conversation name
@@ -1697,13 +1865,17 @@ def get_conversation_by_name(conversation_name: str) -> dict:
     if len(COMMON_CHANNELS) > 0:
         conversation = search_conversation_in_params(conversation_to_search)
 
+    directory = SlackDirectory.from_context(get_integration_context(SYNC_CONTEXT))
+    if not conversation:
+        conversation = directory.find_conversation(conversation_to_search)
+
     if not DISABLE_CACHING:
         # Find conversation in the cache if DISABLE_CACHING is false.
         if not conversation:
             conversation = search_conversation_in_context(conversation_to_search)
 
-        # Find conversation in the api if DISABLE_CACHING is false.
-        if not conversation:
+        # Find conversation in the api if DISABLE_CACHING is false and the directory was not synced.
+        if not conversation and not directory.is_synced:
             conversation = get_conversation_from_api_paginated(conversation_to_search)
             # Save conversation to cache
             save_conversation_to_context(conversation)
@@ -2499,6 +2671,7 @@ def init_globals(command_name: str = ''):
     global BOT_NAME, BOT_ICON_URL, MAX_LIMIT_TIME, PAGINATED_COUNT, SSL_CONTEXT, APP_TOKEN, ASYNC_CLIENT
     global DEFAULT_PERMITTED_NOTIFICATION_TYPES, CUSTOM_PERMITTED_NOTIFICATION_TYPES, PERMITTED_NOTIFICATION_TYPES
     global COMMON_CHANNELS, DISABLE_CACHING, CHANNEL_NOT_FOUND_ERROR_MSG, LONG_RUNNING_ENABLED
+    global DIRECTORY_SYNC_INTERVAL, NEXT_DIRECTORY_SYNC
 
     VERIFY_CERT = not demisto.params().get('unsecure', False)
     if not VERIFY_CERT:
@@ -2535,6 +2708,7 @@ def init_globals(command_name: str = ''):
     else:
         COMMON_CHANNELS = {}
     DISABLE_CACHING = demisto.params().get('disable_caching', False)
+    DIRECTORY_SYNC_INTERVAL = int(demisto.params().get('directory_sync_interval') or 0)
 
     # Formats the error message for the 'Channel Not Found' errors
     error_str = 'The channel was not found'
@@ -2573,6 +2747,10 @@ def init_globals(command_name: str = ''):
         CACHE_EXPIRY = next_expiry_time()
         CACHED_INTEGRATION_CONTEXT = get_integration_context(SYNC_CONTEXT)
 
+        # Sync the directory when the last sync, possibly made before a restart, is older than the interval
+        NEXT_DIRECTORY_SYNC = SlackDirectory.from_context(CACHED_INTEGRATION_CONTEXT).synced_at \
+            + DIRECTORY_SYNC_INTERVAL * 60
+
 
 def print_thread_dump():
     demisto.info(f'current thread: {threading.current_thread().name}')
@@ -2592,6 +2770,12 @@ def loop_info(loop: asyncio.AbstractEventLoop):
     return info
 
 
+def slack_sync_directory():
+    directory = sync_directory()
+    demisto.results(f'Synced the Slack directory with {len(directory.users)} users and '
+                    f'{len(directory.conversations)} conversations.')
+
+
 def slack_get_integration_context():
     integration_context = get_integration_context()
     return_results(fileResult('slack_integration_context.json', json.dumps(integration_context), EntryType.ENTRY_INFO_FILE))
@@ -2619,6 +2803,7 @@ def main() -> None:
         'slack-rename-channel': rename_channel,
         'slack-get-user-details': get_user,
         'slack-get-integration-context': slack_get_integration_context,
+        'slack-sync-directory': slack_sync_directory,
         'slack-edit-message': slack_edit_message,
         'slack-pin-message': pin_message
     }
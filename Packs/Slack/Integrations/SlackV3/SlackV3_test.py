@@ -1,4 +1,5 @@
 import json as js
+import asyncio
 import threading
 import io
 
@@ -3326,6 +3327,77 @@ def test_get_conversation_by_name_paging(mocker):
     assert slack_sdk.WebClient.api_call.call_count == 2
 
 
+def test_sync_directory_and_lookups(mocker):
+    """
+    Given:
+        A workspace with users and conversations spread over two pages
+    When:
+        Syncing the directory, and then searching for users and conversations
+    Then:
+        Assert the directory is saved in the integration context
+        Assert users and conversations are found in the directory by any of their names, without calling the API
+        Assert a missing user or conversation doesn't trigger paging through the API
+    """
+    import SlackV3
+
+    def api_call(method: str, http_verb: str = 'POST', file: str = None, params=None, json=None, data=None):
+        if method == 'users.list':
+            if 'cursor' not in params:
+                return {'members': js.loads(USERS), 'response_metadata': {'next_cursor': 'cursor'}}
+            return {'members': [{'id': 'U248918AB', 'name': 'alexios', 'profile': {'email': 'alexios@sparta.com'}}]}
+        if method == 'conversations.list':
+            return {'channels': [{'id': 'C248918AB', 'name': 'Lulz'}]}
+
+    mocker.patch.object(demisto, 'getIntegrationContext', side_effect=get_integration_context)
+    mocker.patch.object(demisto, 'setIntegrationContext', side_effect=set_integration_context)
+    mocker.patch.object(slack_sdk.WebClient, 'api_call', side_effect=api_call)
+
+    directory = SlackV3.sync_directory()
+
+    assert slack_sdk.WebClient.api_call.call_count == 3
+    assert len(directory.users) == len(js.loads(USERS)) + 1
+    saved_directory = js.loads(get_integration_context()['directory'])
+    assert saved_directory['synced_at'] == directory.synced_at
+    assert saved_directory['conversations'] == [['C248918AB', 'Lulz']]
+
+    slack_sdk.WebClient.api_call.reset_mock()
+    assert SlackV3.get_user_by_name('ALEXIOS@sparta.com')['id'] == 'U248918AB'
+    assert SlackV3.get_user_by_name('alexios')['profile']['email'] == 'alexios@sparta.com'
+    assert SlackV3.get_conversation_by_name('lulz')['id'] == 'C248918AB'
+    assert SlackV3.get_user_by_name('perikles') == {}
+    assert SlackV3.get_conversation_by_name('unknown') == {}
+    assert slack_sdk.WebClient.api_call.call_count == 0
+
+
+def test_sync_directory_in_background(mocker):
+    """
+    Given:
+        A directory sync interval of 10 minutes
+    When:
+        Checking whether to sync the directory, before and after the next sync time
+    Then:
+        Assert the directory is synced only when the sync time has passed, in the executor of the loop
+    """
+    import SlackV3
+    sync_mock = mocker.patch.object(SlackV3, 'sync_directory')
+    mocker.patch.object(SlackV3, 'DIRECTORY_SYNC_INTERVAL', 10)
+    mocker.patch.object(SlackV3, 'DIRECTORY_SYNC_FUTURE', None)
+    mocker.patch.object(SlackV3, 'NEXT_DIRECTORY_SYNC', time.time() + 60)
+
+    async def check_sync():
+        SlackV3.sync_directory_in_background()
+        assert SlackV3.DIRECTORY_SYNC_FUTURE is None
+
+        SlackV3.NEXT_DIRECTORY_SYNC = time.time() - 1
+        SlackV3.sync_directory_in_background()
+        await SlackV3.DIRECTORY_SYNC_FUTURE
+
+    asyncio.run(check_sync())
+
+    assert sync_mock.call_count == 1
+    assert SlackV3.NEXT_DIRECTORY_SYNC > time.time() + 9 * 60
+
+
 def test_send_file_no_args_investigation(mocker):
     import SlackV3
 
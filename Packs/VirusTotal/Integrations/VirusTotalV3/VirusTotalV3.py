@@ -3,7 +3,11 @@ An integration module for the Virus Total v3 API.
 API Documentation:
     https://developers.virustotal.com/v3.0/reference
 """
+import copy
+import threading
+import time
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Callable
 
 from dateparser import parse
@@ -84,17 +88,129 @@ RELATIONSHIP_TYPE = {
 }
 
 
+# region Quota
+
+MAX_QUOTA_RETRIES = 3
+QUOTA_BACKOFF_SECONDS = 5
+QUOTA_CONTEXT_KEY = 'quota'
+
+
+class QuotaLimiter:
+    """
+    Keeps the API calls of the instance within its quota.
+    The calls per minute are limited by a token bucket, whose rate is halved whenever the API responds that
+    the quota was exceeded (429), and recovers with the successful calls.
+
+    Attributes:
+        rate_limit: The maximum number of API calls per minute, not limited if not set.
+        daily_quota: The maximum number of API calls per day, not limited if not set.
+    """
+    rate_limit: Optional[int]
+    daily_quota: Optional[int]
+
+    def __init__(self, rate_limit: Optional[int] = None, daily_quota: Optional[int] = None):
+        self.rate_limit = rate_limit
+        self.daily_quota = daily_quota
+        self.rate = float(rate_limit) if rate_limit else None
+        self.tokens = self.rate or 0.0
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.exhausted = False
+        self.day = datetime.utcnow().strftime('%Y-%m-%d')
+        self.calls_today = 0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def get_daily_usage(self) -> int:
+        quota = get_integration_context().get(QUOTA_CONTEXT_KEY) or {}
+        return quota.get('calls', 0) if quota.get('day') == self.day else 0
+
+    def load_daily_usage(self):
+        """Loads the number of API calls made today by the instance"""
+        if self.daily_quota:
+            self.calls_today = self.get_daily_usage()
+
+    def save_daily_usage(self):
+        """Adds the API calls of this run to the number of API calls made today by the instance"""
+        if self.daily_quota and self.calls:
+            set_to_integration_context_with_retries(
+                {QUOTA_CONTEXT_KEY: {'day': self.day, 'calls': self.get_daily_usage() + self.calls}}
+            )
+
+    def acquire(self):
+        """Waits until an API call is allowed by the quota
+
+        Raises:
+            DemistoException: The quota was exhausted.
+        """
+        while True:
+            with self._lock:
+                if self.exhausted or (self.daily_quota and self.calls_today >= self.daily_quota):
+                    self.exhausted = True
+                    raise DemistoException('The API quota of the instance was exceeded.')
+                now = time.monotonic()
+                wait = self.paused_until - now
+                if self.rate:
+                    self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate / 60)
+                    self.updated = now
+                    if self.tokens < 1:
+                        wait = max(wait, (1 - self.tokens) * 60 / self.rate)
+                if wait <= 0:
+                    self.tokens -= 1
+                    self.calls_today += 1
+                    self.calls += 1
+                    return
+            time.sleep(wait)
+
+    def succeeded(self):
+        """Recovers the rate after a successful API call"""
+        with self._lock:
+            if self.rate and self.rate_limit and self.rate < self.rate_limit:
+                self.rate = min(float(self.rate_limit), self.rate + 1)
+
+    def backoff(self, attempt: int, retry_after: Optional[str] = None):
+        """Pauses the API calls, and slows down the rate after the API responded that the quota was exceeded
+
+        Args:
+            attempt: The number of the retries of the call.
+            retry_after: The Retry-After header of the response.
+        """
+        delay = int(retry_after) if retry_after and retry_after.isdigit() else QUOTA_BACKOFF_SECONDS * 2 ** attempt
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + delay)
+            if self.rate:
+                self.rate = max(1.0, self.rate / 2)
+                self.tokens = min(self.tokens, 0.0)
+
+    def exhaust(self):
+        """Fails the next API calls, after a call still exceeded the quota when it was retried"""
+        with self._lock:
+            self.exhausted = True
+
+
+# endregion
+
+
 class Client(BaseClient):
     """
     Attributes:
         is_premium: Shall use the premium api (mostly for reputation commands)
+        concurrency: The maximum number of indicators to look up concurrently in the reputation commands
+        quota: Keeps the API calls within the quota of the instance
     """
     is_premium: bool
     reliability: DBotScoreReliability
+    concurrency: int
+    quota: QuotaLimiter
 
     def __init__(self, params: dict):
         self.is_premium = argToBoolean(params['is_premium_api'])
         self.reliability = DBotScoreReliability.get_dbot_score_reliability_from_str(params['feedReliability'])
+        self.concurrency = arg_to_number(params.get('concurrency'), arg_name='Concurrent Lookups') or 1
+        self.quota = QuotaLimiter(
+            rate_limit=arg_to_number(params.get('rate_limit'), arg_name='API Requests per Minute'),
+            daily_quota=arg_to_number(params.get('daily_quota'), arg_name='API Requests per Day')
+        )
         super().__init__(
             'https://www.virustotal.com/api/v3/',
             verify=not argToBoolean(params.get('insecure')),
@@ -102,6 +218,28 @@ class Client(BaseClient):
             headers={'x-apikey': params['credentials']['password']}
         )
 
+    def _http_request(self, method: str, *args, **kwargs) -> Any:
+        """
+        Calls the API within the quota of the instance.
+        GET calls which exceeded the quota are retried after a backoff.
+        """
+        for attempt in range(MAX_QUOTA_RETRIES + 1):
+            self.quota.acquire()
+            try:
+                response = super()._http_request(method, *args, **kwargs)
+            except DemistoException as exception:
+                res = exception.res
+                if method != 'GET' or res is None or res.status_code != 429:
+                    raise
+                if attempt == MAX_QUOTA_RETRIES:
+                    self.quota.exhaust()
+                    raise
+                demisto.debug(f'The API quota was exceeded, retrying in attempt {attempt + 1}.')
+                self.quota.backoff(attempt, res.headers.get('Retry-After'))
+                continue
+            self.quota.succeeded()
+            return response
+
     # region Reputation calls
 
     def ip(self, ip: str, relationships: str = '') -> dict:
@@ -601,6 +739,13 @@ class ScoreCalculator:
         """
         return '\n'.join(self.logs)
 
+    def copy(self) -> 'ScoreCalculator':
+        """Returns a copy of the calculator with its own logs, to calculate the score of an indicator
+        """
+        score_calculator = copy.copy(self)
+        score_calculator.logs = list()
+        return score_calculator
+
     def is_suspicious_by_threshold(self, analysis_stats: dict, threshold: int) -> bool:
         """Determines whatever the indicator suspicious by threshold.
         if number of malicious >= threshold /2 ||
@@ -1528,25 +1673,41 @@ def encode_url_to_base64(url: str) -> str:
 # region Reputation commands
 
 
+def run_concurrently(client: Client, lookup: Callable[[str], Optional[CommandResults]],
+                     values: List[str]) -> List[CommandResults]:
+    """Looks up the values up to the concurrency of the instance, and returns the results in the order of the values.
+    The API calls of all the lookups are kept within the quota of the instance by the client.
+    """
+    if client.concurrency > 1 and len(values) > 1:
+        # the lookups log and call the server from the worker threads
+        support_multithreading()
+        with ThreadPoolExecutor(max_workers=min(client.concurrency, len(values))) as executor:
+            results = list(executor.map(lookup, values))
+    else:
+        results = [lookup(value) for value in values]
+    return [result for result in results if result]
+
+
 def ip_command(client: Client, score_calculator: ScoreCalculator, args: dict, relationships: str) -> List[CommandResults]:
     """
     1 API Call for regular
     1-4 API Calls for premium subscriptions
     """
     ips = argToList(args['ip'])
-    results: List[CommandResults] = list()
+    extended_data = argToBoolean(args.get('extended_data'))
     for ip in ips:
         raise_if_ip_not_valid(ip)
+
+    def lookup(ip: str) -> Optional[CommandResults]:
         try:
             raw_response = client.ip(ip, relationships)
         except Exception as exception:
             # If anything happens, just keep going
             demisto.debug(f'Could not process IP: "{ip}"\n {str(exception)}')
-            continue
-        results.append(
-            build_ip_output(client, score_calculator, ip, raw_response, argToBoolean(args.get('extended_data')))
-        )
-    return results
+            return None
+        return build_ip_output(client, score_calculator.copy(), ip, raw_response, extended_data)
+
+    return run_concurrently(client, lookup, ips)
 
 
 def file_command(client: Client, score_calculator: ScoreCalculator, args: dict, relationships: str) -> List[CommandResults]:
@@ -1555,17 +1716,18 @@ def file_command(client: Client, score_calculator: ScoreCalculator, args: dict,
     """
     files = argToList(args['file'])
     extended_data = argToBoolean(args.get('extended_data'))
-    results: List[CommandResults] = list()
     for file in files:
         raise_if_hash_not_valid(file)
+
+    def lookup(file: str) -> Optional[CommandResults]:
         try:
             raw_response = client.file(file, relationships)
-            results.append(build_file_output(client, score_calculator, file, raw_response, extended_data))
+            return build_file_output(client, score_calculator.copy(), file, raw_response, extended_data)
         except Exception as exc:
             # If anything happens, just keep going
-            results.append(CommandResults(readable_output=f'Could not process file: "{file}"\n {str(exc)}'))
+            return CommandResults(readable_output=f'Could not process file: "{file}"\n {str(exc)}')
 
-    return results
+    return run_concurrently(client, lookup, files)
 
 
 def url_command(client: Client, score_calculator: ScoreCalculator, args: dict, relationships: str) -> List[CommandResults]:
@@ -1575,8 +1737,8 @@ def url_command(client: Client, score_calculator: ScoreCalculator, args: dict, r
     """
     urls = argToList(args['url'])
     extended_data = argToBoolean(args.get('extended_data'))
-    results: List[CommandResults] = list()
-    for url in urls:
+
+    def lookup(url: str) -> Optional[CommandResults]:
         try:
             raw_response = client.url(
                 url, relationships
@@ -1584,9 +1746,10 @@ def url_command(client: Client, score_calculator: ScoreCalculator, args: dict, r
         except Exception as exception:
             # If anything happens, just keep going
             demisto.debug(f'Could not process URL: "{url}".\n {str(exception)}')
-            continue
-        results.append(build_url_output(client, score_calculator, url, raw_response, extended_data))
-    return results
+            return None
+        return build_url_output(client, score_calculator.copy(), url, raw_response, extended_data)
+
+    return run_concurrently(client, lookup, urls)
 
 
 def domain_command(client: Client, score_calculator: ScoreCalculator, args: dict, relationships: str) -> List[CommandResults]:
@@ -1595,18 +1758,18 @@ def domain_command(client: Client, score_calculator: ScoreCalculator, args: dict
     1-4 API Calls for premium subscriptions
     """
     domains = argToList(args['domain'])
-    results: List[CommandResults] = list()
-    for domain in domains:
+    extended_data = argToBoolean(args.get('extended_data'))
+
+    def lookup(domain: str) -> Optional[CommandResults]:
         try:
             raw_response = client.domain(domain, relationships)
         except Exception as exception:
             # If anything happens, just keep going
             demisto.debug(f'Could not process domain: "{domain}"\n {str(exception)}')
-            continue
-        results.append(
-            build_domain_output(client, score_calculator, domain, raw_response, argToBoolean(args.get('extended_data')))
-        )
-    return results
+            return None
+        return build_domain_output(client, score_calculator.copy(), domain, raw_response, extended_data)
+
+    return run_concurrently(client, lookup, domains)
 
 
 # endregion
@@ -2074,42 +2237,46 @@ def main(params: dict, args: dict, command: str):
     file_relationships = (','.join(argToList(params.get('file_relationships')))).replace('* ', '').replace(" ", "_")
 
     demisto.debug(f'Command called {command}')
-    if command == 'test-module':
-        results = check_module(client)
-    elif command == 'file':
-        results = file_command(client, score_calculator, args, file_relationships)
-    elif command == 'ip':
-        results = ip_command(client, score_calculator, args, ip_relationships)
-    elif command == 'url':
-        results = url_command(client, score_calculator, args, url_relationships)
-    elif command == 'domain':
-        results = domain_command(client, score_calculator, args, domain_relationships)
-    elif command == f'{COMMAND_PREFIX}-file-sandbox-report':
-        results = file_sandbox_report_command(client, args)
-    elif command == f'{COMMAND_PREFIX}-passive-dns-data':
-        results = passive_dns_data(client, args)
-    elif command == f'{COMMAND_PREFIX}-comments-get':
-        results = get_comments_command(client, args)
-    elif command == f'{COMMAND_PREFIX}-comments-add':
-        results = add_comments_command(client, args)
-    elif command == f'{COMMAND_PREFIX}-comments-get-by-id':
-        results = get_comments_by_id_command(client, args)
-    elif command == f'{COMMAND_PREFIX}-comments-delete':
-        results = delete_comment(client, args)
-    elif command == 'url-scan':
-        results = scan_url_command(client, args)
-    elif command == 'file-scan':
-        results = file_scan(client, args)
-    elif command == 'file-rescan':
-        results = file_rescan_command(client, args)
-    elif command == f'{COMMAND_PREFIX}-file-scan-upload-url':
-        results = get_upload_url(client)
-    elif command == f'{COMMAND_PREFIX}-search':
-        results = search_command(client, args)
-    elif command == f'{COMMAND_PREFIX}-analysis-get':
-        results = get_analysis_command(client, args)
-    else:
-        raise NotImplementedError(f'Command {command} not implemented')
+    client.quota.load_daily_usage()
+    try:
+        if command == 'test-module':
+            results = check_module(client)
+        elif command == 'file':
+            results = file_command(client, score_calculator, args, file_relationships)
+        elif command == 'ip':
+            results = ip_command(client, score_calculator, args, ip_relationships)
+        elif command == 'url':
+            results = url_command(client, score_calculator, args, url_relationships)
+        elif command == 'domain':
+            results = domain_command(client, score_calculator, args, domain_relationships)
+        elif command == f'{COMMAND_PREFIX}-file-sandbox-report':
+            results = file_sandbox_report_command(client, args)
+        elif command == f'{COMMAND_PREFIX}-passive-dns-data':
+            results = passive_dns_data(client, args)
+        elif command == f'{COMMAND_PREFIX}-comments-get':
+            results = get_comments_command(client, args)
+        elif command == f'{COMMAND_PREFIX}-comments-add':
+            results = add_comments_command(client, args)
+        elif command == f'{COMMAND_PREFIX}-comments-get-by-id':
+            results = get_comments_by_id_command(client, args)
+        elif command == f'{COMMAND_PREFIX}-comments-delete':
+            results = delete_comment(client, args)
+        elif command == 'url-scan':
+            results = scan_url_command(client, args)
+        elif command == 'file-scan':
+            results = file_scan(client, args)
+        elif command == 'file-rescan':
+            results = file_rescan_command(client, args)
+        elif command == f'{COMMAND_PREFIX}-file-scan-upload-url':
+            results = get_upload_url(client)
+        elif command == f'{COMMAND_PREFIX}-search':
+            results = search_command(client, args)
+        elif command == f'{COMMAND_PREFIX}-analysis-get':
+            results = get_analysis_command(client, args)
+        else:
+            raise NotImplementedError(f'Command {command} not implemented')
+    finally:
+        client.quota.save_daily_usage()
     return_results(results)
 
 
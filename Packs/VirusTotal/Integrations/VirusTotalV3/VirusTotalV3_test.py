@@ -7,7 +7,7 @@ from VirusTotalV3 import (ScoreCalculator, encode_to_base64,
                           get_working_id, raise_if_hash_not_valid,
                           raise_if_ip_not_valid, create_relationships, get_whois)
 
-from CommonServerPython import DemistoException
+from CommonServerPython import CommandResults, DemistoException
 import demistomock as demisto
 
 INTEGRATION_NAME = 'VirusTotal'
@@ -200,3 +200,136 @@ def test_get_whois_unexpected_value():
     - Validate empty dict is returned
     """
     assert get_whois('g. [Organization] Reserved Domain Name\nl. [Organization Type] Reserved Domain Name') == dict()
+
+
+class TestQuota:
+    """Tests the quota of the API calls"""
+
+    @staticmethod
+    def get_client(**params):
+        from VirusTotalV3 import Client
+        return Client({
+            'is_premium_api': 'false',
+            'feedReliability': 'C - Fairly reliable',
+            'credentials': {'password': 'key'},
+            'insecure': 'false',
+            'proxy': 'false',
+            **params
+        })
+
+    def test_rate_limit(self, mocker):
+        """
+        Given:
+        - A quota of 2 API calls per minute.
+
+        When:
+        - Making 3 API calls.
+
+        Then:
+        - The third call waits until a token is refilled.
+        """
+        from VirusTotalV3 import QuotaLimiter
+        now = [0.0]
+        mocker.patch('VirusTotalV3.time.monotonic', side_effect=lambda: now[0])
+        sleep_mock = mocker.patch('VirusTotalV3.time.sleep', side_effect=lambda seconds: now.__setitem__(0, now[0] + seconds))
+        quota = QuotaLimiter(rate_limit=2)
+        for _ in range(3):
+            quota.acquire()
+        sleep_mock.assert_called_once_with(30.0)
+
+    def test_daily_quota(self, mocker):
+        """
+        Given:
+        - A daily quota of 3 API calls, 2 of them were already made today.
+
+        When:
+        - Making 2 API calls.
+
+        Then:
+        - The second call fails, and the calls of the run are added to the daily usage.
+        """
+        from VirusTotalV3 import QuotaLimiter
+        quota = QuotaLimiter(daily_quota=3)
+        mocker.patch('VirusTotalV3.get_integration_context', return_value={'quota': {'day': quota.day, 'calls': 2}})
+        set_context_mock = mocker.patch('VirusTotalV3.set_to_integration_context_with_retries')
+        quota.load_daily_usage()
+        quota.acquire()
+        with pytest.raises(DemistoException, match='quota'):
+            quota.acquire()
+        quota.save_daily_usage()
+        set_context_mock.assert_called_once_with({'quota': {'day': quota.day, 'calls': 3}})
+
+    def test_retry_exceeded_quota(self, mocker, requests_mock):
+        """
+        Given:
+        - An API which responds that the quota was exceeded, and then succeeds.
+
+        When:
+        - Getting a file, and then getting a file from an API which keeps exceeding the quota.
+
+        Then:
+        - The first call is retried after the Retry-After delay and succeeds.
+        - The second call fails after the retries, and the next calls fail without calling the API.
+        """
+        from VirusTotalV3 import MAX_QUOTA_RETRIES
+        now = [0.0]
+        mocker.patch('VirusTotalV3.time.monotonic', side_effect=lambda: now[0])
+        sleep_mock = mocker.patch('VirusTotalV3.time.sleep', side_effect=lambda seconds: now.__setitem__(0, now[0] + seconds))
+        client = self.get_client(rate_limit='100')
+        url = 'https://www.virustotal.com/api/v3/files/hash?relationships='
+        requests_mock.get(url, [{'status_code': 429, 'headers': {'Retry-After': '7'}, 'json': {}},
+                                {'status_code': 200, 'json': {'data': {}}}])
+        assert client.file('hash') == {'data': {}}
+        assert sleep_mock.call_args_list[0][0][0] == 7
+        assert client.quota.rate == 51
+
+        requests_mock.get(url, status_code=429, json={})
+        with pytest.raises(DemistoException):
+            client.file('hash')
+        assert requests_mock.call_count == 2 + MAX_QUOTA_RETRIES + 1
+        with pytest.raises(DemistoException, match='quota'):
+            client.file('hash')
+        assert requests_mock.call_count == 2 + MAX_QUOTA_RETRIES + 1
+
+
+def test_file_command_concurrently(mocker):
+    """
+    Given:
+    - An instance with 4 concurrent lookups, and several file hashes, one of them fails.
+
+    When:
+    - Running the file command.
+
+    Then:
+    - The results are returned in the order of the hashes.
+    - Each lookup uses its own score calculator.
+    - The calls to the server are locked for the worker threads.
+    """
+    from VirusTotalV3 import file_command
+    hashes = [f'{i:032x}' for i in range(10)]
+    client = TestQuota.get_client(concurrency='4')
+    TestScoreCalculator.setup_class()
+    score_calculator = TestScoreCalculator.score_calculator
+
+    def file_mock(file, relationships):
+        if file == hashes[3]:
+            raise DemistoException('not found')
+        return {'data': {'id': file}}
+
+    calculators = []
+
+    def build_file_output_mock(client, score_calculator, file, raw_response, extended_data):
+        calculators.append(score_calculator)
+        return CommandResults(readable_output=raw_response['data']['id'])
+
+    mocker.patch.object(client, 'file', side_effect=file_mock)
+    mocker.patch('VirusTotalV3.build_file_output', side_effect=build_file_output_mock)
+    support_multithreading_mock = mocker.patch('VirusTotalV3.support_multithreading')
+    results = file_command(client, score_calculator, {'file': ','.join(hashes), 'extended_data': 'false'}, '')
+
+    assert [result.readable_output for result in results[:3]] == hashes[:3]
+    assert 'Could not process file' in results[3].readable_output
+    assert [result.readable_output for result in results[4:]] == hashes[4:]
+    assert len({id(calculator) for calculator in calculators}) == 9
+    assert score_calculator not in calculators
+    support_multithreading_mock.assert_called_once()
@@ -7,8 +7,13 @@ import sys
 from codecs import encode, decode
 import socks
 import errno
+import threading
+import time
 
 SHOULD_ERROR = demisto.params().get('with_error', False)
+MAX_CONCURRENT_LOOKUPS = int(demisto.params().get('max_concurrent_lookups') or 10)
+MAX_REQUESTS_PER_SERVER = int(demisto.params().get('max_requests_per_server') or 3)
+RESPONSES_CACHE_TTL = 3600
 
 # flake8: noqa
 
@@ -7126,6 +7131,44 @@ dble_ext_str = "chirurgiens-dentistes.fr,in-addr.arpa,uk.net,za.org,mod.uk,org.z
 dble_ext = dble_ext_str.split(",")
 
 
+class ResponsesCache(object):
+    """
+    Caches the responses of the whois servers by the server and the query, for RESPONSES_CACHE_TTL seconds,
+    so that referral chains and contact handles which are shared by several lookups are queried once.
+    """
+
+    def __init__(self, ttl=RESPONSES_CACHE_TTL):
+        self.ttl = ttl
+        self.responses = {}  # type: dict
+        self.lock = threading.Lock()
+
+    def get(self, server, query):
+        with self.lock:
+            expires, response = self.responses.get((server, query), (0, None))
+        return response if expires > time.time() else None
+
+    def set(self, server, query, response):
+        with self.lock:
+            self.responses[(server, query)] = (time.time() + self.ttl, response)
+
+    def clear(self):
+        with self.lock:
+            self.responses.clear()
+
+
+responses_cache = ResponsesCache()
+server_semaphores = {}  # type: dict
+server_semaphores_lock = threading.Lock()
+
+
+def get_server_semaphore(server):
+    """Gets the semaphore which limits the concurrent requests to a whois server to MAX_REQUESTS_PER_SERVER."""
+    with server_semaphores_lock:
+        if server not in server_semaphores:
+            server_semaphores[server] = threading.BoundedSemaphore(MAX_REQUESTS_PER_SERVER)
+        return server_semaphores[server]
+
+
 def get_whois_raw(domain, server="", previous=None, rfc3490=True, never_cut=False, with_server_list=False,
                   server_list=None, is_refer_server=False):
     previous = previous or []
@@ -7167,21 +7210,25 @@ def get_whois_raw(domain, server="", previous=None, rfc3490=True, never_cut=Fals
         request_domain = "=%s" % domain  # Avoid partial matches
     else:
         request_domain = domain
-    # The following loop handles errno 104 - "connection reset by peer" by retry whois_request with the same arguments.
-    # If the request fails due to other cause - there will not be another try
-    for i in range(0, 3):
-        try:
-            response = whois_request(request_domain, target_server, is_refer_server=is_refer_server)
-        except socket.error as err:
-            if err.errno == errno.ECONNRESET:
-                continue
-            else:
-                raise
-        break
-    # Executed only if the for loop ran to the full
-    # (3 tries led to errno.ECONNRESET)
-    else:
-        raise WhoisException('(104) Connection Reset By Peer')
+    response = responses_cache.get(target_server, request_domain)
+    if response is None:
+        # The following loop handles errno 104 - "connection reset by peer" by retry whois_request with the same
+        # arguments. If the request fails due to other cause - there will not be another try
+        for i in range(0, 3):
+            try:
+                response = whois_request(request_domain, target_server, is_refer_server=is_refer_server)
+            except socket.error as err:
+                if err.errno == errno.ECONNRESET:
+                    continue
+                else:
+                    raise
+            break
+        # Executed only if the for loop ran to the full
+        # (3 tries led to errno.ECONNRESET)
+        else:
+            raise WhoisException('(104) Connection Reset By Peer')
+        if response is not None:
+            responses_cache.set(target_server, request_domain, response)
 
     if never_cut:
         # If the caller has requested to 'never cut' responses, he will get the original response from the server (
@@ -7254,6 +7301,11 @@ def get_root_server(domain):
 
 
 def whois_request(domain, server, port=43, is_refer_server=False):
+    with get_server_semaphore(server):
+        return whois_request_to_server(domain, server, port, is_refer_server)
+
+
+def whois_request_to_server(domain, server, port=43, is_refer_server=False):
     sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     try:
         sock.connect((server, port))
@@ -7598,10 +7650,8 @@ nic_contact_references = {
 # matching positions. The workaround is to use \S.* instead of .+, but in the interest of keeping the regexes
 # consistent and compact, it's more practical to do this (predictable) conversion on runtime.
 # FIXME: This breaks on NIC contact regex for nic.at. Why?
-registrant_regexes = [preprocess_regex(regex) for regex in registrant_regexes]
-tech_contact_regexes = [preprocess_regex(regex) for regex in tech_contact_regexes]
-admin_contact_regexes = [preprocess_regex(regex) for regex in admin_contact_regexes]
-billing_contact_regexes = [preprocess_regex(regex) for regex in billing_contact_regexes]
+# The regexes are preprocessed and compiled by compile_regexes on first use, so that commands which do not parse
+# whois responses don't pay for it.
 
 nic_contact_regexes = [
     "personname:\s*(?P<name>.+)\norganization:\s*(?P<organization>.+)\nstreet address:\s*(?P<street>.+)\npostal code:\s*(?P<postalcode>.+)\ncity:\s*(?P<city>.+)\ncountry:\s*(?P<country>.+)\n(?:phone:\s*(?P<phone>.+)\n)?(?:fax-no:\s*(?P<fax>.+)\n)?(?:e-mail:\s*(?P<email>.+)\n)?nic-hdl:\s*(?P<handle>.+)\nchanged:\s*(?P<changedate>.+)",
@@ -7642,30 +7692,50 @@ organization_regexes = (
     r"\ss\.?a\.?r\.?l\.?($|\s)",
 )
 
-grammar["_data"]["id"] = precompile_regexes(grammar["_data"]["id"], re.IGNORECASE)  # type: ignore
-grammar["_data"]["status"] = precompile_regexes(grammar["_data"]["status"], re.IGNORECASE)  # type: ignore
-grammar["_data"]["creation_date"] = precompile_regexes(grammar["_data"]["creation_date"], re.IGNORECASE)  # type: ignore
-grammar["_data"]["expiration_date"] = precompile_regexes(grammar["_data"]["expiration_date"],  # type: ignore
-                                                         re.IGNORECASE)
-grammar["_data"]["updated_date"] = precompile_regexes(grammar["_data"]["updated_date"], re.IGNORECASE)  # type: ignore
-grammar["_data"]["registrar"] = precompile_regexes(grammar["_data"]["registrar"], re.IGNORECASE)  # type: ignore
-grammar["_data"]["whois_server"] = precompile_regexes(grammar["_data"]["whois_server"], re.IGNORECASE)  # type: ignore
-grammar["_data"]["nameservers"] = precompile_regexes(grammar["_data"]["nameservers"], re.IGNORECASE)  # type: ignore
-grammar["_data"]["emails"] = precompile_regexes(grammar["_data"]["emails"], re.IGNORECASE)  # type: ignore
-
-grammar["_dateformats"] = precompile_regexes(grammar["_dateformats"], re.IGNORECASE)
-
-registrant_regexes = precompile_regexes(registrant_regexes)
-tech_contact_regexes = precompile_regexes(tech_contact_regexes)
-billing_contact_regexes = precompile_regexes(billing_contact_regexes)
-admin_contact_regexes = precompile_regexes(admin_contact_regexes)
-nic_contact_regexes = precompile_regexes(nic_contact_regexes)
-organization_regexes = precompile_regexes(organization_regexes, re.IGNORECASE)
-
-nic_contact_references["registrant"] = precompile_regexes(nic_contact_references["registrant"])
-nic_contact_references["tech"] = precompile_regexes(nic_contact_references["tech"])
-nic_contact_references["admin"] = precompile_regexes(nic_contact_references["admin"])
-nic_contact_references["billing"] = precompile_regexes(nic_contact_references["billing"])
+regexes_compiled = False
+regexes_lock = threading.Lock()
+
+
+def compile_regexes():
+    """Preprocesses and compiles the regexes of the grammar and of the contacts, once."""
+    global regexes_compiled, registrant_regexes, tech_contact_regexes, admin_contact_regexes, billing_contact_regexes, \
+        nic_contact_regexes, organization_regexes
+    if regexes_compiled:
+        return
+    with regexes_lock:
+        if regexes_compiled:
+            return
+        registrant_regexes = [preprocess_regex(regex) for regex in registrant_regexes]
+        tech_contact_regexes = [preprocess_regex(regex) for regex in tech_contact_regexes]
+        admin_contact_regexes = [preprocess_regex(regex) for regex in admin_contact_regexes]
+        billing_contact_regexes = [preprocess_regex(regex) for regex in billing_contact_regexes]
+
+        grammar["_data"]["id"] = precompile_regexes(grammar["_data"]["id"], re.IGNORECASE)  # type: ignore
+        grammar["_data"]["status"] = precompile_regexes(grammar["_data"]["status"], re.IGNORECASE)  # type: ignore
+        grammar["_data"]["creation_date"] = precompile_regexes(grammar["_data"]["creation_date"], re.IGNORECASE)  # type: ignore
+        grammar["_data"]["expiration_date"] = precompile_regexes(grammar["_data"]["expiration_date"],  # type: ignore
+                                                                 re.IGNORECASE)
+        grammar["_data"]["updated_date"] = precompile_regexes(grammar["_data"]["updated_date"], re.IGNORECASE)  # type: ignore
+        grammar["_data"]["registrar"] = precompile_regexes(grammar["_data"]["registrar"], re.IGNORECASE)  # type: ignore
+        grammar["_data"]["whois_server"] = precompile_regexes(grammar["_data"]["whois_server"], re.IGNORECASE)  # type: ignore
+        grammar["_data"]["nameservers"] = precompile_regexes(grammar["_data"]["nameservers"], re.IGNORECASE)  # type: ignore
+        grammar["_data"]["emails"] = precompile_regexes(grammar["_data"]["emails"], re.IGNORECASE)  # type: ignore
+
+        grammar["_dateformats"] = precompile_regexes(grammar["_dateformats"], re.IGNORECASE)
+
+        registrant_regexes = precompile_regexes(registrant_regexes)
+        tech_contact_regexes = precompile_regexes(tech_contact_regexes)
+        billing_contact_regexes = precompile_regexes(billing_contact_regexes)
+        admin_contact_regexes = precompile_regexes(admin_contact_regexes)
+        nic_contact_regexes = precompile_regexes(nic_contact_regexes)
+        organization_regexes = precompile_regexes(organization_regexes, re.IGNORECASE)
+
+        nic_contact_references["registrant"] = precompile_regexes(nic_contact_references["registrant"])
+        nic_contact_references["tech"] = precompile_regexes(nic_contact_references["tech"])
+        nic_contact_references["admin"] = precompile_regexes(nic_contact_references["admin"])
+        nic_contact_references["billing"] = precompile_regexes(nic_contact_references["billing"])
+
+        regexes_compiled = True
 
 if sys.version_info < (3, 0):
     def is_string(data):
@@ -7678,6 +7748,7 @@ else:
 
 
 def parse_raw_whois(raw_data, normalized=None, never_query_handles=True, handle_server=""):
+    compile_regexes()
     normalized = normalized or []
     data = {}  # type: dict
 
@@ -7949,6 +8020,7 @@ def normalize_data(data, normalized):
 
 
 def normalize_name(value, abbreviation_threshold=4, length_threshold=8, lowercase_domains=True, ignore_nic=False):
+    compile_regexes()
     normalized_lines = []
     for line in value.split("\n"):
         line = line.strip(",")  # Get rid of useless comma's
@@ -7997,6 +8069,7 @@ def normalize_name(value, abbreviation_threshold=4, length_threshold=8, lowercas
 
 def parse_dates(dates):
     global grammar
+    compile_regexes()
     parsed_dates = []
 
     for date in dates:
@@ -8096,6 +8169,7 @@ def remove_suffixes(data):
 
 
 def parse_registrants(data, never_query_handles=True, handle_server=""):
+    compile_regexes()
     registrant = None
     tech_contact = None
     billing_contact = None
@@ -8254,6 +8328,7 @@ def fetch_nic_contact(handle, lookup_server):
 
 
 def parse_nic_contact(data):
+    compile_regexes()
     handle_contacts = []
     for regex in nic_contact_regexes:
         for segment in data:
@@ -8272,11 +8347,54 @@ def get_whois(domain, normalized=None):
                            handle_server=server_list[-1])
 
 
+def get_whois_bulk(domains):
+    """
+    Gets the whois of the domains concurrently, with up to MAX_CONCURRENT_LOOKUPS lookups at the same time, and up to
+    MAX_REQUESTS_PER_SERVER requests to each whois server at the same time.
+
+    Returns a (whois result, error) tuple for each domain, in the order of the domains. Both are None for a domain whose
+    lookup already returned an error or a warning entry.
+    """
+    results = [(None, None)] * len(domains)
+    pending = iter(enumerate(domains))
+    pending_lock = threading.Lock()
+
+    def lookup():
+        while True:
+            with pending_lock:
+                index, domain = next(pending, (None, None))
+            if index is None:
+                return
+            try:
+                results[index] = (get_whois(domain), None)
+            except SystemExit:
+                # return_error and return_warning already returned the entry of the domain
+                results[index] = (None, None)
+            except Exception as e:
+                results[index] = (None, e)
+
+    workers_count = min(MAX_CONCURRENT_LOOKUPS, len(domains))
+    if workers_count > 1:
+        compile_regexes()
+        support_multithreading()
+        workers = [threading.Thread(target=lookup) for _ in range(workers_count)]
+        for worker in workers:
+            worker.daemon = True
+            worker.start()
+        for worker in workers:
+            worker.join()
+    else:
+        lookup()
+    return results
+
+
 # Drops the mic disable-secrets-detection-end
 
 def get_domain_from_query(query):
     # checks for largest matching suffix inside tlds dictionary
-    suffix_len = max([len(suffix) for suffix in tlds if query.endswith('.{}'.format(suffix))] or [0])
+    labels = query.split('.')
+    suffix_len = next((len(suffix) for suffix in ('.'.join(labels[i:]) for i in range(1, len(labels)))
+                       if suffix in tlds), 0)
     # if suffix(TLD) was found increase the length by one in order to add the dot before it. --> .com instead of com
     if suffix_len != 0:
         suffix_len += 1
@@ -8406,9 +8524,12 @@ def prepare_readable_ip_data(response):
 
 
 def domain_command(reliability):
-    domains = demisto.args().get('domain', [])
-    for domain in argToList(domains):
-        whois_result = get_whois(domain)
+    domains = argToList(demisto.args().get('domain', []))
+    for domain, (whois_result, error) in zip(domains, get_whois_bulk(domains)):
+        if error:
+            raise error
+        if whois_result is None:
+            continue
         md, standard_ec, dbot_score = create_outputs(whois_result, domain, reliability)
         dbot_score.update({Common.Domain.CONTEXT_PATH: standard_ec})
         demisto.results({
@@ -304,3 +304,66 @@ def test_get_raw_response_with_a_refer_server_that_fails(mocker):
     domain = "test.plus"
     response = get_whois_raw(domain=domain, server=server)
     assert response == [mock_response]
+
+
+def test_get_whois_bulk(mocker):
+    """
+    Given:
+        - Domains on the same Whois server, one of them is given twice and one of them fails.
+    When:
+        - Looking up the domains in bulk.
+    Then:
+        - The results are returned in the order of the domains, and the failure is returned for its domain.
+        - No more than MAX_REQUESTS_PER_SERVER requests are sent to the server at the same time.
+    """
+    import threading
+    lock = threading.Lock()
+    in_flight = {'current': 0, 'max': 0}
+
+    def whois_request_mock(domain, server, port=43, is_refer_server=False):
+        with lock:
+            in_flight['current'] += 1
+            in_flight['max'] = max(in_flight['max'], in_flight['current'])
+        time.sleep(0.05)
+        with lock:
+            in_flight['current'] -= 1
+        if domain == '=fail.com':
+            raise Whois.WhoisException('failed')
+        return 'Domain Name: {}\nRegistrar: Registrar of {}\n'.format(domain[1:].upper(), domain[1:])
+
+    mocker.patch.object(Whois, 'whois_request_to_server', side_effect=whois_request_mock)
+    mocker.patch.object(Whois, 'support_multithreading')
+    mocker.patch.object(Whois, 'MAX_REQUESTS_PER_SERVER', 2)
+    mocker.patch.object(Whois, 'server_semaphores', {})
+    mocker.patch.object(Whois, 'responses_cache', Whois.ResponsesCache())
+    domains = ['a{}.com'.format(i) for i in range(8)] + ['fail.com', 'a1.com']
+
+    results = Whois.get_whois_bulk(domains)
+
+    assert [result['registrar'] for result, _ in results[:8]] == [['Registrar of a{}.com'.format(i)] for i in range(8)]
+    assert results[8][0] is None
+    assert str(results[8][1]) == 'failed'
+    assert results[9][0]['registrar'] == ['Registrar of a1.com']
+    assert in_flight['max'] == 2
+
+
+def test_responses_cache(mocker):
+    """
+    Given:
+        - A Whois server response which was cached.
+    When:
+        - Querying the same server for the same domain, before and after the TTL.
+    Then:
+        - The server is queried again only after the TTL.
+    """
+    now = [1000.0]
+    mocker.patch.object(time, 'time', side_effect=lambda: now[0])
+    whois_request_mock = mocker.patch.object(Whois, 'whois_request', return_value='Domain Name: test.plus\n')
+    mocker.patch.object(Whois, 'responses_cache', Whois.ResponsesCache(ttl=60))
+
+    for _ in range(2):
+        assert Whois.get_whois_raw('test.plus', 'test_server') == ['Domain Name: test.plus\n']
+    assert whois_request_mock.call_count == 1
+    now[0] += 61
+    Whois.get_whois_raw('test.plus', 'test_server')
+    assert whois_request_mock.call_count == 2
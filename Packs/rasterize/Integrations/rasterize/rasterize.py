@@ -16,6 +16,9 @@ import subprocess
 import traceback
 import re
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
 # Chrome respects proxy env params
 handle_proxy()
@@ -25,6 +28,7 @@ os.environ['no_proxy'] = 'localhost,127.0.0.1'
 WITH_ERRORS = demisto.params().get('with_error', True)
 DEFAULT_WAIT_TIME = max(int(demisto.params().get('wait_time', 0)), 0)
 DEFAULT_PAGE_LOAD_TIME = int(demisto.params().get('max_page_load_time', 180))
+MAX_RENDERS_PER_BROWSER = max(int(demisto.params().get('max_renders_per_browser') or 20), 1)
 
 URL_ERROR_MSG = "Can't access the URL. It might be malicious, or unreachable for one of several reasons. " \
                 "You can choose to receive this message as error/warning in the instance settings\n"
@@ -32,6 +36,8 @@ EMPTY_RESPONSE_ERROR_MSG = "There is nothing to render. This can occur when ther
                            " Please check your URL."
 DEFAULT_W, DEFAULT_H = '600', '800'
 DEFAULT_W_WIDE = '1024'
+DEFAULT_BATCH_CONCURRENCY = 4
+EMPTY_PAGE = '<html><head></head><body></body></html>'
 CHROME_USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.164 Safari/537.36'  # noqa
 DRIVER_LOG = f'{tempfile.gettempdir()}/chromedriver.log'
 DEFAULT_CHROME_OPTIONS = [
@@ -88,10 +94,13 @@ def merge_options(default_options, user_options):
     return options
 
 
+class EmptyResponseError(Exception):
+    pass
+
+
 def check_response(driver):
-    EMPTY_PAGE = '<html><head></head><body></body></html>'
     if driver.page_source == EMPTY_PAGE:
-        return_err_or_warn(EMPTY_RESPONSE_ERROR_MSG)
+        raise EmptyResponseError(EMPTY_RESPONSE_ERROR_MSG)
 
 
 def init_driver(offline_mode=False):
@@ -154,6 +163,136 @@ def quit_driver_and_reap_children(driver):
         demisto.error(f'Failed checking for zombie processes: {e}. Trace: {traceback.format_exc()}')
 
 
+class BrowserPool:
+    """
+    Keeps warm Chrome drivers between renders of the same process, so rendering many targets doesn't pay the
+    browser startup for each one. A driver is health checked before it is reused, and is recycled after
+    max_renders renders or after a failed render.
+    """
+
+    def __init__(self, max_renders: int = MAX_RENDERS_PER_BROWSER):
+        self.max_renders = max_renders
+        self._idle: list = []  # entries of [driver, offline_mode, renders]
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def is_healthy(driver) -> bool:
+        try:
+            driver.current_url  # pylint: disable=pointless-statement
+            return True
+        except Exception as ex:
+            demisto.debug(f'Chrome driver failed health check: {ex}')
+            return False
+
+    def acquire(self, offline_mode: bool = False) -> list:
+        """
+        Returns an idle healthy driver entry with the given mode, or a new one if there is none
+        """
+        while True:
+            with self._lock:
+                entry = next((entry for entry in self._idle if entry[1] == offline_mode), None)
+                if entry is None:
+                    break
+                self._idle.remove(entry)
+            if self.is_healthy(entry[0]):
+                return entry
+            self._quit(entry[0])
+        return [init_driver(offline_mode), offline_mode, 0]
+
+    def release(self, entry: list, failed: bool = False):
+        """
+        Returns a driver entry to the pool after a render, or quits it if it should be recycled
+        """
+        entry[2] += 1
+        driver = entry[0]
+        if not failed and entry[2] < self.max_renders:
+            try:
+                # don't leak the state of one target to the next
+                driver.delete_all_cookies()
+                driver.get('about:blank')
+                with self._lock:
+                    self._idle.append(entry)
+                return
+            except Exception as ex:
+                demisto.debug(f'Failed resetting chrome driver, will recycle it: {ex}')
+        self._quit(driver)
+
+    @contextmanager
+    def driver(self, offline_mode: bool = False):
+        entry = self.acquire(offline_mode)
+        failed = True
+        try:
+            yield entry[0]
+            failed = False
+        finally:
+            self.release(entry, failed)
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for driver, _, _ in idle:
+            self._quit(driver)
+
+    @staticmethod
+    def _quit(driver):
+        try:
+            quit_driver_and_reap_children(driver)
+        except Exception as ex:
+            demisto.debug(f'Failed quitting chrome driver: {ex}')
+
+
+BROWSER_POOL = BrowserPool()
+
+
+def render(driver, path: str, width: int, height: int, r_type: str = 'png', wait_time: int = 0,
+           page_load_time: int = DEFAULT_PAGE_LOAD_TIME):
+    """
+    Navigates the driver to a path (url/file) and captures it
+    :param driver: the Chrome driver to use
+    :param path: file path, or website url
+    :param width: desired snapshot width in pixels
+    :param height: desired snapshot height in pixels
+    :param r_type: result type: .png/.pdf/.json
+    :param wait_time: time in seconds to wait before taking a screenshot
+    :param page_load_time: maximum time in seconds to wait for the page to load
+    """
+    demisto.debug(f'Navigating to path: {path}. page load: {page_load_time}')
+    driver.set_page_load_timeout(page_load_time)
+    driver.get(path)
+    driver.implicitly_wait(5)
+    if wait_time > 0 or DEFAULT_WAIT_TIME > 0:
+        time.sleep(wait_time or DEFAULT_WAIT_TIME)
+    check_response(driver)
+    demisto.debug('Navigating to path - COMPLETED')
+
+    if r_type.lower() == 'pdf':
+        output = get_pdf(driver, width, height)
+    elif r_type.lower() == 'json':
+        html = driver.page_source
+        url = driver.current_url
+        output = {'image_b64': base64.b64encode(get_image(driver, width, height)).decode('utf8'),
+                  'html': html, 'current_url': url}
+    else:
+        output = get_image(driver, width, height)
+
+    return output
+
+
+def get_render_error_message(ex: Exception, page_load_time: int) -> str:
+    """
+    Returns the message to show for an exception raised while rendering
+    """
+    if isinstance(ex, (InvalidArgumentException, NoSuchElementException)):
+        if 'invalid argument' in str(ex):
+            return URL_ERROR_MSG + str(ex)
+        return f'Invalid exception: {ex}\nTrace:{traceback.format_exc()}'
+    if isinstance(ex, TimeoutException):
+        return f'Timeout exception with max load time of: {page_load_time} seconds. {ex}'
+    if isinstance(ex, EmptyResponseError):
+        return str(ex)
+    return f'General error: {ex}\nTrace:{traceback.format_exc()}'
+
+
 def rasterize(path: str, width: int, height: int, r_type: str = 'png', wait_time: int = 0,
               offline_mode: bool = False, max_page_load_time: int = 180):
     """
@@ -165,44 +304,45 @@ def rasterize(path: str, width: int, height: int, r_type: str = 'png', wait_time
     :param r_type: result type: .png/.pdf
     :param wait_time: time in seconds to wait before taking a screenshot
     """
-    driver = init_driver(offline_mode)
     page_load_time = max_page_load_time if max_page_load_time > 0 else DEFAULT_PAGE_LOAD_TIME
     try:
-        demisto.debug(f'Navigating to path: {path}. Mode: {"OFFLINE" if offline_mode else "ONLINE"}. page load: {page_load_time}')
-        driver.set_page_load_timeout(page_load_time)
-        driver.get(path)
-        driver.implicitly_wait(5)
-        if wait_time > 0 or DEFAULT_WAIT_TIME > 0:
-            time.sleep(wait_time or DEFAULT_WAIT_TIME)
-        check_response(driver)
-        demisto.debug('Navigating to path - COMPLETED')
-
-        if r_type.lower() == 'pdf':
-            output = get_pdf(driver, width, height)
-        elif r_type.lower() == 'json':
-            html = driver.page_source
-            url = driver.current_url
-            output = {'image_b64': base64.b64encode(get_image(driver, width, height)).decode('utf8'),
-                      'html': html, 'current_url': url}
-        else:
-            output = get_image(driver, width, height)
-
-        return output
+        with BROWSER_POOL.driver(offline_mode) as driver:
+            demisto.debug(f'Mode: {"OFFLINE" if offline_mode else "ONLINE"}')
+            return render(driver, path, width, height, r_type, wait_time, page_load_time)
 
-    except (InvalidArgumentException, NoSuchElementException) as ex:
-        if 'invalid argument' in str(ex):
-            err_msg = URL_ERROR_MSG + str(ex)
-            return_err_or_warn(err_msg)
-        else:
-            return_err_or_warn(f'Invalid exception: {ex}\nTrace:{traceback.format_exc()}')
-    except TimeoutException as ex:
-        return_err_or_warn(f'Timeout exception with max load time of: {page_load_time} seconds. {ex}')
     except Exception as ex:
-        err_str = f'General error: {ex}\nTrace:{traceback.format_exc()}'
-        demisto.error(err_str)
+        err_str = get_render_error_message(ex, page_load_time)
+        if not isinstance(ex, (InvalidArgumentException, NoSuchElementException, TimeoutException,
+                               EmptyResponseError)):
+            demisto.error(err_str)
         return_err_or_warn(err_str)
-    finally:
-        quit_driver_and_reap_children(driver)
+
+
+def rasterize_batch(paths: list, width: int, height: int, r_type: str = 'png', wait_time: int = 0,
+                    max_page_load_time: int = 180, concurrency: int = DEFAULT_BATCH_CONCURRENCY) -> list:
+    """
+    Captures snapshots of many paths (urls/files) with a bounded number of concurrent warm browsers.
+    A failure of one path doesn't fail the others.
+    :param paths: file paths, or website urls
+    :param concurrency: the maximum number of browsers rendering at the same time
+    :return: a list of (output, error message) tuples in the order of the paths
+    """
+    page_load_time = max_page_load_time if max_page_load_time > 0 else DEFAULT_PAGE_LOAD_TIME
+
+    def render_path(path: str):
+        try:
+            with BROWSER_POOL.driver() as driver:
+                return render(driver, path, width, height, r_type, wait_time, page_load_time), None
+        except Exception as ex:
+            err_str = get_render_error_message(ex, page_load_time)
+            demisto.debug(f'Failed rendering {path}: {err_str}')
+            return None, err_str
+
+    if concurrency > 1 and len(paths) > 1:
+        # the renders log to the server from the worker threads
+        support_multithreading()
+    with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as executor:
+        return list(executor.map(render_path, paths))
 
 
 def get_image(driver, width: int, height: int):
@@ -216,7 +356,6 @@ def get_image(driver, width: int, height: int):
     driver.set_window_size(width, height)
 
     image = driver.get_screenshot_as_png()
-    driver.quit()
 
     demisto.debug('Capturing screenshot - COMPLETED')
 
@@ -324,6 +463,39 @@ def rasterize_command():
     demisto.results(res)
 
 
+def rasterize_batch_command():
+    args = demisto.args()
+    urls = argToList(args.get('urls'))
+    w = args.get('width', DEFAULT_W_WIDE).rstrip('px')
+    h = args.get('height', DEFAULT_H).rstrip('px')
+    r_type = args.get('type', 'png')
+    wait_time = int(args.get('wait_time', 0))
+    page_load = int(args.get('max_page_load_time', DEFAULT_PAGE_LOAD_TIME))
+    concurrency = int(args.get('concurrency', DEFAULT_BATCH_CONCURRENCY))
+    file_name = args.get('file_name', 'url')
+
+    urls = [url if url.startswith('http') else f'http://{url}' for url in urls]
+    outputs = rasterize_batch(paths=urls, width=w, height=h, r_type=r_type, wait_time=wait_time,
+                              max_page_load_time=page_load, concurrency=concurrency)
+    results = []
+    summary = []
+    for index, (url, (output, error)) in enumerate(zip(urls, outputs)):
+        summary.append({'URL': url, 'Status': 'Failed' if error else 'Success', 'Error': error})
+        if error:
+            continue
+        res = fileResult(filename=f'{file_name}_{index + 1}.{"pdf" if r_type == "pdf" else "png"}', data=output)
+        if r_type == 'png':
+            res['Type'] = entryTypes['image']
+        results.append(res)
+
+    results.append(CommandResults(readable_output=tableToMarkdown('Rasterize results', summary,
+                                                                  headers=['URL', 'Status', 'Error'],
+                                                                  removeNull=True)).to_context())
+    if all(error for _, error in outputs):
+        return_err_or_warn('Failed rasterizing all the URLs:\n' + '\n'.join(error for _, error in outputs))
+    demisto.results(results)
+
+
 def rasterize_image_command():
     args = demisto.args()
     entry_id = args.get('EntryID')
@@ -417,12 +589,16 @@ def main():
         elif demisto.command() == 'rasterize':
             rasterize_command()
 
+        elif demisto.command() == 'rasterize-batch':
+            rasterize_batch_command()
+
         else:
             return_error('Unrecognized command')
 
     except Exception as ex:
         return_err_or_warn(f'Unexpected exception: {ex}\nTrace:{traceback.format_exc()}')
     finally:
+        BROWSER_POOL.close()
         if is_debug_mode():
             demisto.debug(f'os.environ: {os.environ}')
             with open(DRIVER_LOG, 'r') as log:
@@ -198,3 +198,88 @@ def test_convert_pdf_to_jpeg(file_path, max_pages, expected_length):
 
     assert type(res) == list
     assert len(res) == expected_length
+
+
+def test_browser_pool_reuses_and_recycles_drivers(mocker):
+    """
+    Given
+    - a browser pool that recycles drivers after 2 renders
+    When
+    - rendering 3 times, and then rendering after the idle driver fails its health check
+    Then
+    - the first driver is reused once and recycled, a new driver is created for the third render
+    - an unhealthy idle driver is recycled instead of being reused
+    """
+    from rasterize import BrowserPool
+    drivers = [mocker.Mock(name=f'driver{i}') for i in range(3)]
+    init_driver_mock = mocker.patch('rasterize.init_driver', side_effect=drivers)
+    quit_mock = mocker.patch('rasterize.quit_driver_and_reap_children')
+    pool = BrowserPool(max_renders=2)
+
+    used = []
+    for _ in range(3):
+        with pool.driver() as driver:
+            used.append(driver)
+    assert used == [drivers[0], drivers[0], drivers[1]]
+    quit_mock.assert_called_once_with(drivers[0])
+
+    type(drivers[1]).current_url = mocker.PropertyMock(side_effect=Exception('chrome is gone'))
+    with pool.driver() as driver:
+        assert driver is drivers[2]
+    assert init_driver_mock.call_count == 3
+    assert quit_mock.call_args_list[-1][0][0] is drivers[1]
+
+    pool.close()
+    assert quit_mock.call_args_list[-1][0][0] is drivers[2]
+
+
+def test_browser_pool_recycles_failed_driver(mocker):
+    """
+    Given
+    - a browser pool
+    When
+    - a render fails
+    Then
+    - the driver is not returned to the pool
+    """
+    from rasterize import BrowserPool
+    mocker.patch('rasterize.init_driver', side_effect=lambda offline_mode: mocker.Mock())
+    quit_mock = mocker.patch('rasterize.quit_driver_and_reap_children')
+    pool = BrowserPool(max_renders=10)
+    with pytest.raises(ValueError):
+        with pool.driver():
+            raise ValueError('render failed')
+    assert quit_mock.call_count == 1
+    assert not pool._idle
+
+
+def test_rasterize_batch(mocker):
+    """
+    Given
+    - several URLs, one of them times out
+    When
+    - rasterizing them in a batch
+    Then
+    - the outputs are returned in the order of the URLs, and the failure doesn't fail the other URLs
+    - the calls to the server are locked for the worker threads
+    """
+    from rasterize import rasterize_batch, BROWSER_POOL
+    from selenium.common.exceptions import TimeoutException
+
+    def render_mock(driver, path, *_):
+        if path == 'http://slow':
+            raise TimeoutException('slow')
+        return path.encode()
+
+    mocker.patch('rasterize.init_driver', side_effect=lambda offline_mode: mocker.Mock())
+    mocker.patch('rasterize.quit_driver_and_reap_children')
+    mocker.patch('rasterize.render', side_effect=render_mock)
+    support_multithreading_mock = mocker.patch('rasterize.support_multithreading')
+    outputs = rasterize_batch(['http://a', 'http://slow', 'http://b'], width=250, height=250, concurrency=2)
+    BROWSER_POOL.close()
+
+    assert outputs[0] == (b'http://a', None)
+    assert outputs[1][0] is None
+    assert 'Timeout exception' in outputs[1][1]
+    assert outputs[2] == (b'http://b', None)
+    support_multithreading_mock.assert_called_once()
@@ -21,7 +21,7 @@ from typing import List, Dict, Optional, Tuple, Any
 from Tests.Marketplace.marketplace_services import Pack, input_to_list, get_valid_bool, convert_price, \
     get_updated_server_version, load_json, \
     store_successful_and_failed_packs_in_ci_artifacts, is_ignored_pack_file, \
-    is_the_only_rn_in_block
+    is_the_only_rn_in_block, BucketManifest
 from Tests.Marketplace.marketplace_constants import PackStatus, PackFolders, Metadata, GCPConfig, BucketUploadFlow, \
     PACKS_FOLDER, PackTags, BASE_PACK_DEPENDENCY_DICT
 
@@ -1269,6 +1269,140 @@ class TestCopyAndUploadToStorage:
         assert not skipped_pack
 
 
+class TestBucketManifest:
+    """ Test class for looking up the bucket blobs in a manifest instead of listing them in the bucket.
+
+    """
+
+    @pytest.fixture(scope="class")
+    def dummy_pack(self):
+        """ dummy pack fixture
+        """
+        return Pack(pack_name="TestPack", pack_path="dummy_path")
+
+    @pytest.fixture
+    def local_bucket(self, tmp_path):
+        """ A local directory which stands in for the bucket.
+        """
+        for blob_name in ["content/packs/TestPack/1.0.0/TestPack.zip", "content/packs/TestPack/1.0.1/TestPack.zip",
+                          "content/packs/TestPack2/1.0.0/TestPack2.zip", "content/packs/TestPack/Author_image.png"]:
+            blob_path = tmp_path / blob_name
+            blob_path.parent.mkdir(parents=True, exist_ok=True)
+            blob_path.write_text("dummy")
+        return tmp_path
+
+    def test_list_blobs(self, local_bucket):
+        """
+           Given:
+               - A manifest of a local directory which stands in for the bucket.
+           When:
+               - Listing the blobs under prefixes, and checking the existence of blobs.
+           Then:
+               - Validate that the blobs are listed by their name prefix, like the bucket lists them.
+       """
+        manifest = BucketManifest.from_directory(str(local_bucket))
+
+        assert len(manifest) == 4
+        assert manifest.list_blobs("content/packs/TestPack/") == [
+            "content/packs/TestPack/1.0.0/TestPack.zip", "content/packs/TestPack/1.0.1/TestPack.zip",
+            "content/packs/TestPack/Author_image.png"
+        ]
+        assert manifest.list_blobs("content/packs/TestPack") == manifest.list_blobs("content/packs/")
+        assert manifest.list_blobs("content/packs/TestPack/2.0.0") == []
+        assert manifest.exists("content/packs/TestPack/Author_image.png")
+        assert not manifest.exists("content/packs/TestPack/1.0.0")
+
+    def test_save_and_load(self, local_bucket, tmp_path):
+        """
+           Given:
+               - A manifest of the bucket with an added blob.
+           When:
+               - Saving the manifest to a local file, and loading it.
+           Then:
+               - Validate that the loaded manifest has the same blobs.
+       """
+        manifest = BucketManifest.from_directory(str(local_bucket))
+        manifest.add("content/packs/TestPack/2.0.0/TestPack.zip")
+        manifest.add("content/packs/TestPack/2.0.0/TestPack.zip")
+        manifest_path = str(tmp_path / "manifest.json")
+        manifest.save(manifest_path)
+
+        loaded_manifest = BucketManifest.from_file(manifest_path)
+
+        assert len(loaded_manifest) == 5
+        assert loaded_manifest.list_blobs("") == manifest.list_blobs("")
+
+    def test_from_bucket(self, mocker):
+        """
+           Given:
+               - A bucket with pack blobs.
+           When:
+               - Creating a manifest of the bucket.
+           Then:
+               - Validate that the bucket is listed once under the base path.
+       """
+        dummy_storage_bucket = mocker.MagicMock()
+        dummy_storage_bucket.list_blobs.return_value = [Blob("content/packs/TestPack/1.0.0/TestPack.zip",
+                                                             dummy_storage_bucket)]
+        mocker.patch("Tests.Marketplace.marketplace_services.logging")
+
+        manifest = BucketManifest.from_bucket(dummy_storage_bucket, GCPConfig.CONTENT_PACKS_PATH)
+
+        dummy_storage_bucket.list_blobs.assert_called_once_with(prefix=GCPConfig.CONTENT_PACKS_PATH)
+        assert manifest.exists("content/packs/TestPack/1.0.0/TestPack.zip")
+
+    @pytest.mark.parametrize("latest_version, expected_skipped", [("1.0.0", True), ("2.0.0", False)])
+    def test_upload_to_storage_with_manifest(self, mocker, dummy_pack, local_bucket, tmp_path, latest_version,
+                                             expected_skipped):
+        """
+           Given:
+               - A manifest of a local directory which stands in for the bucket.
+           When:
+               - Uploading a pack version which exists in the bucket, and a version which doesn't.
+           Then:
+               - Validate that the existing version is skipped, the new version is uploaded and added to the manifest,
+                 and that the bucket isn't listed.
+       """
+        dummy_storage_bucket = mocker.MagicMock()
+        mocker.patch("Tests.Marketplace.marketplace_services.logging")
+        zip_pack_path = tmp_path / "TestPack.zip"
+        zip_pack_path.write_text("dummy")
+        manifest = BucketManifest.from_directory(str(local_bucket))
+
+        task_status, skipped_upload, _ = dummy_pack.upload_to_storage(
+            str(zip_pack_path), latest_version, dummy_storage_bucket, False, GCPConfig.CONTENT_PACKS_PATH,
+            bucket_manifest=manifest
+        )
+
+        assert task_status
+        assert skipped_upload == expected_skipped
+        assert not dummy_storage_bucket.list_blobs.called
+        assert manifest.exists(f"content/packs/TestPack/{latest_version}/TestPack.zip")
+
+    def test_copy_author_image_with_manifest(self, mocker, dummy_pack, local_bucket):
+        """
+           Given:
+               - A manifest of the build bucket which has the author image.
+           When:
+               - Copying the pack's author image.
+           Then:
+               - Validate that the image existence is looked up in the manifest instead of the build bucket.
+       """
+        dummy_build_bucket = mocker.MagicMock()
+        dummy_prod_bucket = mocker.MagicMock()
+        mocker.patch("Tests.Marketplace.marketplace_services.logging")
+        dummy_build_bucket.blob.side_effect = lambda name: Blob(name, dummy_build_bucket)
+        dummy_build_bucket.copy_blob.return_value = Blob("content/packs/TestPack/Author_image.png", dummy_prod_bucket)
+        images_data = {"TestPack": {BucketUploadFlow.AUTHOR: True}}
+
+        task_status = dummy_pack.copy_author_image(dummy_prod_bucket, dummy_build_bucket, images_data,
+                                                   GCPConfig.CONTENT_PACKS_PATH, GCPConfig.CONTENT_PACKS_PATH,
+                                                   BucketManifest.from_directory(str(local_bucket)))
+
+        assert task_status
+        dummy_build_bucket.copy_blob.assert_called_once()
+
+
 class TestLoadUserMetadata:
     @pytest.fixture(scope="function")
     def dummy_pack(self):
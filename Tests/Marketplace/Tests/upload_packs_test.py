@@ -607,3 +607,86 @@ class TestUpdatedPrivatePacks:
         private_index_json.get("packs").append({"id": "new_private_pack", "contentCommitHash": "111"})
         mocker.patch('Tests.Marketplace.upload_packs.load_json', return_value=private_index_json)
         assert is_private_packs_updated(public_index_json, index_file_path)
+
+
+class TestPacksPipeline:
+    def test_process_packs_concurrently(self):
+        """
+           Given:
+               - A list of packs, and a process function which takes some time
+           When:
+               - Processing the packs concurrently with 3 workers
+           Then:
+               - Ensure up to 3 packs are processed at the same time
+               - Ensure the results are returned in the order of the packs
+        """
+        import threading
+        import time
+        from Tests.Marketplace.upload_packs import process_packs_concurrently
+
+        lock = threading.Lock()
+        in_progress = []
+        max_in_progress = []
+
+        def process_pack(pack):
+            with lock:
+                in_progress.append(pack)
+                max_in_progress.append(len(in_progress))
+            time.sleep(0.01 * (10 - pack))
+            with lock:
+                in_progress.remove(pack)
+            return pack * 2
+
+        assert process_packs_concurrently(list(range(10)), process_pack, 3) == [pack * 2 for pack in range(10)]
+        assert 1 < max(max_in_progress) <= 3
+
+    def test_build_summary_table_with_stages_durations(self):
+        """
+           Given:
+               - A pack which went through some of the upload stages
+           When:
+               - Building the summary table with the stages durations
+           Then:
+               - Ensure there is a column with the duration of each stage, and a dash for stages the pack didn't reach
+        """
+        from Tests.Marketplace.upload_packs import _build_summary_table, PACK_STAGES
+        from Tests.Marketplace.marketplace_services import Pack
+        from Tests.Marketplace.marketplace_constants import PackStatus
+
+        pack = Pack('TestPack', 'dummy_path')
+        pack.status = PackStatus.FAILED_UPLOADING_PACK.name
+        table = _build_summary_table([pack], include_pack_status=True,
+                                     packs_stages_durations={'TestPack': {'Collect': 1.234, 'Metadata': 2}})
+
+        assert table.field_names[-len(PACK_STAGES):] == [f'{stage} Time (s)' for stage in PACK_STAGES]
+        assert table.rows[0][-len(PACK_STAGES):] == ['1.2', '2.0', '-', '-']
+        assert 'Collect Time (s)' not in _build_summary_table([pack]).field_names
+
+    @pytest.mark.parametrize('skipped_upload, missing_dependencies, expected_status', [
+        (True, False, 'PACK_ALREADY_EXISTS'),
+        (True, True, 'SUCCESS'),
+        (False, False, 'SUCCESS'),
+    ])
+    def test_update_pack_in_index(self, mocker, skipped_upload, missing_dependencies, expected_status):
+        """
+           Given:
+               - A pack which was uploaded or which already exists in the bucket and in the index
+           When:
+               - Updating the pack in the index folder
+           Then:
+               - Ensure the pack is copied to the index folder
+               - Ensure a pack which already exists is marked as such, unless it is missing dependencies
+        """
+        from Tests.Marketplace import upload_packs
+        from Tests.Marketplace.marketplace_services import Pack
+
+        pack = Pack('TestPack', 'dummy_path')
+        mocker.patch.object(pack, 'prepare_for_index_upload', return_value=True)
+        mocker.patch.object(pack, 'cleanup')
+        update_index_folder_mock = mocker.patch.object(upload_packs, 'update_index_folder', return_value=True)
+
+        upload_packs.update_pack_in_index(pack, 'index_path', skipped_upload, True,
+                                          [pack] if missing_dependencies else [])
+
+        assert update_index_folder_mock.call_args.kwargs['pack_name'] == 'TestPack'
+        assert pack.status == expected_status
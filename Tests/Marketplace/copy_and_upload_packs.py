@@ -10,7 +10,7 @@ from google.cloud.storage import Blob, Bucket
 from Tests.scripts.utils.log_util import install_logging
 from Tests.Marketplace.marketplace_services import init_storage_client, Pack, \
     load_json, store_successful_and_failed_packs_in_ci_artifacts, \
-    get_upload_data
+    get_upload_data, BucketManifest
 from Tests.Marketplace.marketplace_constants import PackStatus, GCPConfig, BucketUploadFlow, PACKS_FOLDER, \
     PACKS_FULL_PATH, IGNORED_FILES
 from Tests.Marketplace.upload_packs import extract_packs_artifacts, print_packs_summary, get_packs_summary
@@ -367,6 +367,9 @@ def main():
 
     packs_for_current_marketplace = []
 
+    # List the packs blobs of the build bucket once, instead of once for each pack
+    build_bucket_manifest = BucketManifest.from_bucket(build_bucket, build_bucket_base_path)
+
     for pack in packs_list:
         task_status = pack.load_user_metadata()
         if not task_status:
@@ -392,21 +395,24 @@ def main():
             continue
 
         task_status = pack.copy_integration_images(
-            production_bucket, build_bucket, pc_uploaded_images, production_base_path, build_bucket_base_path)
+            production_bucket, build_bucket, pc_uploaded_images, production_base_path, build_bucket_base_path,
+            build_bucket_manifest)
         if not task_status:
             pack.status = PackStatus.FAILED_IMAGES_UPLOAD.name
             pack.cleanup()
             continue
 
         task_status = pack.copy_author_image(
-            production_bucket, build_bucket, pc_uploaded_images, production_base_path, build_bucket_base_path)
+            production_bucket, build_bucket, pc_uploaded_images, production_base_path, build_bucket_base_path,
+            build_bucket_manifest)
         if not task_status:
             pack.status = PackStatus.FAILED_AUTHOR_IMAGE_UPLOAD.name
             pack.cleanup()
             continue
 
         task_status, skipped_pack_uploading = pack.copy_and_upload_to_storage(
-            production_bucket, build_bucket, pc_successful_packs_dict, production_base_path, build_bucket_base_path)
+            production_bucket, build_bucket, pc_successful_packs_dict, production_base_path, build_bucket_base_path,
+            build_bucket_manifest)
         if skipped_pack_uploading:
             pack.status = PackStatus.PACK_ALREADY_EXISTS.name
             pack.cleanup()
@@ -1,4 +1,5 @@
 import base64
+import bisect
 import fnmatch
 import glob
 import json
@@ -11,10 +12,11 @@ import urllib.parse
 import warnings
 from datetime import datetime, timedelta
 from distutils.util import strtobool
+from threading import Lock
 
 from packaging.version import Version
 from pathlib import Path
-from typing import Tuple, Any, Union, List, Dict, Optional
+from typing import Tuple, Any, Union, List, Dict, Optional, Iterable
 from zipfile import ZipFile, ZIP_DEFLATED
 
 import git
@@ -30,6 +32,156 @@ from Utils.release_notes_generator import aggregate_release_notes_for_marketplac
 from Tests.scripts.utils import logging_wrapper as logging
 
 
+class BucketManifest(object):
+    """ An in memory listing of the blob names in a bucket under a base path, which is looked up instead of listing
+    the blobs of each pack in the bucket. The blobs are listed once per build, or read from a local manifest file.
+    A local directory can stand in for the bucket, with the blob names as the relative paths of its files.
+
+    Args:
+        blob_names (Iterable[str]): the names of the blobs in the bucket.
+
+    """
+
+    def __init__(self, blob_names: Iterable[str]):
+        self._blob_names = sorted(set(blob_names))
+        self._lock = Lock()
+
+    @classmethod
+    def from_bucket(cls, storage_bucket: Any, base_path: str) -> 'BucketManifest':
+        """ Lists the blobs of the bucket under the base path.
+
+        Args:
+            storage_bucket (google.cloud.storage.bucket.Bucket): google cloud storage bucket.
+            base_path (str): the path in the bucket to list the blobs under.
+
+        Returns:
+            BucketManifest: the manifest of the blobs.
+
+        """
+        manifest = cls(blob.name for blob in storage_bucket.list_blobs(prefix=base_path))
+        logging.info(f"Listed {len(manifest)} blobs under {base_path} in {storage_bucket.name} bucket.")
+        return manifest
+
+    @classmethod
+    def from_file(cls, manifest_path: str) -> 'BucketManifest':
+        """ Reads the manifest from a file saved by `save`.
+
+        Args:
+            manifest_path (str): the manifest file path.
+
+        Returns:
+            BucketManifest: the manifest of the blobs.
+
+        """
+        with open(manifest_path, 'r') as manifest_file:
+            return cls(json.load(manifest_file))
+
+    @classmethod
+    def from_directory(cls, directory_path: str) -> 'BucketManifest':
+        """ Lists the files of a local directory that stands in for a bucket.
+
+        Args:
+            directory_path (str): the directory path.
+
+        Returns:
+            BucketManifest: the manifest of the files, named by their path relative to the directory.
+
+        """
+        return cls(path.relative_to(directory_path).as_posix() for path in Path(directory_path).rglob('*')
+                   if path.is_file())
+
+    def save(self, manifest_path: str):
+        """ Saves the manifest to a file.
+
+        Args:
+            manifest_path (str): the manifest file path.
+
+        """
+        with self._lock:
+            blob_names = list(self._blob_names)
+        with open(manifest_path, 'w') as manifest_file:
+            json.dump(blob_names, manifest_file)
+
+    def list_blobs(self, prefix: str) -> List[str]:
+        """ Gets the names of the blobs which start with the prefix, like `Bucket.list_blobs(prefix=prefix)`.
+
+        Args:
+            prefix (str): the prefix of the blob names.
+
+        Returns:
+            list: the sorted names of the blobs.
+
+        """
+        with self._lock:
+            start = bisect.bisect_left(self._blob_names, prefix)
+            end = start
+            while end < len(self._blob_names) and self._blob_names[end].startswith(prefix):
+                end += 1
+            return self._blob_names[start:end]
+
+    def exists(self, blob_name: str) -> bool:
+        """ Checks whether a blob exists in the bucket, like `Blob.exists()`.
+
+        Args:
+            blob_name (str): the blob name.
+
+        Returns:
+            bool: whether the blob exists.
+
+        """
+        with self._lock:
+            index = bisect.bisect_left(self._blob_names, blob_name)
+            return index < len(self._blob_names) and self._blob_names[index] == blob_name
+
+    def add(self, blob_name: str):
+        """ Adds a blob which was uploaded to the bucket.
+
+        Args:
+            blob_name (str): the blob name.
+
+        """
+        with self._lock:
+            index = bisect.bisect_left(self._blob_names, blob_name)
+            if index == len(self._blob_names) or self._blob_names[index] != blob_name:
+                self._blob_names.insert(index, blob_name)
+
+    def __len__(self):
+        return len(self._blob_names)
+
+
+def list_blob_names(storage_bucket: Any, prefix: str, bucket_manifest: Optional[BucketManifest] = None) -> List[str]:
+    """ Gets the names of the blobs in the bucket which start with the prefix, from the manifest of the bucket if given.
+
+    Args:
+        storage_bucket (google.cloud.storage.bucket.Bucket): google cloud storage bucket.
+        prefix (str): the prefix of the blob names.
+        bucket_manifest (BucketManifest): the manifest of the bucket.
+
+    Returns:
+        list: the names of the blobs.
+
+    """
+    if bucket_manifest is not None:
+        return bucket_manifest.list_blobs(prefix)
+    return [blob.name for blob in storage_bucket.list_blobs(prefix=prefix)]
+
+
+def blob_exists(blob: Any, bucket_manifest: Optional[BucketManifest] = None) -> bool:
+    """ Checks whether the blob exists in its bucket, in the manifest of the bucket if given.
+
+    Args:
+        blob (google.cloud.storage.blob.Blob): google cloud storage blob.
+        bucket_manifest (BucketManifest): the manifest of the bucket of the blob.
+
+    Returns:
+        bool: whether the blob exists.
+
+    """
+    if bucket_manifest is not None:
+        return bucket_manifest.exists(blob.name)
+    return blob.exists()
+
+
 class Pack(object):
     """ Class that manipulates and manages the upload of pack's artifact and metadata to cloud storage.
 
@@ -1021,7 +1173,8 @@ class Pack(object):
             return task_status, modified_rn_files_paths
 
     def upload_to_storage(self, zip_pack_path, latest_version, storage_bucket, override_pack, storage_base_path,
-                          private_content=False, pack_artifacts_path=None, overridden_upload_path=None):
+                          private_content=False, pack_artifacts_path=None, overridden_upload_path=None,
+                          bucket_manifest=None):
         """ Manages the upload of pack zip artifact to correct path in cloud storage.
         The zip pack will be uploaded by defaualt to following path: /content/packs/pack_name/pack_latest_version.
         In case that zip pack artifact already exist at constructed path, the upload will be skipped.
@@ -1039,6 +1192,8 @@ class Pack(object):
 
             pack_artifacts_path (str): Path to where we are saving pack artifacts.
             overridden_upload_path (str): If provided, will override version_pack_path calculation and will use this path instead
+            bucket_manifest (BucketManifest): The manifest of the bucket, to look up the existing pack files in instead
+                                              of listing them in the bucket.
 
         Returns:
             bool: whether the operation succeeded.
@@ -1056,7 +1211,8 @@ class Pack(object):
                 zip_to_upload_full_path = overridden_upload_path
             else:
                 version_pack_path = os.path.join(storage_base_path, self._pack_name, latest_version)
-                existing_files = [Path(f.name).name for f in storage_bucket.list_blobs(prefix=version_pack_path)]
+                existing_files = [Path(name).name for name in
+                                  list_blob_names(storage_bucket, version_pack_path, bucket_manifest)]
 
                 if override_pack:
                     logging.warning(f"Uploading {self._pack_name} pack to storage and overriding the existing pack "
@@ -1073,6 +1229,8 @@ class Pack(object):
 
             with open(zip_pack_path, "rb") as pack_zip:
                 blob.upload_from_file(pack_zip)
+            if bucket_manifest is not None:
+                bucket_manifest.add(zip_to_upload_full_path)
             if private_content:
                 secondary_encryption_key_pack_name = f"{self._pack_name}.enc2.zip"
                 secondary_encryption_key_bucket_path = os.path.join(version_pack_path,
@@ -1108,7 +1266,7 @@ class Pack(object):
             return task_status, True, None
 
     def copy_and_upload_to_storage(self, production_bucket, build_bucket, successful_packs_dict, storage_base_path,
-                                   build_bucket_base_path):
+                                   build_bucket_base_path, build_bucket_manifest=None):
         """ Manages the copy of pack zip artifact from the build bucket to the production bucket.
         The zip pack will be copied to following path: /content/packs/pack_name/pack_latest_version if
         the pack exists in the successful_packs_dict from Prepare content step in Create Instances job.
@@ -1119,6 +1277,8 @@ class Pack(object):
             successful_packs_dict (dict): the dict of all packs were uploaded in prepare content step
             storage_base_path (str): The target destination of the upload in the target bucket.
             build_bucket_base_path (str): The path of the build bucket in gcp.
+            build_bucket_manifest (BucketManifest): The manifest of the build bucket, to look up the pack files in
+                                                    instead of listing them in the bucket.
         Returns:
             bool: Status - whether the operation succeeded.
             bool: Skipped pack - true in case of pack existence at the targeted path and the copy process was skipped,
@@ -1137,7 +1297,7 @@ class Pack(object):
         build_version_pack_path = os.path.join(build_bucket_base_path, self._pack_name, latest_version)
 
         # Verifying that the latest version of the pack has been uploaded to the build bucket
-        existing_bucket_version_files = [f.name for f in build_bucket.list_blobs(prefix=build_version_pack_path)]
+        existing_bucket_version_files = list_blob_names(build_bucket, build_version_pack_path, build_bucket_manifest)
         if not existing_bucket_version_files:
             logging.error(f"{self._pack_name} latest version ({latest_version}) was not found on build bucket at "
                           f"path {build_version_pack_path}.")
@@ -1178,16 +1338,17 @@ class Pack(object):
             build_bucket,
             build_bucket_base_path,
             production_bucket,
-            storage_base_path
+            storage_base_path,
+            build_bucket_manifest
         )
 
         return task_status, False
 
     def copy_and_upload_dependencies_zip_to_storage(self, build_bucket, build_bucket_base_path, production_bucket,
-                                                    storage_base_path):
+                                                    storage_base_path, build_bucket_manifest=None):
         pack_with_deps_name = f'{self._pack_name}_with_dependencies.zip'
         build_pack_with_deps_path = os.path.join(build_bucket_base_path, self._pack_name, pack_with_deps_name)
-        existing_bucket_deps_files = [f.name for f in build_bucket.list_blobs(prefix=build_pack_with_deps_path)]
+        existing_bucket_deps_files = list_blob_names(build_bucket, build_pack_with_deps_path, build_bucket_manifest)
         if existing_bucket_deps_files:
             logging.info(f"{self._pack_name} with dependencies was found. path {build_pack_with_deps_path}.")
 
@@ -2428,7 +2589,7 @@ class Pack(object):
             return task_status
 
     def copy_integration_images(self, production_bucket, build_bucket, images_data, storage_base_path,
-                                build_bucket_base_path):
+                                build_bucket_base_path, build_bucket_manifest=None):
         """ Copies all pack's integration images from the build bucket to the production bucket
 
         Args:
@@ -2437,6 +2598,7 @@ class Pack(object):
             images_data (dict): The images data structure from Prepare Content step
             storage_base_path (str): The target destination of the upload in the target bucket.
             build_bucket_base_path (str): The path of the build bucket in gcp.
+            build_bucket_manifest (BucketManifest): The manifest of the build bucket, to look up the images in.
         Returns:
             bool: Whether the operation succeeded.
 
@@ -2450,7 +2612,7 @@ class Pack(object):
             build_bucket_image_path = os.path.join(build_bucket_base_path, self._pack_name, image_name)
             build_bucket_image_blob = build_bucket.blob(build_bucket_image_path)
 
-            if not build_bucket_image_blob.exists():
+            if not blob_exists(build_bucket_image_blob, build_bucket_manifest):
                 logging.error(f"Found changed/added integration image {image_name} in content repo but "
                               f"{build_bucket_image_path} does not exist in build bucket")
                 task_status = False
@@ -2546,7 +2708,8 @@ class Pack(object):
             self._author_image = author_image_storage_path
             return task_status
 
-    def copy_author_image(self, production_bucket, build_bucket, images_data, storage_base_path, build_bucket_base_path):
+    def copy_author_image(self, production_bucket, build_bucket, images_data, storage_base_path, build_bucket_base_path,
+                          build_bucket_manifest=None):
         """ Copies pack's author image from the build bucket to the production bucket
 
         Searches for `Author_image.png`, In case no such image was found, default Base pack image path is used and
@@ -2558,6 +2721,7 @@ class Pack(object):
             images_data (dict): The images data structure from Prepare Content step
             storage_base_path (str): The target destination of the upload in the target bucket.
             build_bucket_base_path (str): The path of the build bucket in gcp.
+            build_bucket_manifest (BucketManifest): The manifest of the build bucket, to look up the image in.
         Returns:
             bool: Whether the operation succeeded.
 
@@ -2567,7 +2731,7 @@ class Pack(object):
             build_author_image_path = os.path.join(build_bucket_base_path, self._pack_name, Pack.AUTHOR_IMAGE_NAME)
             build_author_image_blob = build_bucket.blob(build_author_image_path)
 
-            if build_author_image_blob.exists():
+            if blob_exists(build_author_image_blob, build_bucket_manifest):
                 try:
                     copied_blob = build_bucket.copy_blob(
                         blob=build_author_image_blob, destination_bucket=production_bucket,
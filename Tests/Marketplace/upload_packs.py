@@ -3,22 +3,26 @@ import os
 import sys
 import argparse
 import shutil
+import threading
+import time
 import uuid
 import prettytable
 import glob
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
 from google.cloud.storage import Bucket
 from pathlib import Path
 
 from zipfile import ZipFile
-from typing import Any, Tuple, Union, Optional
+from typing import Any, Tuple, Union, Optional, Callable
 
 from requests import Response
 
 from Tests.Marketplace.marketplace_services import init_storage_client, Pack, \
     load_json, get_content_git_client, get_recent_commits_data, store_successful_and_failed_packs_in_ci_artifacts, \
-    json_write
+    json_write, BucketManifest
 from Tests.Marketplace.marketplace_statistics import StatisticsHandler
 from Tests.Marketplace.marketplace_constants import PackStatus, Metadata, GCPConfig, BucketUploadFlow, \
     CONTENT_ROOT_PATH, PACKS_FOLDER, PACKS_FULL_PATH, IGNORED_FILES, IGNORED_PATHS, LANDING_PAGE_SECTIONS_PATH, \
@@ -29,6 +33,11 @@ from Tests.scripts.utils.log_util import install_logging
 from Tests.scripts.utils import logging_wrapper as logging
 import traceback
 
+PACK_STAGES = ['Collect', 'Metadata', 'Upload', 'Index']
+# the content repo object and the signing key file are shared by all the packs processed concurrently
+GIT_LOCK = threading.Lock()
+SIGNING_LOCK = threading.Lock()
+
 
 def get_packs_names(target_packs: str, previous_commit_hash: str = "HEAD^") -> set:
     """Detects and returns packs names to upload.
@@ -406,12 +415,14 @@ def create_corepacks_config(storage_bucket: Any, build_number: str, index_folder
     logging.success(f"Finished copying {GCPConfig.CORE_PACK_FILE_NAME} to artifacts.")
 
 
-def _build_summary_table(packs_input_list: list, include_pack_status: bool = False) -> Any:
+def _build_summary_table(packs_input_list: list, include_pack_status: bool = False,
+                         packs_stages_durations: Optional[dict] = None) -> Any:
     """Build summary table from pack list
 
     Args:
         packs_input_list (list): list of Packs
         include_pack_status (bool): whether pack includes status
+        packs_stages_durations (dict): durations in seconds of the upload stages, as {pack_name: {stage: duration}}
 
     Returns:
         PrettyTable: table with upload result of packs.
@@ -420,6 +431,8 @@ def _build_summary_table(packs_input_list: list, include_pack_status: bool = Fal
     table_fields = ["Index", "Pack ID", "Pack Display Name", "Latest Version", "Aggregated Pack Versions"]
     if include_pack_status:
         table_fields.append("Status")
+    if packs_stages_durations is not None:
+        table_fields.extend(f"{stage} Time (s)" for stage in PACK_STAGES)
     table = prettytable.PrettyTable()
     table.field_names = table_fields
 
@@ -429,6 +442,10 @@ def _build_summary_table(packs_input_list: list, include_pack_status: bool = Fal
                pack.aggregation_str if pack.aggregated and pack.aggregation_str else "False"]
         if include_pack_status:
             row.append(pack_status_message)
+        if packs_stages_durations is not None:
+            pack_stages_durations = packs_stages_durations.get(pack.name, {})
+            row.extend(f"{pack_stages_durations[stage]:.1f}" if stage in pack_stages_durations else "-"
+                       for stage in PACK_STAGES)
         table.add_row(row)
 
     return table
@@ -706,7 +723,7 @@ def check_if_index_is_updated(index_folder_path: str, content_repo: Any, current
 
 
 def print_packs_summary(successful_packs: list, skipped_packs: list, failed_packs: list,
-                        fail_build: bool = True):
+                        fail_build: bool = True, packs_stages_durations: Optional[dict] = None):
     """Prints summary of packs uploaded to gcs.
 
     Args:
@@ -714,6 +731,8 @@ def print_packs_summary(successful_packs: list, skipped_packs: list, failed_pack
         skipped_packs (list): list of packs that were skipped during upload.
         failed_packs (list): list of packs that were failed during upload.
         fail_build (bool): indicates whether to fail the build upon failing pack to upload or not
+        packs_stages_durations (dict): durations in seconds of the upload stages, as {pack_name: {stage: duration}}.
+            If given, the durations are added to the summary tables.
 
     """
     logging.info(
@@ -723,17 +742,19 @@ Total number of packs: {len(successful_packs + skipped_packs + failed_packs)}
 ----------------------------------------------------------------------------------------------------------""")
 
     if successful_packs:
-        successful_packs_table = _build_summary_table(successful_packs)
+        successful_packs_table = _build_summary_table(successful_packs, packs_stages_durations=packs_stages_durations)
         logging.success(f"Number of successful uploaded packs: {len(successful_packs)}")
         logging.success(f"Uploaded packs:\n{successful_packs_table}")
         with open('pack_list.txt', 'w') as f:
-            f.write(successful_packs_table.get_string())
+            f.write(_build_summary_table(successful_packs).get_string())
     if skipped_packs:
-        skipped_packs_table = _build_summary_table(skipped_packs, include_pack_status=True)
+        skipped_packs_table = _build_summary_table(skipped_packs, include_pack_status=True,
+                                                   packs_stages_durations=packs_stages_durations)
         logging.warning(f"Number of skipped packs: {len(skipped_packs)}")
         logging.warning(f"Skipped packs:\n{skipped_packs_table}")
     if failed_packs:
-        failed_packs_table = _build_summary_table(failed_packs, include_pack_status=True)
+        failed_packs_table = _build_summary_table(failed_packs, include_pack_status=True,
+                                                  packs_stages_durations=packs_stages_durations)
         logging.critical(f"Number of failed packs: {len(failed_packs)}")
         logging.critical(f"Failed packs:\n{failed_packs_table}")
         if fail_build:
@@ -903,7 +924,8 @@ def sign_and_zip_pack(pack, signature_key, delete_test_playbooks=False):
         pack.status = PackStatus.FAILED_REMOVING_PACK_SKIPPED_FOLDERS
         pack.cleanup()
         return False
-    task_status = pack.sign_pack(signature_key)
+    with SIGNING_LOCK:
+        task_status = pack.sign_pack(signature_key)
     if not task_status:
         pack.status = PackStatus.FAILED_SIGNING_PACKS.name
         pack.cleanup()
@@ -916,6 +938,202 @@ def sign_and_zip_pack(pack, signature_key, delete_test_playbooks=False):
     return task_status
 
 
+@contextmanager
+def timed_pack_stage(packs_stages_durations: dict, pack_name: str, stage: str):
+    """Records the duration of an upload stage of a pack.
+
+    Args:
+        packs_stages_durations (dict): durations in seconds of the upload stages, as {pack_name: {stage: duration}}.
+        pack_name (str): the pack name.
+        stage (str): the stage name, one of PACK_STAGES.
+
+    """
+    start_time = time.time()
+    try:
+        yield
+    finally:
+        packs_stages_durations.setdefault(pack_name, {})[stage] = time.time() - start_time
+
+
+def process_packs_concurrently(packs_list: list, process_pack: Callable[[Pack], Any], max_workers: int) -> list:
+    """Runs process_pack on the packs with up to max_workers packs processed at the same time.
+
+    Args:
+        packs_list (list): list of Packs.
+        process_pack (Callable): function processing a single pack.
+        max_workers (int): maximum number of packs processed at the same time.
+
+    Returns:
+        list: the results of process_pack, in the order of packs_list.
+
+    """
+    if max_workers <= 1:
+        return [process_pack(pack) for pack in packs_list]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(process_pack, packs_list))
+
+
+def collect_pack_items_and_images(pack: Pack, storage_bucket: Any, storage_base_path: str,
+                                  diff_files_list: Any) -> bool:
+    """Collects the content items of the pack and uploads its integration and author images.
+
+    Returns:
+        bool: whether the stage succeeded.
+
+    """
+    task_status = pack.collect_content_items()
+    if not task_status:
+        pack.status = PackStatus.FAILED_COLLECT_ITEMS.name
+        pack.cleanup()
+        return False
+
+    task_status = pack.upload_integration_images(storage_bucket, storage_base_path, diff_files_list, True)
+    if not task_status:
+        pack.status = PackStatus.FAILED_IMAGES_UPLOAD.name
+        pack.cleanup()
+        return False
+
+    task_status = pack.upload_author_image(storage_bucket, storage_base_path, diff_files_list, True)
+    if not task_status:
+        pack.status = PackStatus.FAILED_AUTHOR_IMAGE_UPLOAD.name
+        pack.cleanup()
+        return False
+
+    return True
+
+
+def prepare_pack_metadata(pack: Pack, content_repo: Any, index_folder_path: str, packs_dependencies_mapping: dict,
+                          build_number: str, current_commit_hash: str, previous_commit_hash: str,
+                          statistics_handler: StatisticsHandler, packs_for_current_marketplace_dict: dict,
+                          marketplace: str) -> bool:
+    """Detects if the pack is modified, formats its metadata and prepares its release notes.
+    The index folder is only read in this stage, it is updated only after all the packs went through it.
+
+    Returns:
+        bool: whether the stage succeeded.
+
+    """
+    # detect if the pack is modified and return modified RN files
+    with GIT_LOCK:
+        task_status, modified_rn_files_paths = pack.detect_modified(content_repo, index_folder_path,
+                                                                    current_commit_hash, previous_commit_hash)
+
+    if not task_status:
+        pack.status = PackStatus.FAILED_DETECTING_MODIFIED_FILES.name
+        pack.cleanup()
+        return False
+
+    # If the pack is dependent on a new pack, therefore it is not yet in the index.zip, it is marked as missing
+    # dependencies, and after updating the index.zip with all new packs - we will go over the pack again to add what
+    # was missing. See issue #37290.
+    task_status, _ = pack.format_metadata(index_folder_path, packs_dependencies_mapping, build_number,
+                                          current_commit_hash, statistics_handler,
+                                          packs_for_current_marketplace_dict, marketplace)
+
+    if not task_status:
+        pack.status = PackStatus.FAILED_METADATA_PARSING.name
+        pack.cleanup()
+        return False
+
+    task_status, not_updated_build = pack.prepare_release_notes(index_folder_path, build_number,
+                                                                modified_rn_files_paths)
+    if not task_status:
+        pack.status = PackStatus.FAILED_RELEASE_NOTES.name
+        pack.cleanup()
+        return False
+
+    if not_updated_build:
+        pack.status = PackStatus.PACK_IS_NOT_UPDATED_IN_RUNNING_BUILD.name
+        pack.cleanup()
+        return False
+
+    return True
+
+
+def load_bucket_manifest(storage_bucket: Any, storage_base_path: str,
+                         bucket_manifest_path: Optional[str] = None) -> BucketManifest:
+    """Loads the manifest of the bucket packs blobs from the local manifest file if it exists, and lists the bucket
+    otherwise. The listed manifest is saved to the local manifest file, if given.
+
+    Args:
+        storage_bucket (google.cloud.storage.bucket.Bucket): google cloud storage bucket.
+        storage_base_path (str): the packs path in the bucket.
+        bucket_manifest_path (str): path of the local manifest file.
+
+    Returns:
+        BucketManifest: the manifest of the bucket packs blobs.
+
+    """
+    if bucket_manifest_path and os.path.exists(bucket_manifest_path):
+        logging.info(f"Loading the bucket manifest from {bucket_manifest_path}")
+        return BucketManifest.from_file(bucket_manifest_path)
+
+    bucket_manifest = BucketManifest.from_bucket(storage_bucket, storage_base_path)
+    if bucket_manifest_path:
+        bucket_manifest.save(bucket_manifest_path)
+    return bucket_manifest
+
+
+def zip_and_upload_pack(pack: Pack, signature_key: str, remove_test_playbooks: bool, storage_bucket: Any,
+                        override_pack: bool, storage_base_path: str, index_folder_path: str,
+                        bucket_manifest: Optional[BucketManifest] = None) -> Tuple[bool, bool, bool]:
+    """Signs, zips and uploads the pack to the storage bucket.
+
+    The existing versions of the pack are looked up in the bucket manifest, if given.
+
+    Returns:
+        bool: whether the stage succeeded.
+        bool: whether the upload was skipped since the pack already exists in the bucket.
+        bool: whether the pack exists in the index.
+
+    """
+    sign_and_zip_pack(pack, signature_key, remove_test_playbooks)
+
+    task_status, skipped_upload, _ = pack.upload_to_storage(pack.zip_path, pack.latest_version, storage_bucket,
+                                                            override_pack, storage_base_path,
+                                                            bucket_manifest=bucket_manifest)
+
+    if not task_status:
+        pack.status = PackStatus.FAILED_UPLOADING_PACK.name
+        pack.cleanup()
+        return False, skipped_upload, False
+
+    task_status, exists_in_index = pack.check_if_exists_in_index(index_folder_path)
+    if not task_status:
+        pack.status = PackStatus.FAILED_SEARCHING_PACK_IN_INDEX.name
+        pack.cleanup()
+        return False, skipped_upload, exists_in_index
+
+    return True, skipped_upload, exists_in_index
+
+
+def update_pack_in_index(pack: Pack, index_folder_path: str, skipped_upload: bool, exists_in_index: bool,
+                         packs_with_missing_dependencies: list):
+    """Copies the uploaded pack into the index folder, and sets the final status of the pack.
+
+    """
+    task_status = pack.prepare_for_index_upload()
+    if not task_status:
+        pack.status = PackStatus.FAILED_PREPARING_INDEX_FOLDER.name
+        pack.cleanup()
+        return
+
+    task_status = update_index_folder(index_folder_path=index_folder_path, pack_name=pack.name, pack_path=pack.path,
+                                      pack_version=pack.latest_version, hidden_pack=pack.hidden)
+    if not task_status:
+        pack.status = PackStatus.FAILED_UPDATING_INDEX_FOLDER.name
+        pack.cleanup()
+        return
+
+    # in case that pack already exist at cloud storage path and in index, don't show that the pack was changed
+    if skipped_upload and exists_in_index and pack not in packs_with_missing_dependencies:
+        pack.status = PackStatus.PACK_ALREADY_EXISTS.name
+        pack.cleanup()
+        return
+
+    pack.status = PackStatus.SUCCESS.name
+
+
 def upload_packs_with_dependencies_zip(storage_bucket, storage_base_path, signature_key,
                                        packs_for_current_marketplace_dict):
     """
@@ -1026,6 +1244,11 @@ def option_handler():
     parser.add_argument('-dz', '--create_dependencies_zip', type=str2bool, help="Upload packs with dependencies zip",
                         required=False)
     parser.add_argument('-mp', '--marketplace', help="marketplace version", default='xsoar')
+    parser.add_argument('-w', '--max_workers', help="Maximum number of packs to process concurrently.", type=int,
+                        default=8, required=False)
+    parser.add_argument('-bm', '--bucket_manifest', required=False,
+                        help="Path of a local manifest of the bucket packs blobs. Read instead of listing the bucket "
+                             "if it exists, written after listing the bucket otherwise.")
     # disable-secrets-detection-end
     return parser.parse_args()
 
@@ -1051,6 +1274,8 @@ def main():
     force_upload = option.force_upload
     marketplace = option.marketplace
     is_create_dependencies_zip = option.create_dependencies_zip
+    max_workers = option.max_workers
+    bucket_manifest_path = option.bucket_manifest
 
     # google cloud storage client initialized
     storage_client = init_storage_client(service_account)
@@ -1073,7 +1298,7 @@ def main():
     # detect packs to upload
     pack_names = get_packs_names(target_packs, previous_commit_hash)
     extract_packs_artifacts(packs_artifacts_path, extract_destination_path)
-    packs_list = [Pack(pack_name, os.path.join(extract_destination_path, pack_name)) for pack_name in pack_names
+    packs_list = [Pack(pack_name, os.path.join(extract_destination_path, pack_name)) for pack_name in sorted(pack_names)
                   if os.path.exists(os.path.join(extract_destination_path, pack_name))]
     diff_files_list = content_repo.commit(current_commit_hash).diff(content_repo.commit(previous_commit_hash))
 
@@ -1092,8 +1317,8 @@ def main():
     # clean index and gcs from non existing or invalid packs
     clean_non_existing_packs(index_folder_path, private_packs, storage_bucket, storage_base_path, id_set, marketplace)
 
-    # packs that depends on new packs that are not in the previous index.zip
-    packs_with_missing_dependencies = []
+    # list the packs blobs of the bucket once, instead of once for each pack
+    bucket_manifest = load_bucket_manifest(storage_bucket, storage_base_path, bucket_manifest_path)
 
     # pack relevant for the current marketplace this upload is done for
     packs_for_current_marketplace_dict = {}
@@ -1116,106 +1341,49 @@ def main():
         else:
             packs_for_current_marketplace_dict[pack.name] = pack
 
+    # durations of the upload stages of each pack, shown in the summary
+    packs_stages_durations: dict = {}
+
     # iterating over packs that are for this current marketplace
     # we iterate over all packs (and not just for modified packs) for several reasons -
     # 1. we might need the info about this pack if a modified pack is dependent on it.
     # 2. even if the pack is not updated, we still keep some fields in it's metadata updated, such as download count,
     # changelog, etc.
-    for pack in list(packs_for_current_marketplace_dict.values()):
-        task_status = pack.collect_content_items()
-        if not task_status:
-            pack.status = PackStatus.FAILED_COLLECT_ITEMS.name
-            pack.cleanup()
-            continue
-
-        task_status = pack.upload_integration_images(storage_bucket, storage_base_path, diff_files_list, True)
-        if not task_status:
-            pack.status = PackStatus.FAILED_IMAGES_UPLOAD.name
-            pack.cleanup()
-            continue
-
-        task_status = pack.upload_author_image(storage_bucket, storage_base_path, diff_files_list, True)
-
-        if not task_status:
-            pack.status = PackStatus.FAILED_AUTHOR_IMAGE_UPLOAD.name
-            pack.cleanup()
-            continue
-
-        # detect if the pack is modified and return modified RN files
-        task_status, modified_rn_files_paths = pack.detect_modified(content_repo, index_folder_path,
-                                                                    current_commit_hash, previous_commit_hash)
-
-        if not task_status:
-            pack.status = PackStatus.FAILED_DETECTING_MODIFIED_FILES.name
-            pack.cleanup()
-            continue
-
-        task_status, is_missing_dependencies = pack.format_metadata(index_folder_path,
-                                                                    packs_dependencies_mapping, build_number,
-                                                                    current_commit_hash,
-                                                                    statistics_handler,
-                                                                    packs_for_current_marketplace_dict, marketplace)
-
-        if is_missing_dependencies:
-            # If the pack is dependent on a new pack, therefore it is not yet in the index.zip as it might not have
-            # been iterated yet, we will note that it is missing dependencies, and after updating the index.zip with
-            # all new packs - we will go over the pack again to add what was missing. See issue #37290.
-            packs_with_missing_dependencies.append(pack)
-
-        if not task_status:
-            pack.status = PackStatus.FAILED_METADATA_PARSING.name
-            pack.cleanup()
-            continue
-
-        task_status, not_updated_build = pack.prepare_release_notes(index_folder_path, build_number,
-                                                                    modified_rn_files_paths)
-        if not task_status:
-            pack.status = PackStatus.FAILED_RELEASE_NOTES.name
-            pack.cleanup()
-            continue
-
-        if not_updated_build:
-            pack.status = PackStatus.PACK_IS_NOT_UPDATED_IN_RUNNING_BUILD.name
-            pack.cleanup()
-            continue
-
-        sign_and_zip_pack(pack, signature_key, remove_test_playbooks)
-
-        task_status, skipped_upload, _ = pack.upload_to_storage(pack.zip_path, pack.latest_version, storage_bucket,
-                                                                override_all_packs or pack.is_modified,
-                                                                storage_base_path)
-
-        if not task_status:
-            pack.status = PackStatus.FAILED_UPLOADING_PACK.name
-            pack.cleanup()
-            continue
+    # The packs are collected, formatted and uploaded concurrently. The index folder is updated afterwards, one pack
+    # at a time in the packs order, so the metadata of all the packs is formatted against the downloaded index.
+    def process_pack(pack: Pack) -> Optional[Tuple[bool, bool]]:
+        with timed_pack_stage(packs_stages_durations, pack.name, 'Collect'):
+            if not collect_pack_items_and_images(pack, storage_bucket, storage_base_path, diff_files_list):
+                return None
+
+        with timed_pack_stage(packs_stages_durations, pack.name, 'Metadata'):
+            if not prepare_pack_metadata(pack, content_repo, index_folder_path, packs_dependencies_mapping,
+                                         build_number, current_commit_hash, previous_commit_hash,
+                                         statistics_handler, packs_for_current_marketplace_dict, marketplace):
+                return None
+
+        with timed_pack_stage(packs_stages_durations, pack.name, 'Upload'):
+            task_status, skipped_upload, exists_in_index = zip_and_upload_pack(
+                pack, signature_key, remove_test_playbooks, storage_bucket, override_all_packs or pack.is_modified,
+                storage_base_path, index_folder_path, bucket_manifest)
+            if not task_status:
+                return None
 
-        task_status, exists_in_index = pack.check_if_exists_in_index(index_folder_path)
-        if not task_status:
-            pack.status = PackStatus.FAILED_SEARCHING_PACK_IN_INDEX.name
-            pack.cleanup()
-            continue
+        return skipped_upload, exists_in_index
 
-        task_status = pack.prepare_for_index_upload()
-        if not task_status:
-            pack.status = PackStatus.FAILED_PREPARING_INDEX_FOLDER.name
-            pack.cleanup()
-            continue
+    packs_for_current_marketplace = list(packs_for_current_marketplace_dict.values())
+    packs_upload_results = process_packs_concurrently(packs_for_current_marketplace, process_pack, max_workers)
 
-        task_status = update_index_folder(index_folder_path=index_folder_path, pack_name=pack.name, pack_path=pack.path,
-                                          pack_version=pack.latest_version, hidden_pack=pack.hidden)
-        if not task_status:
-            pack.status = PackStatus.FAILED_UPDATING_INDEX_FOLDER.name
-            pack.cleanup()
-            continue
+    packs_with_missing_dependencies = [pack for pack in packs_for_current_marketplace
+                                       if pack.is_missing_dependencies]
 
-        # in case that pack already exist at cloud storage path and in index, don't show that the pack was changed
-        if skipped_upload and exists_in_index and pack not in packs_with_missing_dependencies:
-            pack.status = PackStatus.PACK_ALREADY_EXISTS.name
-            pack.cleanup()
+    for pack, upload_result in zip(packs_for_current_marketplace, packs_upload_results):
+        if upload_result is None:
             continue
-
-        pack.status = PackStatus.SUCCESS.name
+        skipped_upload, exists_in_index = upload_result
+        with timed_pack_stage(packs_stages_durations, pack.name, 'Index'):
+            update_pack_in_index(pack, index_folder_path, skipped_upload, exists_in_index,
+                                 packs_with_missing_dependencies)
 
     logging.info(f"packs_with_missing_dependencies: {packs_with_missing_dependencies}")
 
@@ -1271,7 +1439,8 @@ def main():
     )
 
     # summary of packs status
-    print_packs_summary(successful_packs, skipped_packs, failed_packs, not is_bucket_upload_flow)
+    print_packs_summary(successful_packs, skipped_packs, failed_packs, not is_bucket_upload_flow,
+                        packs_stages_durations)
 
 
 if __name__ == '__main__':